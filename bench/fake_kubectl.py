@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Scriptable stand-in for ``kubectl`` used by the benchmark harness.
+
+The simulated clusters are described by the JSON scenario file named in
+``KUBEWIRE_BENCH_SCENARIO`` (see ``run_bench.py``); every invocation is
+appended to ``KUBEWIRE_BENCH_COUNTER`` when it is set. Only the commands
+discovery issues are implemented, and this file deliberately imports nothing
+from KubeWire so that its startup cost stays close to a real binary's.
+"""
+import json
+import os
+import sys
+import time
+
+SYSTEM_NAMESPACES = ["default", "kube-system", "kube-public", "kube-node-lease"]
+
+
+def load_scenario() -> dict:
+    path = os.environ.get("KUBEWIRE_BENCH_SCENARIO")
+    if not path:
+        fail("KUBEWIRE_BENCH_SCENARIO is not set")
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def record(args):
+    counter = os.environ.get("KUBEWIRE_BENCH_COUNTER")
+    if not counter:
+        return
+    # One short O_APPEND write per call, safe across concurrent processes
+    fd = os.open(counter, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, (" ".join(args[:2]) + "\n").encode("utf-8"))
+    finally:
+        os.close(fd)
+
+
+def fail(message: str, code: int = 1):
+    print(message, file=sys.stderr)
+    sys.exit(code)
+
+
+def option(args, name):
+    for i, arg in enumerate(args):
+        if arg == name and i + 1 < len(args):
+            return args[i + 1]
+        if arg.startswith(name + "="):
+            return arg.split("=", 1)[1]
+    return None
+
+
+def context_names(scenario: dict):
+    return [f"bench-ctx-{i:02d}" for i in range(scenario['contexts'])]
+
+
+def context_kind(scenario: dict, context: str) -> str:
+    """Assigns failure modes from the end of the context list: auth failures
+    last, then timeouts, then contexts where cluster-wide listing is forbidden."""
+    names = context_names(scenario)
+    if context not in names:
+        return "missing"
+    from_end = len(names) - names.index(context)
+    for kind in ("auth_failures", "timeouts", "forbidden"):
+        count = scenario.get(kind, 0)
+        if from_end <= count:
+            return kind
+        from_end -= count
+    return "ok"
+
+
+def namespaces(scenario: dict):
+    return SYSTEM_NAMESPACES + [f"ns-{i:03d}" for i in range(scenario['namespaces'])]
+
+
+def service_items(scenario: dict, namespace: str):
+    if namespace == "default":
+        return [{"metadata": {"name": "kubernetes", "namespace": namespace, "resourceVersion": "1"},
+                 "spec": {"ports": [{"port": 443}]}}]
+    if namespace in SYSTEM_NAMESPACES:
+        return [{"metadata": {"name": "kube-dns", "namespace": namespace, "resourceVersion": "1"},
+                 "spec": {"ports": [{"port": 53}]}}]
+    return [
+        {
+            "metadata": {"name": f"svc-{i:03d}", "namespace": namespace, "resourceVersion": "1",
+                         "labels": {"app": f"svc-{i:03d}"}},
+            "spec": {"type": "ClusterIP", "clusterIP": "10.0.0.1",
+                     "ports": [{"name": "http", "port": 80, "protocol": "TCP", "targetPort": 8080},
+                               {"name": "metrics", "port": 9090, "protocol": "TCP", "targetPort": 9090}]},
+        }
+        for i in range(scenario['services'])
+    ]
+
+
+def print_list(items):
+    print(json.dumps({"apiVersion": "v1", "kind": "List", "items": items,
+                      "metadata": {"resourceVersion": "1"}}, indent=4))
+
+
+def simulate_timeout(scenario: dict, args):
+    # kubectl honours --request-timeout; without it the call hangs for the
+    # scenario's timeout_seconds
+    requested = option(args, "--request-timeout")
+    delay = float(scenario.get('timeout_seconds', 3))
+    if requested:
+        delay = min(delay, float(requested.rstrip("s") or 0))
+    time.sleep(delay)
+    fail("Unable to connect to the server: dial tcp 10.255.255.1:443: i/o timeout")
+
+
+def main(args):
+    record(args)
+    scenario = load_scenario()
+    time.sleep(float(scenario.get('latency', 0)))
+
+    if args[:2] == ["config", "get-contexts"]:
+        print("\n".join(context_names(scenario)))
+        return
+    if args[:1] == ["version"]:
+        print("Client Version: v1.30.0-kubewire-bench")
+        return
+    if args[:1] != ["get"] or len(args) < 2:
+        fail(f"fake kubectl: unsupported command: {' '.join(args)}")
+
+    context = option(args, "--context")
+    kind = context_kind(scenario, context)
+    if kind == "missing":
+        fail(f'error: context "{context}" does not exist')
+    if kind == "auth_failures":
+        fail("error: You must be logged in to the server (the server has asked for the client to provide credentials)")
+    if kind == "timeouts":
+        simulate_timeout(scenario, args)
+
+    resource = args[1]
+    if resource == "namespaces":
+        print_list([{"metadata": {"name": ns}, "status": {"phase": "Active"}} for ns in namespaces(scenario)])
+    elif resource == "services":
+        if "--watch" in args:
+            # Nothing changes in a benchmark; stay connected until killed
+            while True:
+                time.sleep(3600)
+        if "--all-namespaces" in args or "-A" in args:
+            if kind == "forbidden":
+                fail('Error from server (Forbidden): services is forbidden: User "bench" cannot list '
+                     'resource "services" in API group "" at the cluster scope')
+            items = [item for ns in namespaces(scenario) for item in service_items(scenario, ns)]
+        else:
+            namespace = option(args, "--namespace") or option(args, "-n") or "default"
+            items = service_items(scenario, namespace)
+        print_list(items)
+    else:
+        fail(f'error: the server doesn\'t have a resource type "{resource}"')
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
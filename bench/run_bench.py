@@ -0,0 +1,359 @@
+"""Benchmarks discovery and startup against a fake kubectl.
+
+Each benchmark runs in a fresh interpreter with ``bench/fake_kubectl.py`` first
+on ``PATH``, a generated kubeconfig and a throwaway ``KubeWire_CONFIG``
+directory, and reports wall time, the number of kubectl invocations and the
+peak RSS of that interpreter::
+
+    python -m bench.run_bench --scenario medium --repeat 3 --output before.json
+    python -m bench.run_bench --scenario medium --repeat 3 --compare before.json
+
+``--compare`` exits with status 1 when a metric regressed by more than
+``--threshold`` against the baseline.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+FAKE_KUBECTL = Path(__file__).resolve().parent / "fake_kubectl.py"
+
+SCENARIOS = {
+    'small': {'contexts': 3, 'namespaces': 5, 'services': 5, 'latency': 0.05},
+    'medium': {'contexts': 10, 'namespaces': 20, 'services': 10, 'latency': 0.1},
+    'large': {'contexts': 30, 'namespaces': 50, 'services': 20, 'latency': 0.15},
+    'flaky': {'contexts': 10, 'namespaces': 10, 'services': 10, 'latency': 0.1,
+              'auth_failures': 2, 'timeouts': 2, 'forbidden': 2, 'timeout_seconds': 3},
+}
+
+# Run in this order: the cached, save and read benchmarks reuse the cache and
+# config.yml left behind by the ones before them
+BENCHMARKS = ("discover_cold", "discover_cached", "save_config", "read_config", "tui_first_paint", "gui_first_paint")
+
+# Metrics compared against a baseline; lower is better for all of them
+METRICS = ("wall_s", "subprocesses", "peak_rss_mb")
+
+
+def _log(message):
+    timestamp = time.strftime("%H:%M:%S")
+    print(f"[{timestamp}] {message}", file=sys.stderr)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# Workers: each runs inside its own interpreter and returns the measured seconds
+
+def _worker_discover_cold() -> float:
+    from config.config_manager import ConfigManager
+    start = time.perf_counter()
+    ConfigManager.discover_config(use_cache=False)
+    return time.perf_counter() - start
+
+
+def _worker_discover_cached() -> float:
+    from config.config_manager import ConfigManager
+    start = time.perf_counter()
+    ConfigManager.discover_config(use_cache=True)
+    return time.perf_counter() - start
+
+
+def _worker_save_config() -> float:
+    from config.config_manager import ConfigManager
+    contexts, _statuses = ConfigManager.discover_config(use_cache=True)
+    start = time.perf_counter()
+    ConfigManager.save_discovered_config(contexts)
+    return time.perf_counter() - start
+
+
+def _worker_read_config() -> float:
+    from config.config_manager import ConfigManager
+    start = time.perf_counter()
+    ConfigManager.read_config()
+    return time.perf_counter() - start
+
+
+class _PaintProbe(io.TextIOBase):
+    """Stand-in for stdout that notes when the first menu prompt is written."""
+
+    MARKERS = ("Enter your choice", "Select environment")
+
+    def __init__(self, target):
+        self.target = target
+        self.painted_at: Optional[float] = None
+
+    def write(self, text):
+        if self.painted_at is None and any(marker in text for marker in self.MARKERS):
+            self.painted_at = time.perf_counter()
+        return self.target.write(text)
+
+    def flush(self):
+        self.target.flush()
+
+
+def _worker_tui_first_paint() -> float:
+    import asyncio
+    start = time.perf_counter()
+    from core import main as core_main
+    probe = _PaintProbe(sys.stdout)
+    sys.stdout = probe
+    sys.stdin = io.StringIO("quit\n" * 5)
+    try:
+        asyncio.run(core_main._create_tui())
+    finally:
+        sys.stdout = probe.target
+    if probe.painted_at is None:
+        raise RuntimeError("the TUI exited without showing a menu")
+    return probe.painted_at - start
+
+
+def _worker_gui_first_paint() -> float:
+    start = time.perf_counter()
+    from ui.gui import KubeWireGUI
+    gui = KubeWireGUI()
+    try:
+        deadline = time.monotonic() + 120
+        while not gui.services_tree.get_children():
+            if time.monotonic() > deadline:
+                raise RuntimeError("no services were shown within 120s")
+            gui.root.update()
+            time.sleep(0.005)
+        return time.perf_counter() - start
+    finally:
+        gui.on_closing()
+
+
+WORKERS = {
+    'discover_cold': _worker_discover_cold,
+    'discover_cached': _worker_discover_cached,
+    'save_config': _worker_save_config,
+    'read_config': _worker_read_config,
+    'tui_first_paint': _worker_tui_first_paint,
+    'gui_first_paint': _worker_gui_first_paint,
+}
+
+
+def run_worker(name: str, result_file: str):
+    sys.path.insert(0, str(REPO_ROOT))
+    try:
+        result = {'wall_s': round(WORKERS[name](), 4), 'peak_rss_mb': _peak_rss_mb()}
+    except Exception as e:
+        result = {'skipped': f"{type(e).__name__}: {e}"}
+    with open(result_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+    # Skip interpreter teardown: daemon threads of the UIs may still be running
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(0)
+
+
+# Orchestration
+
+def build_scenario(args) -> dict:
+    scenario = {'contexts': 0, 'namespaces': 0, 'services': 0, 'latency': 0.0,
+                'auth_failures': 0, 'timeouts': 0, 'forbidden': 0, 'timeout_seconds': 3}
+    scenario.update(SCENARIOS[args.scenario])
+    for key in scenario:
+        value = getattr(args, key, None)
+        if value is not None:
+            scenario[key] = value
+    scenario['name'] = args.scenario
+    scenario['settings'] = dict(_parse_setting(item) for item in args.setting)
+    return scenario
+
+
+def _parse_setting(item: str):
+    key, sep, value = item.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"--setting expects key=value, got {item}")
+    return key, yaml.safe_load(value)
+
+
+def prepare_workdir(workdir: Path, scenario: dict) -> Dict[str, str]:
+    """Writes the scenario, kubeconfig and kubectl shim, and returns the base environment."""
+    if os.name == "nt":
+        raise SystemExit("The benchmark harness needs a POSIX shell to put the fake kubectl on PATH")
+
+    scenario_file = workdir / "scenario.json"
+    scenario_file.write_text(json.dumps(scenario, indent=2), encoding='utf-8')
+
+    names = [f"bench-ctx-{i:02d}" for i in range(scenario['contexts'])]
+    kubeconfig = {
+        'apiVersion': 'v1',
+        'kind': 'Config',
+        'current-context': names[0] if names else '',
+        'clusters': [{'name': name, 'cluster': {'server': f"https://{name}.bench.invalid:6443"}} for name in names],
+        'users': [{'name': name, 'user': {'token': 'bench'}} for name in names],
+        'contexts': [{'name': name, 'context': {'cluster': name, 'user': name}} for name in names],
+    }
+    kubeconfig_file = workdir / "kubeconfig"
+    kubeconfig_file.write_text(yaml.safe_dump(kubeconfig, sort_keys=False), encoding='utf-8')
+
+    bin_dir = workdir / "bin"
+    bin_dir.mkdir()
+    shim = bin_dir / "kubectl"
+    shim.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_KUBECTL}" "$@"\n', encoding='utf-8')
+    shim.chmod(0o755)
+
+    env = dict(os.environ)
+    env['PATH'] = str(bin_dir) + os.pathsep + env.get('PATH', '')
+    env['KUBECONFIG'] = str(kubeconfig_file)
+    env['KUBEWIRE_BENCH_SCENARIO'] = str(scenario_file)
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    return env
+
+
+def run_benchmark(name: str, run_dir: Path, env: Dict[str, str], timeout: float) -> dict:
+    counter = run_dir / f"{name}.calls"
+    result_file = run_dir / f"{name}.json"
+    env = dict(env, KUBEWIRE_BENCH_COUNTER=str(counter), KubeWire_CONFIG=str(run_dir))
+    cmd = [sys.executable, "-m", "bench.run_bench", "--worker", name, "--result-file", str(result_file)]
+    with open(run_dir / f"{name}.log", 'w', encoding='utf-8') as log:
+        try:
+            subprocess.run(cmd, cwd=REPO_ROOT, env=env, stdin=subprocess.DEVNULL, stdout=log,
+                           stderr=subprocess.STDOUT, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return {'skipped': f"timed out after {timeout:.0f}s"}
+    try:
+        with open(result_file, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return {'skipped': f"worker crashed, see {run_dir / (name + '.log')}"}
+    try:
+        with open(counter, 'r', encoding='utf-8') as f:
+            result['subprocesses'] = sum(1 for _line in f)
+    except OSError:
+        result['subprocesses'] = 0
+    return result
+
+
+def summarize(runs: List[dict]) -> dict:
+    measured = [run for run in runs if 'skipped' not in run]
+    if not measured:
+        return {'skipped': runs[0]['skipped'] if runs else "not run"}
+    walls = [run['wall_s'] for run in measured]
+    rss = [run['peak_rss_mb'] for run in measured if run.get('peak_rss_mb') is not None]
+    return {
+        'wall_s': round(statistics.median(walls), 4),
+        'wall_min_s': round(min(walls), 4),
+        'wall_max_s': round(max(walls), 4),
+        'runs': len(measured),
+        'subprocesses': max(run['subprocesses'] for run in measured),
+        'peak_rss_mb': max(rss) if rss else None,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """Prints a comparison table and returns True when nothing regressed."""
+    ok = True
+    print(f"{'benchmark':<18} {'metric':<13} {'baseline':>10} {'current':>10} {'change':>8}", file=sys.stderr)
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before or 'skipped' in result or 'skipped' in before:
+            continue
+        for metric in METRICS:
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else (0.0 if new == old else float('inf'))
+            regressed = change > threshold
+            ok = ok and not regressed
+            flag = "  ⚠️ regression" if regressed else ""
+            print(f"{name:<18} {metric:<13} {old:>10} {new:>10} {change:>+7.0%}{flag}", file=sys.stderr)
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.run_bench", description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="small")
+    parser.add_argument("--contexts", type=int, help="Override the number of contexts")
+    parser.add_argument("--namespaces", type=int, help="Override namespaces per context")
+    parser.add_argument("--services", type=int, help="Override services per namespace")
+    parser.add_argument("--latency", type=float, help="Seconds every kubectl call takes")
+    parser.add_argument("--auth-failures", dest="auth_failures", type=int, help="Contexts failing authentication")
+    parser.add_argument("--timeouts", type=int, help="Contexts whose calls time out")
+    parser.add_argument("--forbidden", type=int, help="Contexts denying cluster-wide service listing")
+    parser.add_argument("--timeout-seconds", dest="timeout_seconds", type=float,
+                        help="How long a timing-out call hangs without --request-timeout")
+    parser.add_argument("--setting", action="append", default=[], metavar="KEY=VALUE",
+                        help="config.yml setting for the run, e.g. discovery_workers=4")
+    parser.add_argument("--bench", action="append", choices=BENCHMARKS,
+                        help="Benchmark to run (repeatable); defaults to all")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds before a benchmark run is abandoned")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression (default 0.2)")
+    parser.add_argument("--keep", action="store_true", help="Keep the working directory with logs")
+    parser.add_argument("--worker", choices=BENCHMARKS, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(args.worker, args.result_file)
+        return 0
+
+    scenario = build_scenario(args)
+    selected = [name for name in BENCHMARKS if not args.bench or name in args.bench]
+    workdir = Path(tempfile.mkdtemp(prefix="kubewire-bench-"))
+    try:
+        env = prepare_workdir(workdir, scenario)
+        runs = {name: [] for name in selected}
+        for repeat in range(args.repeat):
+            run_dir = workdir / f"run-{repeat}"
+            run_dir.mkdir()
+            if scenario['settings']:
+                with open(run_dir / "config.yml", 'w', encoding='utf-8') as f:
+                    yaml.safe_dump({'settings': scenario['settings'], 'contexts': []}, f)
+            for name in selected:
+                result = run_benchmark(name, run_dir, env, args.timeout)
+                runs[name].append(result)
+                detail = result.get('skipped') or f"{result['wall_s']:.3f}s, {result['subprocesses']} kubectl calls"
+                _log(f"{name} [{repeat + 1}/{args.repeat}]: {detail}")
+    finally:
+        if args.keep:
+            _log(f"Working directory kept at {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'scenario': scenario,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {name: summarize(name_runs) for name, name_runs in runs.items()},
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding='utf-8')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
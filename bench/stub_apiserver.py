@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""Stub Kubernetes API server for exercising the ``api`` backends.
+
+Serves just enough of the API for discovery and ``k8s/portforward.py``:
+namespaces ``--namespaces`` each hold services ``--services`` (paged with
+``limit``/``continue``), every service ``NAME`` exists with selector
+``app=NAME`` and port ``--service-port``, is backed by one running pod
+``NAME-0``, and every portforward WebSocket to that pod is connected to
+``--backend`` (a built-in echo server by default). Plain HTTP with keep-alive;
+with ``--token`` other bearer tokens get 401. ``--kubeconfig`` writes a
+kubeconfig with a ``stub`` context pointing at it:
+
+    python -m bench.stub_apiserver --port 18080 --kubeconfig /tmp/stub.kubeconfig
+    KUBECONFIG=/tmp/stub.kubeconfig python -m core.main
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import re
+import struct
+import threading
+from typing import Optional, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+NAMESPACES_PATH = re.compile(r"^/api/v1/namespaces$")
+SERVICES_PATH = re.compile(r"^/api/v1(?:/namespaces/([^/]+))?/services$")
+SERVICE_PATH = re.compile(r"^/api/v1/namespaces/([^/]+)/services/([^/]+)$")
+PODS_PATH = re.compile(r"^/api/v1/namespaces/([^/]+)/pods$")
+PORTFORWARD_PATH = re.compile(r"^/api/v1/namespaces/([^/]+)/pods/([^/]+)/portforward$")
+
+
+class StubApiServer:
+    def __init__(self, service_port: int, backend: Tuple[str, int], namespaces: Sequence[str] = ("team-a", "team-b"),
+                 services: Sequence[str] = ("api", "web"), token: Optional[str] = None,
+                 forbid_cluster_wide: bool = False, delay: float = 0):
+        self.service_port = service_port
+        self.backend = backend
+        self.namespaces = list(namespaces)
+        self.services = list(services)
+        self.token = token
+        self.forbid_cluster_wide = forbid_cluster_wide
+        self.delay = delay
+        # Counters for checks: TCP connections accepted, requests served
+        # (upgrades included) and requests refused with 401
+        self.connections = 0
+        self.requests = 0
+        self.unauthorized = 0
+        self.portforwards = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await self.serve_connection(reader, writer)
+        except asyncio.CancelledError:
+            # StubThread.stop cancels the connections still open
+            writer.close()
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        keep_alive = True
+        while keep_alive:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+            self.requests += 1
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            method, target, _version = request_line.split(" ", 2)
+            headers = {}
+            for line in header_lines:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+            url = urlsplit(target)
+            path = unquote(url.path)
+            query = parse_qs(url.query)
+            keep_alive = headers.get('connection', "").lower() != "close"
+
+            if self.token is not None and headers.get('authorization') != f"Bearer {self.token}":
+                self.unauthorized += 1
+                self.respond(writer, 401, {"message": "Unauthorized"}, keep_alive)
+                await writer.drain()
+                continue
+            if PORTFORWARD_PATH.match(path) and headers.get('upgrade', "").lower() == "websocket":
+                await self.portforward(reader, writer, headers, int(query.get('ports', ["0"])[0]))
+                return
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            status, body = self.route(method, path, query)
+            self.respond(writer, status, body, keep_alive)
+            try:
+                await writer.drain()
+            except ConnectionError:
+                break
+        writer.close()
+
+    def route(self, method: str, path: str, query: dict) -> Tuple[int, dict]:
+        if method != "GET":
+            return 405, {"message": "method not allowed"}
+        if NAMESPACES_PATH.match(path):
+            return 200, self.page([{"metadata": {"name": namespace}} for namespace in self.namespaces], query)
+        if SERVICES_PATH.match(path):
+            namespace = SERVICES_PATH.match(path).group(1)
+            if namespace is None and self.forbid_cluster_wide:
+                return 403, {"message": 'services is forbidden: cannot list resource "services" at the cluster scope'}
+            namespaces = [namespace] if namespace is not None else self.namespaces
+            return 200, self.page([self.service_item(ns, name) for ns in namespaces if ns in self.namespaces
+                                   for name in self.services], query)
+        if SERVICE_PATH.match(path):
+            _namespace, name = SERVICE_PATH.match(path).groups()
+            return 200, {"metadata": {"name": name}, "spec": {
+                "selector": {"app": name},
+                "ports": [{"port": self.service_port, "targetPort": self.service_port}]}}
+        if PODS_PATH.match(path):
+            selector = query.get('labelSelector', [""])[0]
+            app = selector.split("=", 1)[1] if selector.startswith("app=") else "pod"
+            return 200, {"items": [{
+                "metadata": {"name": f"{app}-0"},
+                "spec": {"containers": [{"ports": [{"containerPort": self.service_port}]}]},
+                "status": {"phase": "Running", "conditions": [{"type": "Ready", "status": "True"}]}}]}
+        return 404, {"message": f"{path} not found"}
+
+    def service_item(self, namespace: str, name: str) -> dict:
+        return {"metadata": {"name": name, "namespace": namespace, "resourceVersion": "1"},
+                "spec": {"selector": {"app": name}, "ports": [{"port": self.service_port}]}}
+
+    @staticmethod
+    def page(items: list, query: dict) -> dict:
+        start = int(query.get('continue', ["0"])[0] or 0)
+        limit = int(query.get('limit', ["0"])[0] or 0) or len(items)
+        metadata = {"resourceVersion": "1"}
+        if start + limit < len(items):
+            metadata["continue"] = str(start + limit)
+        return {"metadata": metadata, "items": items[start:start + limit]}
+
+    @staticmethod
+    def respond(writer: asyncio.StreamWriter, status: int, body: dict, keep_alive: bool = False):
+        data = json.dumps(body).encode("utf-8")
+        connection = "keep-alive" if keep_alive else "close"
+        writer.write(f"HTTP/1.1 {status} Stub\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: {connection}\r\n\r\n".encode("latin-1") + data)
+
+    async def portforward(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, headers: dict, port: int):
+        accept = base64.b64encode(hashlib.sha1((headers['sec-websocket-key'] + WEBSOCKET_GUID).encode()).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Protocol: v4.channel.k8s.io\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        self.portforwards += 1
+        port_header = struct.pack("<H", port)
+        try:
+            backend_reader, backend_writer = await asyncio.open_connection(*self.backend)
+        except OSError as e:
+            writer.write(StubApiServer.frame(b"\x00" + port_header))
+            writer.write(StubApiServer.frame(b"\x01" + port_header + f"dial backend: {e}".encode()))
+            writer.write(StubApiServer.frame(b"", opcode=0x8))
+            await writer.drain()
+            writer.close()
+            return
+        writer.write(StubApiServer.frame(b"\x00" + port_header))
+        writer.write(StubApiServer.frame(b"\x01" + port_header))
+
+        async def from_client():
+            while True:
+                message = await StubApiServer.read_message(reader)
+                if message is None:
+                    return
+                if message[:1] == b"\x00" and len(message) > 1:
+                    backend_writer.write(message[1:])
+                    await backend_writer.drain()
+
+        async def to_client():
+            while True:
+                data = await backend_reader.read(65536)
+                if not data:
+                    return
+                writer.write(StubApiServer.frame(b"\x00" + data))
+                await writer.drain()
+
+        tasks = [asyncio.ensure_future(from_client()), asyncio.ensure_future(to_client())]
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        backend_writer.close()
+        try:
+            writer.write(StubApiServer.frame(b"", opcode=0x8))
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    @staticmethod
+    def frame(payload: bytes, opcode: int = 0x2) -> bytes:
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        return header + payload
+
+    @staticmethod
+    async def read_message(reader: asyncio.StreamReader) -> Optional[bytes]:
+        try:
+            first, second = await reader.readexactly(2)
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", await reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", await reader.readexactly(8))[0]
+            key = await reader.readexactly(4) if second & 0x80 else b"\0\0\0\0"
+            payload = bytearray(await reader.readexactly(length))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        if first & 0x0F == 0x8:
+            return None
+        for i in range(length):
+            payload[i] ^= key[i % 4]
+        return bytes(payload)
+
+
+async def echo(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    while True:
+        data = await reader.read(65536)
+        if not data:
+            break
+        writer.write(data)
+        await writer.drain()
+    writer.close()
+
+
+def write_kubeconfig(path: str, port: int, token: str = "stub"):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "apiVersion": "v1", "kind": "Config", "current-context": "stub",
+            "clusters": [{"name": "stub", "cluster": {"server": f"http://127.0.0.1:{port}"}}],
+            "users": [{"name": "stub", "user": {"token": token}}],
+            "contexts": [{"name": "stub", "context": {"cluster": "stub", "user": "stub"}}],
+        }, f, indent=2)
+
+
+class StubThread:
+    """Runs a StubApiServer, and an echo server as its backend, on a loop in
+    a background thread, for checks that drive the client synchronously."""
+
+    def __init__(self, **options):
+        self.loop = asyncio.new_event_loop()
+        self.options = options
+        self.stub: Optional[StubApiServer] = None
+        self.port = 0
+        self.echo_port = 0
+        self._thread = threading.Thread(target=self.loop.run_forever, name="stub-apiserver", daemon=True)
+
+    def start(self) -> "StubThread":
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result(timeout=10)
+        return self
+
+    async def _start(self):
+        self._echo = await asyncio.start_server(echo, "127.0.0.1", 0)
+        self.echo_port = self._echo.sockets[0].getsockname()[1]
+        self.stub = StubApiServer(self.options.pop('service_port', 80), ("127.0.0.1", self.echo_port),
+                                  **self.options)
+        self._server = await asyncio.start_server(self.stub.handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    def stop(self):
+        async def close():
+            self._server.close()
+            self._echo.close()
+            # Keep-alive and relayed connections still being served
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result(timeout=10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        self.loop.close()
+
+
+async def serve(args):
+    backend = args.backend
+    if backend is None:
+        echo_server = await asyncio.start_server(echo, "127.0.0.1", 0)
+        backend = ("127.0.0.1", echo_server.sockets[0].getsockname()[1])
+    else:
+        host, _, port = backend.rpartition(":")
+        backend = (host or "127.0.0.1", int(port))
+    stub = StubApiServer(args.service_port, backend, args.namespaces.split(","), args.services.split(","),
+                         args.token, args.forbid_cluster_wide, args.delay)
+    server = await asyncio.start_server(stub.handle, "127.0.0.1", args.port)
+    port = server.sockets[0].getsockname()[1]
+    if args.kubeconfig:
+        write_kubeconfig(args.kubeconfig, port, args.token or "stub")
+    print(f"Stub API server on http://127.0.0.1:{port}, forwarding to {backend[0]}:{backend[1]}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on (default: any free port)")
+    parser.add_argument("--service-port", type=int, default=80, help="Port every service exposes")
+    parser.add_argument("--backend", help="host:port portforwards connect to (default: built-in echo server)")
+    parser.add_argument("--kubeconfig", help="Write a kubeconfig for the stub to this path")
+    parser.add_argument("--namespaces", default="team-a,team-b", help="Comma-separated namespaces to list")
+    parser.add_argument("--services", default="api,web", help="Comma-separated services listed in every namespace")
+    parser.add_argument("--token", help="Only accept this bearer token")
+    parser.add_argument("--forbid-cluster-wide", action="store_true",
+                        help="Answer cluster-wide service listing with 403")
+    parser.add_argument("--delay", type=float, default=0, help="Seconds every API request takes")
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,31 @@
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import fields
 from pathlib import Path
-from typing import Tuple, Dict, List
+from typing import Callable, Tuple, Dict, Iterable, List, Optional
 
 import yaml
 
-from k8s.discovery import KubernetesDiscovery
-from models.models import ContextStatus
+from config.discovery_cache import DiscoveryCache
+from k8s.discovery import Deadline, KubernetesDiscovery, EXCLUDED_NAMESPACES
+from k8s.kubeconfig import KubeConfig
+from k8s.service_watcher import ServiceEvent
+from metrics.runtime_stats import RuntimeStats
+from models.models import ContextStatus, Settings
 from pods import Pod, PodUI
 
+BASE_PORT = 8080
+
 
 class ConfigManager:
+    # Builds the PodUI of every service read or discovered; DaemonClient.attach
+    # swaps in core.daemon.RemotePodUI when core.main finds a running daemon
+    pod_factory: Callable[[Pod], PodUI] = PodUI
+    _discovery_cache: Optional[DiscoveryCache] = None
+    _cache_lock = threading.Lock()
+
     @staticmethod
     def get_config_path() -> Path:
         env_var = "KubeWire_CONFIG"
@@ -41,52 +56,495 @@ class ConfigManager:
             return Path(__file__).parent / relative_path
 
     @staticmethod
-    def discover_config() -> Tuple[Dict[str, List[PodUI]], List[ContextStatus]]:
+    def _read_raw_config() -> dict:
+        config_file = ConfigManager.get_config_path()
+        if not config_file.exists():
+            return {}
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config_data = yaml.safe_load(f)
+        except Exception as e:
+            ConfigManager._log_console(f"⚠️  Could not read {config_file}: {e}")
+            return {}
+        return config_data if isinstance(config_data, dict) else {}
+
+    @staticmethod
+    def read_settings() -> Settings:
+        settings = Settings()
+        raw_settings = ConfigManager._read_raw_config().get('settings')
+        if not isinstance(raw_settings, dict):
+            return settings
+
+        types = {field.name: field.type for field in fields(Settings)}
+        for key, value in raw_settings.items():
+            if key not in types:
+                continue
+            try:
+                setattr(settings, key, ConfigManager._coerce_setting(value, types[key]))
+            except (TypeError, ValueError, OverflowError):
+                ConfigManager._log_console(f"⚠️  Invalid value {value!r} for setting {key}, "
+                                           f"using the default {getattr(settings, key)!r}")
+        return settings
+
+    @staticmethod
+    def _coerce_setting(value, setting_type):
+        """Converts a value read from config.yml to the type of its setting; raises ValueError when it cannot."""
+        if setting_type is bool:
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, str) and value.strip().lower() in ("true", "yes", "on", "1"):
+                return True
+            if isinstance(value, str) and value.strip().lower() in ("false", "no", "off", "0"):
+                return False
+            raise ValueError(value)
+        if setting_type is str:
+            if not isinstance(value, str):
+                raise ValueError(value)
+            return value
+        if isinstance(value, bool):
+            # YAML reads "yes" and "on" as booleans, which are no numbers
+            raise ValueError(value)
+        number = float(value)
+        if number != number or number in (float("inf"), float("-inf")):
+            raise ValueError(value)
+        if setting_type is int:
+            if not number.is_integer():
+                raise ValueError(value)
+            return int(number)
+        return number
+
+    @staticmethod
+    def _log_console(message):
+        from datetime import datetime
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        print(f"[{timestamp}] {message}")
+
+    @staticmethod
+    def _probe_context(context: str, cluster_wide: bool, deadline: Deadline, call_timeout: Optional[float],
+                       backend: str) -> Tuple[bool, str, List[str], Optional[Dict[str, List[Dict[str, any]]]], bool]:
+        # The first call made against a context doubles as its access check,
+        # so an accessible context costs one round-trip in cluster-wide mode.
+        # The last element tells whether the context ran out of time.
+        if cluster_wide:
+            success, output, services_by_namespace = KubernetesDiscovery.get_all_services(
+                context, timeout=deadline.timeout(call_timeout), backend=backend)
+            if success:
+                return True, "", list(services_by_namespace.keys()), services_by_namespace, False
+            if not KubernetesDiscovery.is_forbidden(output):
+                return (False, KubernetesDiscovery.classify_access_error(output), [], None,
+                        KubernetesDiscovery.is_deadline_exceeded(output))
+            KubernetesDiscovery._log_console(f"   ⚠️  Cluster-wide listing forbidden in {context}, listing per namespace")
+
+        accessible, error_msg, namespaces = KubernetesDiscovery.list_namespaces(
+            context, timeout=deadline.timeout(min(5, call_timeout or 5)), backend=backend)
+        if not accessible:
+            return False, error_msg, [], None, error_msg == "Deadline exceeded"
+        return True, "", [ns for ns in namespaces if ns not in EXCLUDED_NAMESPACES], None, False
+
+    @staticmethod
+    def _list_namespace_services(context: str, namespace: str, deadline: Deadline, call_timeout: Optional[float],
+                                 backend: str) -> Tuple[bool, str, List[Dict[str, any]]]:
+        # The timeout is taken when the call starts, not when it is queued
+        return KubernetesDiscovery.list_services(context, namespace, deadline.timeout(call_timeout), backend)
+
+    @staticmethod
+    def _service_ports(service: Dict[str, any]) -> List[int]:
+        ports = [port for port in service.get('all_ports') or [] if port]
+        return ports or [service.get('port') or 80]
+
+    @staticmethod
+    def _build_context_pods(context: str, namespaces: List[str],
+                            services_by_namespace: Dict[str, List[Dict[str, any]]],
+                            forward_all_ports: bool = False, first_port: int = BASE_PORT) -> List[PodUI]:
+        """Numbers the primary local ports from ``first_port`` in discovery order;
+        with ``forward_all_ports`` the other ports of each service get local
+        ports after all the primaries, so enabling it never moves an existing
+        port. Callers building several contexts continue from the highest port
+        of the previous one (see ``_next_first_port``), so that tunnels of
+        different contexts can run side by side."""
+        context_pods = []
+        port_counter = first_port
+        for namespace in namespaces:
+            for service in services_by_namespace.get(namespace, []):
+                pod = Pod(context=context, namespace=namespace, service=service['name'], port=port_counter,
+                          remote_port=ConfigManager._service_ports(service)[0])
+                context_pods.append(ConfigManager.pod_factory(pod))
+                port_counter += 1
+        if forward_all_ports:
+            services = [service for namespace in namespaces for service in services_by_namespace.get(namespace, [])]
+            for pod, service in zip(context_pods, services):
+                for remote_port in ConfigManager._service_ports(service)[1:]:
+                    pod.pod.extra_ports.append((port_counter, remote_port))
+                    port_counter += 1
+        return context_pods
+
+    @staticmethod
+    def _next_first_port(first_port: int, context_pods: List[PodUI]) -> int:
+        return max((port + 1 for pod in context_pods for port in pod.get_local_ports()), default=first_port)
+
+    @staticmethod
+    def get_discovery_cache() -> DiscoveryCache:
+        with ConfigManager._cache_lock:
+            if ConfigManager._discovery_cache is None:
+                cache_file = ConfigManager.get_config_path().parent / DiscoveryCache.FILE_NAME
+                ttl = int(ConfigManager.read_settings().discovery_cache_ttl)
+                ConfigManager._discovery_cache = DiscoveryCache(cache_file, ttl)
+            return ConfigManager._discovery_cache
+
+    @staticmethod
+    def discover_config(max_workers: Optional[int] = None, use_cache: bool = False,
+                        only_contexts: Optional[List[str]] = None) -> Tuple[Dict[str, List[PodUI]], List[ContextStatus]]:
         contexts = KubernetesDiscovery.get_contexts()
         if not contexts:
             print("❌ No contexts found")
             return {}, []
+        if only_contexts is not None:
+            contexts = [context for context in contexts if context in only_contexts]
+
+        settings = ConfigManager.read_settings()
+        if max_workers is None:
+            max_workers = settings.discovery_workers
+        max_workers = max(1, int(max_workers))
+
+        backend = settings.discovery_backend
+        KubernetesDiscovery.reset_cancel()
+        call_timeout = float(settings.discovery_call_timeout) or None
+        cache = ConfigManager.get_discovery_cache()
+        fingerprints = {context: KubeConfig.context_fingerprint(context) for context in contexts}
+
+        probes = {}
+        services = {}
+        degraded = set()
+        cached_contexts = set()
+        pending = []
+        for context in contexts:
+            entry = cache.get(context, fingerprints[context]) if use_cache else None
+            if entry is None:
+                pending.append(context)
+                continue
+            cached_contexts.add(context)
+            probes[context] = (True, "", entry['namespaces'])
+            for namespace in entry['namespaces']:
+                services[(context, namespace)] = entry['services'].get(namespace, [])
+
+        # Contexts and namespaces are fanned out over one bounded pool; the
+        # results are merged afterwards in kubeconfig order so that port
+        # assignment is identical to a serial walk. Every call is bounded by
+        # the per-call timeout and by its context's deadline, so a dead cluster
+        # only costs its own budget.
+        if pending:
+            deadlines = {context: Deadline(settings.discovery_context_deadline) for context in pending}
+            # Calls left per context; its discovery time (for the metrics
+            # endpoint) runs from its first call until the last one returns
+            outstanding = {}
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="discovery") as executor:
+                probe_futures = {
+                    executor.submit(ConfigManager._probe_context, context, settings.cluster_wide_discovery,
+                                    deadlines[context], call_timeout, backend): context
+                    for context in pending
+                }
+                service_futures = {}
+                for future in as_completed(probe_futures):
+                    context = probe_futures[future]
+                    accessible, error_msg, namespaces, services_by_namespace, timed_out = future.result()
+                    probes[context] = (accessible, error_msg, namespaces)
+                    if timed_out:
+                        degraded.add(context)
+                    if services_by_namespace is not None or not namespaces:
+                        for namespace, namespace_services in (services_by_namespace or {}).items():
+                            services[(context, namespace)] = namespace_services
+                        RuntimeStats.record_discovery(context, deadlines[context].elapsed())
+                        continue
+                    outstanding[context] = len(namespaces)
+                    for namespace in namespaces:
+                        service_future = executor.submit(ConfigManager._list_namespace_services, context,
+                                                         namespace, deadlines[context], call_timeout, backend)
+                        service_futures[service_future] = (context, namespace)
+                for future in as_completed(service_futures):
+                    context, namespace = service_futures[future]
+                    success, output, namespace_services = future.result()
+                    if success:
+                        services[(context, namespace)] = namespace_services
+                    elif KubernetesDiscovery.is_deadline_exceeded(output):
+                        degraded.add(context)
+                    outstanding[context] -= 1
+                    if not outstanding[context]:
+                        RuntimeStats.record_discovery(context, deadlines[context].elapsed())
+
+            for context in pending:
+                accessible, _error_msg, namespaces = probes[context]
+                if context in degraded:
+                    # Keep the last complete result rather than caching a partial one
+                    continue
+                if accessible:
+                    cache.put(context, fingerprints[context], namespaces,
+                              {ns: services.get((context, ns), []) for ns in namespaces})
+                else:
+                    cache.invalidate(context)
+            cache.save()
 
         result = {}
         context_statuses = []
+        first_port = BASE_PORT
 
         for context in contexts:
-            print(f"\n🎯 Processing context: {context}")
-            accessible, error_msg = KubernetesDiscovery.check_context_access(context)
+            if context in cached_contexts:
+                print(f"\n🎯 Processing context: {context} (cached)")
+            else:
+                print(f"\n🎯 Processing context: {context}")
+            accessible, error_msg, namespaces = probes[context]
             if not accessible:
                 print(f"   ❌ Context {context} is not accessible: {error_msg}")
-                context_statuses.append(ContextStatus(name=context, accessible=False, error_message=error_msg, service_count=0))
+                context_statuses.append(ContextStatus(name=context, accessible=False, error_message=error_msg,
+                                                      service_count=0, degraded=context in degraded))
                 continue
 
-            context_pods = []
-            namespaces = KubernetesDiscovery.get_namespaces(context)
-
-            port_counter = 8080
-            for namespace in namespaces:
-                if namespace in ['kube-system', 'kube-public', 'kube-node-lease', 'default']:
-                    continue
-                services = KubernetesDiscovery.get_services(context, namespace)
-                for service in services:
-                    pod = Pod(context=context, namespace=namespace, service=service['name'], port=port_counter)
-                    context_pods.append(PodUI(pod))
-                    port_counter += 1
-
-            context_statuses.append(ContextStatus(name=context, accessible=True, error_message="", service_count=len(context_pods)))
+            services_by_namespace = {ns: services.get((context, ns), []) for ns in namespaces}
+            context_pods = ConfigManager._build_context_pods(context, namespaces, services_by_namespace,
+                                                             settings.forward_all_ports, first_port)
+            first_port = ConfigManager._next_first_port(first_port, context_pods)
+
+            if context in degraded:
+                missing = len([ns for ns in namespaces if (context, ns) not in services])
+                error_msg = f"Deadline exceeded, {missing} namespace(s) missing"
+                print(f"   ⏱️  Context {context} is degraded: {error_msg}")
+                context_statuses.append(ContextStatus(name=context, accessible=True, error_message=error_msg,
+                                                      service_count=len(context_pods), degraded=True))
+            else:
+                context_statuses.append(ContextStatus(name=context, accessible=True, error_message="", service_count=len(context_pods)))
 
             if context_pods:
                 result[context] = context_pods
-                from datetime import datetime
-                timestamp = datetime.now().strftime("%H:%M:%S")
-                print(f"[{timestamp}] ✅ Added {len(context_pods)} services from context {context}")
+                ConfigManager._log_console(f"✅ Added {len(context_pods)} services from context {context}")
             else:
                 print(f"   ⚠️  No services found in context {context}")
 
         return result, context_statuses
 
+    @staticmethod
+    def refresh_context(context: str) -> Tuple[List[PodUI], ContextStatus]:
+        """Re-discovers a single context, bypassing and then updating its cache entry."""
+        result, statuses = ConfigManager.discover_config(only_contexts=[context])
+        if not statuses:
+            return [], ContextStatus(name=context, accessible=False, error_message="Context not found")
+        return result.get(context, []), statuses[0]
+
+    @staticmethod
+    def read_cached_config() -> Tuple[Dict[str, List[PodUI]], List[ContextStatus]]:
+        """Builds the context map from the discovery cache, including stale entries."""
+        result = {}
+        context_statuses = []
+        entries = ConfigManager.get_discovery_cache().entries()
+        forward_all_ports = ConfigManager.read_settings().forward_all_ports
+        first_port = BASE_PORT
+        for context, entry in entries.items():
+            context_pods = ConfigManager._build_context_pods(context, entry['namespaces'], entry['services'],
+                                                             forward_all_ports, first_port)
+            first_port = ConfigManager._next_first_port(first_port, context_pods)
+            context_statuses.append(ContextStatus(name=context, accessible=True, error_message="", service_count=len(context_pods)))
+            if context_pods:
+                result[context] = context_pods
+        return result, context_statuses
+
+    @staticmethod
+    def needs_reconcile() -> bool:
+        cache = ConfigManager.get_discovery_cache()
+        if cache.is_empty():
+            return False
+        entries = cache.entries()
+        return not entries or any(not cache.is_fresh(entry) for entry in entries.values())
+
+    @staticmethod
+    def context_signature(contexts: Dict[str, List[PodUI]]) -> Dict[str, List[Tuple[str, str, Tuple]]]:
+        return {
+            context: [(pod.get_namespace(), pod.get_service(), tuple(pod.get_port_pairs())) for pod in pods]
+            for context, pods in contexts.items()
+        }
+
+    @staticmethod
+    def used_ports(contexts: Dict[str, List[PodUI]]) -> set:
+        return {port for pods in contexts.values() for pod in pods for port in pod.get_local_ports()}
+
+    @staticmethod
+    def _next_free_port(used_ports: set) -> int:
+        port = max(used_ports) + 1 if used_ports else BASE_PORT
+        while port in used_ports:
+            port += 1
+        return port
+
+    @staticmethod
+    def merge_contexts(current: Dict[str, List[PodUI]], discovered: Dict[str, List[PodUI]],
+                       preserve: Iterable[str] = ()) -> Dict[str, List[PodUI]]:
+        """Merges a fresh discovery into the live context map.
+
+        Services that are still present keep their existing ``PodUI`` (and with it
+        their port and any running tunnel); new services get a port that does not
+        clash with any kept one, in whichever context; services that disappeared
+        are stopped. Contexts in ``preserve`` (degraded ones, whose results are
+        partial) only gain services: nothing is removed or stopped there.
+        """
+        preserve = set(preserve)
+        # Local ports are unique across contexts. Ports of running tunnels and
+        # of preserved services are claimed first, then those of the other kept
+        # services; a stopped one whose port is already claimed (configs written
+        # when every context numbered its ports from BASE_PORT) is moved
+        used_ports = set()
+        kept_by_context: Dict[str, Dict[Tuple[str, str], PodUI]] = {}
+        removed_by_context: Dict[str, Dict[Tuple[str, str], PodUI]] = {}
+        for context, discovered_pods in discovered.items():
+            existing = {(pod.get_namespace(), pod.get_service()): pod for pod in current.get(context, [])}
+            kept = {}
+            for pod in discovered_pods:
+                key = (pod.get_namespace(), pod.get_service())
+                if key in existing:
+                    kept[key] = existing.pop(key)
+            kept_by_context[context] = kept
+            removed_by_context[context] = existing
+            if context in preserve:
+                used_ports.update(port for pod in existing.values() for port in pod.get_local_ports())
+            used_ports.update(port for pod in kept.values() if pod.is_running() for port in pod.get_local_ports())
+        for context, pods in current.items():
+            if context not in discovered and context in preserve:
+                used_ports.update(port for pod in pods for port in pod.get_local_ports())
+        for kept in kept_by_context.values():
+            for pod in kept.values():
+                if not pod.is_running():
+                    ConfigManager._claim_ports(pod, used_ports)
+
+        merged = {}
+        for context, discovered_pods in discovered.items():
+            kept = kept_by_context[context]
+            context_pods = []
+            for pod in discovered_pods:
+                key = (pod.get_namespace(), pod.get_service())
+                if key in kept:
+                    ConfigManager._adopt_remote_ports(kept[key], pod, used_ports)
+                    context_pods.append(kept[key])
+                    continue
+                ConfigManager._claim_ports(pod, used_ports)
+                context_pods.append(pod)
+            removed = removed_by_context[context]
+            if context in preserve:
+                context_pods.extend(removed.values())
+            else:
+                ConfigManager._stop_removed(removed.values())
+            merged[context] = context_pods
+
+        for context, pods in current.items():
+            if context in discovered:
+                continue
+            if context in preserve:
+                merged[context] = pods
+            else:
+                ConfigManager._stop_removed(pods)
+        return merged
+
+    @staticmethod
+    def _claim_ports(pod: PodUI, used_ports: set):
+        """Moves the local ports of ``pod`` that are already in ``used_ports`` to free ones and claims them."""
+        if pod.get_port() in used_ports:
+            pod.pod.port = ConfigManager._next_free_port(used_ports)
+        used_ports.add(pod.get_port())
+        pod.pod.extra_ports = ConfigManager._allocate_extra_ports(pod.get_extra_ports(), {}, used_ports)
+
+    @staticmethod
+    def _allocate_extra_ports(extra_ports: List[Tuple[int, int]], current: Dict[int, int],
+                              used_ports: set) -> List[Tuple[int, int]]:
+        """Gives every (local, remote) pair a free local port, reusing the local
+        port already mapped to that remote in ``current``."""
+        allocated = []
+        for local, remote in extra_ports:
+            if remote in current:
+                local = current[remote]
+            elif local in used_ports:
+                local = ConfigManager._next_free_port(used_ports)
+            used_ports.add(local)
+            allocated.append((local, remote))
+        return allocated
+
+    @staticmethod
+    def _adopt_remote_ports(kept: PodUI, discovered: PodUI, used_ports: set):
+        # Remote ports come from the cluster (configs written before they were
+        # recorded assume 80); local ports stay. Extra pairs are only replaced
+        # when discovery produced some, so hand-written ones survive.
+        kept.pod.remote_port = discovered.get_remote_port()
+        if discovered.get_extra_ports():
+            current = {remote: local for local, remote in kept.get_extra_ports()}
+            used_ports.difference_update(current.values())
+            kept.pod.extra_ports = ConfigManager._allocate_extra_ports(discovered.get_extra_ports(), current, used_ports)
+
+    @staticmethod
+    def _stop_removed(pods):
+        for pod in pods:
+            if pod.is_running():
+                ConfigManager._log_console(f"🗑️  {pod.get_service()} no longer exists in {pod.get_context()}, stopping tunnel")
+                pod.stop()
+
+    @staticmethod
+    def apply_service_event(contexts: Dict[str, List[PodUI]], context: str, event: ServiceEvent) -> bool:
+        """Applies a single watch delta to the live context map in place.
+
+        Returns True when the map changed. A service that is already known
+        keeps its ``PodUI`` and local ports; only its remote ports follow the
+        cluster, and a running tunnel whose remote ports changed is stopped,
+        since kubectl keeps forwarding to the old ones.
+        """
+        if event.namespace in EXCLUDED_NAMESPACES:
+            return False
+        context_pods = contexts.get(context, [])
+        existing = next((pod for pod in context_pods
+                         if pod.get_namespace() == event.namespace and pod.get_service() == event.name), None)
+
+        if event.type == "DELETED" or event.service is None:
+            if existing is None:
+                return False
+            ConfigManager._stop_removed([existing])
+            context_pods.remove(existing)
+            if not context_pods:
+                contexts.pop(context, None)
+            return True
+
+        if existing is not None:
+            return ConfigManager._update_remote_ports(existing, event.service, contexts)
+        used_ports = ConfigManager.used_ports(contexts)
+        service_ports = ConfigManager._service_ports(event.service)
+        port = ConfigManager._next_free_port(used_ports)
+        used_ports.add(port)
+        extra_ports = []
+        if ConfigManager.read_settings().forward_all_ports:
+            extra_ports = ConfigManager._allocate_extra_ports([(port, remote) for remote in service_ports[1:]],
+                                                              {}, used_ports)
+        contexts.setdefault(context, context_pods).append(
+            ConfigManager.pod_factory(Pod(context=context, namespace=event.namespace, service=event.name, port=port,
+                                          remote_port=service_ports[0], extra_ports=extra_ports)))
+        return True
+
+    @staticmethod
+    def _update_remote_ports(pod: PodUI, service: Dict[str, any], contexts: Dict[str, List[PodUI]]) -> bool:
+        service_ports = ConfigManager._service_ports(service)
+        before = pod.get_port_pairs()
+        pod.pod.remote_port = service_ports[0]
+        if ConfigManager.read_settings().forward_all_ports:
+            current = {remote: local for local, remote in pod.get_extra_ports()}
+            used_ports = ConfigManager.used_ports(contexts)
+            used_ports.difference_update(current.values())
+            pod.pod.extra_ports = ConfigManager._allocate_extra_ports(
+                [(pod.get_port(), remote) for remote in service_ports[1:]], current, used_ports)
+        if pod.get_port_pairs() == before:
+            return False
+        if pod.is_running():
+            ConfigManager._log_console(f"🔀 Remote ports of {pod.get_service()} changed in {pod.get_context()}, "
+                                       f"stopping its tunnel; start it again to use them")
+            pod.stop()
+        return True
+
     @staticmethod
     def save_discovered_config(contexts: Dict[str, List[PodUI]]):
         config_file = ConfigManager.get_config_path()
         config_data = { 'contexts': [] }
+        existing_settings = ConfigManager._read_raw_config().get('settings')
+        if isinstance(existing_settings, dict):
+            config_data = { 'settings': existing_settings, 'contexts': [] }
 
         for context_name, pods in contexts.items():
             context_config = { 'context': context_name, 'namespaces': [] }
@@ -100,7 +558,18 @@ class ConfigManager:
             for ns_name, ns_pods in namespace_groups.items():
                 namespace_config = { 'namespace': ns_name, 'pods': [] }
                 for pod in ns_pods:
-                    namespace_config['pods'].append({ 'service': pod.get_service(), 'port': pod.get_port() })
+                    pod_config = { 'service': pod.get_service(), 'port': pod.get_port(),
+                                   'remote_port': pod.get_remote_port() }
+                    if pod.get_extra_ports():
+                        pod_config['extra_ports'] = [{ 'port': local, 'remote_port': remote }
+                                                     for local, remote in pod.get_extra_ports()]
+                    if pod.get_auto_reconnect():
+                        pod_config['auto_reconnect'] = True
+                    if pod.pod.get_tunnel_backend():
+                        pod_config['tunnel_backend'] = pod.pod.get_tunnel_backend()
+                    if pod.get_health_path():
+                        pod_config['health_path'] = pod.get_health_path()
+                    namespace_config['pods'].append(pod_config)
                 context_config['namespaces'].append(namespace_config)
 
             config_data['contexts'].append(context_config)
@@ -159,9 +628,15 @@ class ConfigManager:
                                 context=context_name,
                                 namespace=namespace_name,
                                 service=pod_data['service'],
-                                port=pod_data['port']
+                                port=pod_data['port'],
+                                auto_reconnect=bool(pod_data.get('auto_reconnect', False)),
+                                remote_port=pod_data.get('remote_port', 80),
+                                extra_ports=[(extra['port'], extra['remote_port'])
+                                             for extra in pod_data.get('extra_ports') or []],
+                                tunnel_backend=pod_data.get('tunnel_backend'),
+                                health_path=pod_data.get('health_path')
                             )
-                            context_pods.append(PodUI(pod))
+                            context_pods.append(ConfigManager.pod_factory(pod))
                     result[context_name] = context_pods
 
                 timestamp = datetime.now().strftime("%H:%M:%S")
@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from k8s.kubeconfig import KubeConfig
+
+
+class DiscoveryCache:
+    """On-disk cache of discovery results, keyed by context and kubeconfig fingerprint
+    (see ``KubeConfig.context_fingerprint``).
+
+    Only accessible contexts are cached; an entry whose fingerprint no longer
+    matches the kubeconfig is treated as missing, and one older than the TTL
+    as stale.
+    """
+
+    FILE_NAME = "discovery_cache.json"
+
+    def __init__(self, cache_file: Path, ttl_seconds: int):
+        self.cache_file = cache_file
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        entries = data.get('contexts') if isinstance(data, dict) else None
+        return entries if isinstance(entries, dict) else {}
+
+    def save(self):
+        with self._lock:
+            data = {'contexts': dict(self._entries)}
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix(".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            from datetime import datetime
+            timestamp = datetime.now().strftime("%H:%M:%S")
+            print(f"[{timestamp}] ⚠️  Failed to save discovery cache: {e}")
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return not self._entries
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry.get('discovered_at', 0) < self.ttl_seconds
+
+    def get(self, context: str, fingerprint: str, allow_stale: bool = False) -> Optional[dict]:
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(context)
+        if not entry or entry.get('fingerprint') != fingerprint:
+            return None
+        if not allow_stale and not self.is_fresh(entry):
+            return None
+        return entry
+
+    def entries(self) -> Dict[str, dict]:
+        """Returns the entries whose fingerprint still matches the kubeconfig."""
+        with self._lock:
+            entries = dict(self._entries)
+        return {name: entry for name, entry in entries.items()
+                if entry.get('fingerprint') == KubeConfig.context_fingerprint(name)}
+
+    def put(self, context: str, fingerprint: str, namespaces: List[str],
+            services_by_namespace: Dict[str, List[dict]]):
+        with self._lock:
+            self._entries[context] = {
+                'fingerprint': fingerprint,
+                'discovered_at': time.time(),
+                'namespaces': namespaces,
+                'services': services_by_namespace,
+            }
+
+    def invalidate(self, context: Optional[str] = None):
+        with self._lock:
+            if context is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(context, None)
+
+    def retain(self, contexts: List[str]):
+        with self._lock:
+            for name in list(self._entries):
+                if name not in contexts:
+                    del self._entries[name]
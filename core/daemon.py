@@ -0,0 +1,596 @@
+import argparse
+import asyncio
+import collections
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from config.config_manager import ConfigManager
+from core.environment import extend_path
+from metrics.prometheus import PrometheusExporter
+from pods import Pod, PodUI
+from pods.batch import BatchRunner
+from pods.health import HealthProber
+from pods.pod_monitor import PodMonitor
+from pods.reconnect import ReconnectPolicy
+from pods.tunnel_registry import TunnelRegistry
+
+SOCKET_NAME = "daemon.sock"
+# Tunnel states reported by the daemon in which the local ports are served
+RUNNING_STATES = ("running", "idle", "degraded")
+SPEC_FIELDS = ("context", "namespace", "service", "port", "remote_port", "extra_ports", "auto_reconnect",
+               "tunnel_backend", "health_path")
+
+
+def default_socket_path() -> Path:
+    return ConfigManager.get_config_path().parent / SOCKET_NAME
+
+
+def pod_spec(pod: PodUI) -> dict:
+    """What the daemon needs to run ``pod`` when it does not know the service yet."""
+    return {
+        "context": pod.get_context(),
+        "namespace": pod.get_namespace(),
+        "service": pod.get_service(),
+        "port": pod.get_port(),
+        "remote_port": pod.get_remote_port(),
+        "extra_ports": [list(pair) for pair in pod.get_extra_ports()],
+        "auto_reconnect": pod.get_auto_reconnect(),
+        "tunnel_backend": pod.pod.get_tunnel_backend(),
+        "health_path": pod.get_health_path(),
+    }
+
+
+class DaemonError(Exception):
+    pass
+
+
+class LogTail:
+    """Stands in for stdout: writes through and keeps the last ``limit``
+    lines, handing new ones to the queues of ``tail --follow`` clients."""
+
+    def __init__(self, stream, limit: int = 1000):
+        self.stream = stream
+        self.lines: Deque[str] = collections.deque(maxlen=limit)
+        self._partial = ""
+        self._followers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self._lock = threading.Lock()
+
+    def write(self, text: str) -> int:
+        self.stream.write(text)
+        with self._lock:
+            *complete, self._partial = (self._partial + text).split("\n")
+            complete = [line for line in complete if line.strip()]
+            self.lines.extend(complete)
+            followers = list(self._followers)
+        for loop, queue in followers:
+            for line in complete:
+                try:
+                    loop.call_soon_threadsafe(queue.put_nowait, line)
+                except RuntimeError:
+                    # The loop is closed: the daemon is shutting down
+                    pass
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    def follow(self) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        with self._lock:
+            self._followers.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unfollow(self, queue: asyncio.Queue):
+        with self._lock:
+            self._followers = [(loop, q) for loop, q in self._followers if q is not queue]
+
+
+class KubeWireDaemon:
+    """Headless owner of every tunnel, driven through a Unix socket.
+
+    The daemon runs the registry, the monitor (reconnects, health probes) and
+    the metrics endpoint that the GUI and TUI would otherwise each run on
+    their own, so tunnels outlive the front ends and every terminal shares
+    one set of kubectl processes. Requests and replies are JSON objects, one
+    per line: ``{"command": "start", "ids": [...]}`` is answered with
+    ``{"ok": true, ...}`` or ``{"ok": false, "error": ...}``. DaemonClient
+    speaks the other end.
+    """
+
+    TAIL_LINES = 1000
+    # Requests carry the specs of many services at once
+    LINE_LIMIT = 1024 * 1024
+
+    def __init__(self, contexts: Dict[str, List[PodUI]], socket_path: Path):
+        self.socket_path = Path(socket_path)
+        self.registry = TunnelRegistry(contexts)
+        # PodMonitor reports every drop of a context not on screen, and the
+        # daemon has no screen
+        self.current_context = None
+        settings = ConfigManager.read_settings()
+        PodUI.ready_timeout = settings.tunnel_ready_timeout
+        PodUI.tunnel_backend = settings.tunnel_backend
+        PodUI.lazy = settings.lazy_tunnels
+        PodUI.idle_timeout = settings.lazy_idle_timeout
+        PodUI.instrumented = settings.tunnel_metrics
+        self.runner = BatchRunner(settings.bulk_concurrency)
+        self.pod_monitor = PodMonitor(self, ReconnectPolicy.from_settings(settings),
+                                      prober=HealthProber.from_settings(settings))
+        self.metrics_exporter = PrometheusExporter.from_settings(settings, self.registry, self.pod_monitor)
+        self.log = LogTail(sys.stdout, KubeWireDaemon.TAIL_LINES)
+        self.started_at = time.time()
+        self._stopped: Optional[asyncio.Event] = None
+        self._handlers = {
+            "list": self._list,
+            "status": self._status,
+            "start": self._start,
+            "stop": self._stop,
+            "start-context": self._start_context,
+            "shutdown": self._shutdown,
+        }
+
+    @staticmethod
+    def run(socket_path: Path) -> int:
+        contexts = ConfigManager.read_config()
+        if not contexts:
+            contexts, _statuses = ConfigManager.discover_config(use_cache=True)
+        daemon = KubeWireDaemon(contexts, socket_path)
+        sys.stdout = daemon.log
+        try:
+            asyncio.run(daemon.serve())
+        except DaemonError as e:
+            PodUI._log_console(f"❌ {e}")
+            return 1
+        finally:
+            sys.stdout = daemon.log.stream
+        return 0
+
+    # Called by PodMonitor, which takes the daemon for its UI
+    def request_refresh(self):
+        pass
+
+    def trigger_refresh_with_failures(self, failed_pods):
+        for pod_id in failed_pods:
+            PodUI._log_console(f"💥 Tunnel {pod_id} dropped")
+
+    async def serve(self):
+        if not hasattr(socket, "AF_UNIX"):
+            raise DaemonError("The daemon needs Unix domain sockets, which this platform lacks")
+        if DaemonClient(self.socket_path).is_running():
+            raise DaemonError(f"A daemon is already listening on {self.socket_path}")
+        if self.socket_path.exists():
+            # Left behind by a daemon that did not shut down cleanly
+            self.socket_path.unlink()
+        self._stopped = asyncio.Event()
+        server = await asyncio.start_unix_server(self._handle, path=str(self.socket_path),
+                                                 limit=KubeWireDaemon.LINE_LIMIT)
+        os.chmod(self.socket_path, 0o600)
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, self._stopped.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        self.pod_monitor.start_monitoring()
+        if self.metrics_exporter:
+            self.metrics_exporter.start()
+        PodUI._log_console(f"🛰️  KubeWire daemon listening on {self.socket_path} "
+                           f"({len(self.registry.all_pods())} services in {len(self.registry.contexts)} contexts)")
+        try:
+            await self._stopped.wait()
+        finally:
+            server.close()
+            self.pod_monitor.stop_monitoring()
+            if self.pod_monitor.executor is not None:
+                self.pod_monitor.executor.shutdown()
+            if self.metrics_exporter:
+                self.metrics_exporter.stop()
+            running = self.registry.running()
+            if running:
+                PodUI._log_console(f"🛑 Stopping {len(running)} tunnel(s)...")
+                await self.runner.stop_all(running)
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+            PodUI._log_console("👋 KubeWire daemon stopped")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("expected a JSON object")
+                except ValueError as e:
+                    await KubeWireDaemon._reply(writer, {"ok": False, "error": f"Bad request: {e}"})
+                    continue
+                command = request.get("command")
+                if command == "tail":
+                    await self._tail(request, writer)
+                    break
+                handler = self._handlers.get(command)
+                if handler is None:
+                    reply = {"ok": False, "error": f"Unknown command: {command}"}
+                else:
+                    try:
+                        reply = await handler(request)
+                    except Exception as e:
+                        reply = {"ok": False, "error": str(e) or type(e).__name__}
+                await KubeWireDaemon._reply(writer, reply)
+        except (ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # Connections still open when the daemon shuts down; the stream
+            # machinery reports a cancelled handler as an error
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _reply(writer: asyncio.StreamWriter, reply: dict):
+        writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    def _state(self, pod: PodUI) -> str:
+        pod_id = TunnelRegistry.pod_id(pod)
+        running = pod.is_running()
+        if running and pod.is_idle():
+            return "idle"
+        # The monitor's threads update these while requests are served
+        with self.pod_monitor.lock:
+            degraded = self.pod_monitor.is_degraded(pod_id)
+            failed = pod_id in self.pod_monitor.recently_failed_pods
+            reconnect = self.pod_monitor.reconnect_state(pod_id)
+            pending = reconnect is not None and reconnect.pending
+        if running:
+            return "degraded" if degraded else "running"
+        if failed:
+            return "reconnecting" if pending else "failed"
+        return "stopped"
+
+    def _describe(self, pod: PodUI) -> dict:
+        return {
+            "id": TunnelRegistry.pod_id(pod),
+            "context": pod.get_context(),
+            "namespace": pod.get_namespace(),
+            "service": pod.get_service(),
+            "port": pod.get_port(),
+            "ports": pod.describe_ports(),
+            "state": self._state(pod),
+        }
+
+    def _adopt(self, spec: dict) -> PodUI:
+        """Returns the tunnel of the service in ``spec``, creating it when the
+        client discovered a service the daemon does not know."""
+        pod_id = f"{spec['context']}/{spec['namespace']}/{spec['service']}"
+        pod = self.registry.get(pod_id)
+        if pod is None:
+            pod = PodUI(Pod(**{key: spec[key] for key in SPEC_FIELDS if key in spec}))
+            self.registry.contexts.setdefault(pod.get_context(), []).append(pod)
+            self.registry.reindex()
+        elif "auto_reconnect" in spec:
+            pod.pod.auto_reconnect = bool(spec["auto_reconnect"])
+        return pod
+
+    def _select(self, request: dict) -> Tuple[List[PodUI], List[dict]]:
+        pods, unknown = [], []
+        for pod_id in request.get("ids") or []:
+            pod = self.registry.get(pod_id)
+            if pod is None:
+                unknown.append({"id": pod_id, "ok": False, "error": "Unknown service"})
+            else:
+                pods.append(pod)
+        pods.extend(self._adopt(spec) for spec in request.get("pods") or [])
+        return pods, unknown
+
+    async def _list(self, request: dict) -> dict:
+        context = request.get("context")
+        pods = self.registry.pods(context) if context else self.registry.all_pods()
+        return {"ok": True, "tunnels": [self._describe(pod) for pod in pods]}
+
+    async def _status(self, request: dict) -> dict:
+        tunnels = [self._describe(pod) for pod in self.registry.all_pods()]
+        return {
+            "ok": True,
+            "pid": os.getpid(),
+            "uptime": round(time.time() - self.started_at, 1),
+            "socket": str(self.socket_path),
+            "contexts": len(self.registry.contexts),
+            "services": len(tunnels),
+            "running": len([t for t in tunnels if t["state"] in RUNNING_STATES]),
+            "failed": len([t for t in tunnels if t["state"] in ("failed", "reconnecting")]),
+            "tunnels": [t for t in tunnels if t["state"] != "stopped"],
+        }
+
+    async def _start(self, request: dict) -> dict:
+        pods, results = self._select(request)
+        return {"ok": True, "results": results + await self._start_pods(pods, request.get("concurrency"))}
+
+    async def _start_context(self, request: dict) -> dict:
+        context = request.get("context")
+        if context not in self.registry.contexts:
+            return {"ok": False, "error": f"Unknown context: {context}"}
+        return {"ok": True, "results": await self._start_pods(self.registry.pods(context), request.get("concurrency"))}
+
+    async def _start_pods(self, pods: List[PodUI], concurrency: Optional[int] = None) -> List[dict]:
+        results, pending = [], []
+        for pod in pods:
+            pod_id = TunnelRegistry.pod_id(pod)
+            if pod.is_running():
+                results.append({"id": pod_id, "ok": True, "error": "", "elapsed": 0.0})
+                continue
+            owner = self.registry.port_owner(pod)
+            if owner is not None:
+                results.append({"id": pod_id, "ok": False, "elapsed": 0.0,
+                                "error": f"Port in use by {TunnelRegistry.pod_id(owner)}"})
+                continue
+            self.pod_monitor.mark_user_started(pod_id)
+            pending.append(pod)
+        if pending:
+            # Clients may ask for more parallelism than the UIs use, e.g. CI
+            runner = BatchRunner(concurrency) if concurrency else self.runner
+            summary = await runner.start_all(pending)
+            for result in summary.results:
+                result.pod._was_running = result.success
+                error = result.error
+                if not result.success and not error:
+                    # start() reports why on the console; kubectl's last words say it best
+                    last = result.pod.output.tail(1) if result.pod.output is not None else []
+                    error = last[0] if last else "Did not start"
+                results.append({"id": TunnelRegistry.pod_id(result.pod), "ok": result.success, "error": error,
+                                "elapsed": round(result.elapsed, 3)})
+                if result.success:
+                    PodUI._log_console(f"✅ Started {TunnelRegistry.pod_id(result.pod)} on "
+                                       f"{result.pod.describe_ports()} ({result.elapsed:.1f}s)")
+                else:
+                    PodUI._log_console(f"❌ {TunnelRegistry.pod_id(result.pod)} did not start: {error}")
+        return results
+
+    async def _stop(self, request: dict) -> dict:
+        if request.get("all") or request.get("context"):
+            # Failed tunnels are stopped too, which ends their reconnects,
+            # but only the running ones are reported
+            targets = self.registry.all_pods() if request.get("all") else self.registry.pods(request["context"])
+            pods, results = [pod for pod in targets if pod.is_running()], []
+        else:
+            pods, results = self._select(request)
+            targets = pods
+        for pod in targets:
+            self.pod_monitor.mark_user_stopped(TunnelRegistry.pod_id(pod))
+            pod._was_running = False
+        summary = await self.runner.stop_all([pod for pod in pods if pod.is_running()])
+        errors = {id(result.pod): result.error for result in summary.results}
+        for pod in pods:
+            results.append({"id": TunnelRegistry.pod_id(pod), "ok": not pod.is_running(),
+                            "error": errors.get(id(pod), "")})
+        if summary.results:
+            PodUI._log_console(f"🛑 Stopped {', '.join(TunnelRegistry.pod_id(r.pod) for r in summary.results)}")
+        return {"ok": True, "results": results}
+
+    async def _shutdown(self, request: dict) -> dict:
+        self._stopped.set()
+        return {"ok": True}
+
+    async def _tail(self, request: dict, writer: asyncio.StreamWriter):
+        count = max(0, int(request.get("lines", 50)))
+        lines = list(self.log.lines)[-count:] if count else []
+        queue = self.log.follow() if request.get("follow") else None
+        try:
+            await KubeWireDaemon._reply(writer, {"ok": True, "lines": lines})
+            while queue is not None:
+                await KubeWireDaemon._reply(writer, {"line": await queue.get()})
+        finally:
+            if queue is not None:
+                self.log.unfollow(queue)
+
+
+class DaemonClient:
+    """Talks to a running daemon over its socket, one connection per request.
+
+    Once ``attach``-ed, the services the UIs read or discover become
+    RemotePodUI tunnels run by the daemon. Their states are fetched with one
+    ``list`` every POLL_INTERVAL seconds from a background thread, which also
+    passes drops on to the UI's exit listeners as they would be locally;
+    RemotePodUI only reads the last snapshot, so a slow daemon cannot stall
+    the UI thread.
+    """
+
+    TIMEOUT = 300.0
+    POLL_INTERVAL = 1.0
+
+    def __init__(self, socket_path: Optional[Path] = None):
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+        self._states: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._remote_pods: "weakref.WeakValueDictionary[str, RemotePodUI]" = weakref.WeakValueDictionary()
+        self._poll_stop = threading.Event()
+
+    def _connect(self, timeout: Optional[float]) -> socket.socket:
+        if not hasattr(socket, "AF_UNIX"):
+            raise DaemonError("The daemon needs Unix domain sockets, which this platform lacks")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(self.socket_path))
+        except OSError as e:
+            sock.close()
+            raise DaemonError(f"No daemon listening on {self.socket_path}: {e}") from e
+        return sock
+
+    @staticmethod
+    def _send(sock: socket.socket, command: str, arguments: dict):
+        sock.sendall(json.dumps(dict(arguments, command=command)).encode("utf-8") + b"\n")
+
+    @staticmethod
+    def _parse(line: bytes) -> dict:
+        if not line:
+            raise DaemonError("The daemon closed the connection")
+        try:
+            reply = json.loads(line)
+        except ValueError as e:
+            raise DaemonError(f"Unreadable reply from the daemon: {e}") from e
+        if not reply.get("ok", True):
+            raise DaemonError(reply.get("error") or "Request failed")
+        return reply
+
+    def request(self, command: str, timeout: Optional[float] = TIMEOUT, **arguments) -> dict:
+        try:
+            with self._connect(timeout) as sock:
+                DaemonClient._send(sock, command, arguments)
+                with sock.makefile("rb") as replies:
+                    line = replies.readline()
+        except OSError as e:
+            raise DaemonError(f"Lost the daemon: {e}") from e
+        return DaemonClient._parse(line)
+
+    def is_running(self) -> bool:
+        try:
+            self.request("status", timeout=2)
+            return True
+        except DaemonError:
+            return False
+
+    def list(self, context: Optional[str] = None) -> List[dict]:
+        return self.request("list", context=context)["tunnels"]
+
+    def status(self) -> dict:
+        return self.request("status")
+
+    def start(self, ids: Optional[List[str]] = None, pods: Optional[List[PodUI]] = None,
+              concurrency: Optional[int] = None) -> List[dict]:
+        return self.request("start", ids=ids or [], pods=[pod_spec(pod) for pod in pods or []],
+                            concurrency=concurrency)["results"]
+
+    def start_context(self, context: str, concurrency: Optional[int] = None) -> List[dict]:
+        return self.request("start-context", context=context, concurrency=concurrency)["results"]
+
+    def stop(self, ids: Optional[List[str]] = None, context: Optional[str] = None,
+             everything: bool = False) -> List[dict]:
+        return self.request("stop", ids=ids or [], context=context, all=everything)["results"]
+
+    def shutdown(self):
+        self.request("shutdown")
+
+    def tail(self, lines: int = 50, follow: bool = False) -> Iterator[str]:
+        with self._connect(None if follow else DaemonClient.TIMEOUT) as sock:
+            DaemonClient._send(sock, "tail", {"lines": lines, "follow": follow})
+            with sock.makefile("rb") as replies:
+                yield from DaemonClient._parse(replies.readline())["lines"]
+                for line in replies:
+                    yield DaemonClient._parse(line)["line"]
+
+    def attach(self):
+        self.refresh_states()
+        ConfigManager.pod_factory = self.remote_pod
+        self._poll_stop = threading.Event()
+        threading.Thread(target=self._poll_loop, args=(self._poll_stop,), name="daemon-client",
+                         daemon=True).start()
+
+    def detach(self):
+        self._poll_stop.set()
+        if ConfigManager.pod_factory == self.remote_pod:
+            ConfigManager.pod_factory = PodUI
+
+    def remote_pod(self, pod: Pod) -> "RemotePodUI":
+        remote = RemotePodUI(pod, self)
+        self._remote_pods[TunnelRegistry.pod_id(remote)] = remote
+        return remote
+
+    def state(self, pod_id: str) -> str:
+        with self._lock:
+            return self._states.get(pod_id, "stopped")
+
+    def set_state(self, pod_id: str, state: str):
+        """Records the outcome of our own request, so it is not taken for a drop."""
+        with self._lock:
+            self._states[pod_id] = state
+
+    def refresh_states(self):
+        try:
+            states = {tunnel["id"]: tunnel["state"] for tunnel in self.list()}
+        except DaemonError:
+            # The daemon is gone, and its tunnels with it
+            states = {}
+        with self._lock:
+            previous, self._states = self._states, states
+        for pod_id, state in previous.items():
+            # Tunnels stopped on purpose (by any client) are not drops
+            if state in RUNNING_STATES and states.get(pod_id, "failed") in ("failed", "reconnecting"):
+                pod = self._remote_pods.get(pod_id)
+                if pod is not None:
+                    pod._notify_exit()
+
+    def _poll_loop(self, stop: threading.Event):
+        while not stop.wait(DaemonClient.POLL_INTERVAL):
+            self.refresh_states()
+
+
+class RemotePodUI(PodUI):
+    """A tunnel run by the daemon, driven by the UIs like a local one."""
+
+    remote = True
+
+    def __init__(self, pod: Pod, client: DaemonClient):
+        super().__init__(pod)
+        self.client = client
+
+    def is_running(self) -> bool:
+        return self.client.state(TunnelRegistry.pod_id(self)) in RUNNING_STATES
+
+    def is_idle(self) -> bool:
+        return self.client.state(TunnelRegistry.pod_id(self)) == "idle"
+
+    def has_kubectl(self) -> bool:
+        return False
+
+    async def start(self) -> bool:
+        pod_id = TunnelRegistry.pod_id(self)
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(None, self.client.start, None, [self])
+        except DaemonError as e:
+            PodUI._log_console(f"❌ Could not start {self.get_service()}: {e}")
+            return False
+        result = results[0]
+        if not result["ok"]:
+            PodUI._log_console(f"❌ {self.get_service()} did not start: {result['error']}")
+            return False
+        self.client.set_state(pod_id, "running")
+        return True
+
+    def stop(self) -> bool:
+        pod_id = TunnelRegistry.pod_id(self)
+        try:
+            self.client.stop(ids=[pod_id])
+        except DaemonError as e:
+            PodUI._log_console(f"❌ Error stopping {self.get_service()}: {e}")
+            return False
+        self.client.set_state(pod_id, "stopped")
+        return True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.daemon",
+                                     description="Runs KubeWire's tunnels headless, controlled through a Unix socket.")
+    parser.add_argument("--socket", help=f"control socket (default: {SOCKET_NAME} next to config.yml)")
+    args = parser.parse_args(argv)
+    extend_path()
+    return KubeWireDaemon.run(Path(args.socket) if args.socket else default_socket_path())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
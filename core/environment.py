@@ -0,0 +1,19 @@
+import os
+
+EXTRA_PATHS = [
+    "/usr/local/bin",
+    "/opt/homebrew/bin",
+    "/usr/bin",
+    "/bin",
+    "/usr/sbin",
+    "/sbin"
+]
+
+
+def extend_path():
+    """Apps started from a desktop launcher get a minimal PATH without kubectl."""
+    current_path = os.environ.get("PATH", "")
+    for p in EXTRA_PATHS:
+        if p not in current_path:
+            current_path += os.pathsep + p
+    os.environ["PATH"] = current_path
@@ -1,37 +1,36 @@
+import argparse
 import asyncio
-import os
+import json
+import subprocess
 import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
 
 from config.config_manager import ConfigManager
+from core.daemon import DaemonClient, DaemonError, KubeWireDaemon, SOCKET_NAME, default_socket_path
+from core.environment import extend_path
 from ui.tui import KubeWireTUI
 
-extra_paths = [
-    "/usr/local/bin",
-    "/opt/homebrew/bin",
-    "/usr/bin",
-    "/bin",
-    "/usr/sbin",
-    "/sbin"
-]
-current_path = os.environ.get("PATH", "")
-for p in extra_paths:
-    if p not in current_path:
-        current_path += os.pathsep + p
-os.environ["PATH"] = current_path
-
-MODE = "gui"
-
-def _create_gui():
+extend_path()
+
+# Seconds `up` waits for a daemon it spawned to accept requests; it
+# discovers contexts first when there is no config.yml
+DAEMON_START_TIMEOUT = 60
+STATE_ICONS = {"running": "🟢", "idle": "💤", "degraded": "🟠", "reconnecting": "🔁", "failed": "💥", "stopped": "⚪"}
+
+def _create_gui(daemon: Optional[DaemonClient] = None):
     from ui.gui import KubeWireGUI
-    return KubeWireGUI()
+    return KubeWireGUI(daemon)
 
-async def _create_tui():
+async def _create_tui(daemon: Optional[DaemonClient] = None):
     try:
         contexts = ConfigManager.read_config()
         context_statuses = []
 
         if not contexts:
-            contexts, context_statuses = ConfigManager.discover_config()
+            contexts, context_statuses = ConfigManager.discover_config(use_cache=True)
             if contexts:
                 ConfigManager.save_discovered_config(contexts)
 
@@ -52,7 +51,7 @@ async def _create_tui():
             print("   4. Create a manual config.yml file with your services")
             return
 
-        tui = KubeWireTUI(contexts, context_statuses)
+        tui = KubeWireTUI(contexts, context_statuses, daemon)
         await tui.run()
 
     except KeyboardInterrupt:
@@ -64,18 +63,223 @@ async def _create_tui():
         sys.exit(1)
 
 
-def main():
-    if MODE == "gui":
-        gui = _create_gui()
-        try:
-            gui.run()
-        finally:
-            from datetime import datetime
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            print(f"[{timestamp}] 👋 KubeWire finished")
+def _log_console(message):
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+
+def _socket_path(args) -> Path:
+    socket = getattr(args, "socket", None)
+    return Path(socket) if socket else default_socket_path()
+
+
+def _attach_to_daemon(socket_path: Path) -> Optional[DaemonClient]:
+    # With a daemon running, the UI drives its tunnels instead of its own
+    client = DaemonClient(socket_path)
+    if not client.is_running():
+        return None
+    client.attach()
+    _log_console(f"🛰️  Using the tunnels of the KubeWire daemon at {client.socket_path}")
+    return client
+
+
+def _daemon_command(socket_path: Path) -> List[str]:
+    # A frozen app is its own interpreter and entry point
+    program = [sys.executable] if getattr(sys, "frozen", False) else [sys.executable, "-m", "core.main"]
+    return program + ["daemon", "--socket", str(socket_path)]
+
+
+def _ensure_daemon(socket_path: Path) -> DaemonClient:
+    client = DaemonClient(socket_path)
+    if client.is_running():
+        return client
+    log_file = socket_path.parent / "daemon.log"
+    _log_console(f"🛰️  Starting the KubeWire daemon (log: {log_file})...")
+    with open(log_file, "ab") as log:
+        process = subprocess.Popen(_daemon_command(socket_path), stdin=subprocess.DEVNULL, stdout=log,
+                                   stderr=subprocess.STDOUT, start_new_session=True,
+                                   cwd=str(Path(__file__).resolve().parent.parent))
+    deadline = time.monotonic() + DAEMON_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if client.is_running():
+            return client
+        if process.poll() is not None:
+            raise DaemonError(f"The daemon exited with code {process.returncode}, see {log_file}")
+        time.sleep(0.1)
+    raise DaemonError(f"The daemon did not come up within {DAEMON_START_TIMEOUT}s, see {log_file}")
+
+
+def _select(tunnels: List[dict], namespace: Optional[str], services: List[str]) -> Tuple[List[str], List[str]]:
+    """Ids of the named services (all of them when none are named) and what could not be matched."""
+    tunnels = [tunnel for tunnel in tunnels if not namespace or tunnel["namespace"] == namespace]
+    if not services:
+        return [tunnel["id"] for tunnel in tunnels], []
+    ids, errors = [], []
+    for service in services:
+        matches = [tunnel["id"] for tunnel in tunnels if tunnel["service"] == service]
+        if not matches:
+            errors.append(f"Unknown service: {service}")
+        elif len(matches) > 1:
+            errors.append(f"{service} exists in several namespaces, pick one with --namespace: {', '.join(matches)}")
+        else:
+            ids.append(matches[0])
+    return ids, errors
+
+
+def _up(args) -> int:
+    try:
+        client = _ensure_daemon(_socket_path(args))
+        tunnels = client.list(args.context)
+    except DaemonError as e:
+        _log_console(f"❌ {e}")
+        return 1
+    if not tunnels:
+        _log_console(f"❌ No services known in context {args.context}")
+        return 1
+    ids, errors = _select(tunnels, args.namespace, args.services)
+    for error in errors:
+        _log_console(f"❌ {error}")
+    if not ids:
+        return 1
+
+    ports = {tunnel["id"]: tunnel["ports"] for tunnel in tunnels}
+    started_at = time.monotonic()
+    _log_console(f"🚀 Starting {len(ids)} service(s)...")
+    try:
+        results = client.start(ids=ids, concurrency=args.concurrency)
+    except DaemonError as e:
+        _log_console(f"❌ {e}")
+        return 1
+    for result in results:
+        if result["ok"]:
+            _log_console(f"✅ {result['id']} ready on {ports.get(result['id'], '?')} ({result['elapsed']:.1f}s)")
+        else:
+            _log_console(f"❌ {result['id']}: {result['error']}")
+    succeeded = len([result for result in results if result["ok"]])
+    icon = "✅" if succeeded == len(results) and not errors else "⚠️ "
+    _log_console(f"{icon} {succeeded}/{len(results) + len(errors)} service(s) up in {time.monotonic() - started_at:.1f}s")
+    return 0 if succeeded == len(results) and not errors else 1
+
+
+def _down(args) -> int:
+    if args.all and (args.namespace or args.services):
+        _log_console("❌ --all stops every tunnel in every context; use --context with --namespace or services")
+        return 1
+    client = DaemonClient(_socket_path(args))
+    if not client.is_running():
+        _log_console("💤 No KubeWire daemon running, nothing to stop")
+        return 0
+    errors = []
+    try:
+        if args.all:
+            results = client.stop(everything=True)
+        elif not args.namespace and not args.services:
+            results = client.stop(context=args.context)
+        else:
+            ids, errors = _select(client.list(args.context), args.namespace, args.services)
+            results = client.stop(ids=ids) if ids else []
+        for error in errors:
+            _log_console(f"❌ {error}")
+        for result in results:
+            if result["ok"]:
+                _log_console(f"🛑 Stopped {result['id']}")
+            else:
+                _log_console(f"❌ {result['id']}: {result['error'] or 'still running'}")
+        if args.shutdown:
+            client.shutdown()
+            _log_console("👋 Daemon stopped")
+    except DaemonError as e:
+        _log_console(f"❌ {e}")
+        return 1
+    return 0 if not errors and all(result["ok"] for result in results) else 1
+
+
+def _status(args) -> int:
+    client = DaemonClient(_socket_path(args))
+    try:
+        status = client.status()
+        tunnels = client.list(args.context) if args.all else status["tunnels"]
+    except DaemonError:
+        status, tunnels = None, []
+    if args.context:
+        tunnels = [tunnel for tunnel in tunnels if tunnel["context"] == args.context]
+    failed = [tunnel for tunnel in tunnels if tunnel["state"] in ("failed", "reconnecting")]
+
+    if args.json:
+        report = {"daemon": status is not None, "tunnels": tunnels}
+        if status is not None:
+            report.update({key: status[key] for key in ("pid", "uptime", "socket", "contexts", "services")})
+        print(json.dumps(report, indent=2))
+    elif status is None:
+        print("💤 No KubeWire daemon running")
     else:
-        asyncio.run(_create_tui())
+        running = len(tunnels) - len(failed) - len([t for t in tunnels if t["state"] == "stopped"])
+        print(f"🛰️  Daemon pid {status['pid']}, up {status['uptime']:.0f}s: {running} running, {len(failed)} failed")
+        for tunnel in tunnels:
+            print(f"  {STATE_ICONS.get(tunnel['state'], '❔')} {tunnel['id']:<50} {tunnel['ports']:<12} {tunnel['state']}")
+    # Scripts can tell a healthy set of tunnels from the exit code
+    return 1 if failed else 0
+
+
+def _gui(args) -> int:
+    gui = _create_gui(_attach_to_daemon(_socket_path(args)))
+    try:
+        gui.run()
+    finally:
+        _log_console("👋 KubeWire finished")
+    return 0
+
+
+def _tui(args) -> int:
+    asyncio.run(_create_tui(_attach_to_daemon(_socket_path(args))))
+    return 0
+
+
+def _daemon(args) -> int:
+    return KubeWireDaemon.run(_socket_path(args))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--socket", help=f"daemon control socket (default: {SOCKET_NAME} next to config.yml)")
+
+    parser = argparse.ArgumentParser(prog="python -m core.main", description="KubeWire, a Kubernetes port-forward "
+                                     "manager. Without a command, the GUI is launched.")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.add_parser("gui", parents=[common], help="graphical interface (default)")
+    commands.add_parser("tui", parents=[common], help="terminal interface")
+    commands.add_parser("daemon", parents=[common], help="run tunnels headless, controlled through the socket")
+
+    up = commands.add_parser("up", parents=[common], help="start tunnels through the daemon and wait until "
+                             "they are ready; the daemon is started when needed")
+    up.add_argument("--context", required=True)
+    up.add_argument("--namespace", "-n", help="only services of this namespace")
+    up.add_argument("--concurrency", type=int, help="tunnels started at once (default: bulk_concurrency)")
+    up.add_argument("services", nargs="*", help="service names (default: every service of the context)")
+
+    down = commands.add_parser("down", parents=[common], help="stop tunnels run by the daemon")
+    scope = down.add_mutually_exclusive_group(required=True)
+    scope.add_argument("--all", action="store_true", help="every tunnel in every context")
+    scope.add_argument("--context")
+    down.add_argument("--namespace", "-n", help="only services of this namespace")
+    down.add_argument("--shutdown", action="store_true", help="stop the daemon as well")
+    down.add_argument("services", nargs="*", help="service names (default: every service of the context)")
+
+    status = commands.add_parser("status", parents=[common], help="tunnels run by the daemon; exits with 1 "
+                                 "when any of them failed")
+    status.add_argument("--context", help="only tunnels of this context")
+    status.add_argument("--all", action="store_true", help="include stopped services")
+    status.add_argument("--json", action="store_true", help="machine-readable output")
+    return parser
+
+
+COMMANDS = {"gui": _gui, "tui": _tui, "daemon": _daemon, "up": _up, "down": _down, "status": _status}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return COMMANDS[args.command or "gui"](args)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,301 @@
+import atexit
+import base64
+import hashlib
+import http.client
+import json
+import os
+import queue
+import re
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from k8s.kubeconfig import KubeConfig
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class UnsupportedConfig(Exception):
+    """The kubeconfig needs something the in-process client does not implement."""
+
+
+class ExecCredentialProvider:
+    """Runs a client-go exec credential plugin and caches its result until it expires."""
+
+    EXPIRY_SKEW = 30
+
+    def __init__(self, exec_config: dict):
+        self.exec_config = exec_config
+        self._lock = threading.Lock()
+        self._credential: Optional[dict] = None
+        self._expires_at: Optional[float] = None
+
+    def get(self, force_refresh: bool = False) -> dict:
+        with self._lock:
+            fresh = self._expires_at is None or time.time() < self._expires_at - self.EXPIRY_SKEW
+            if self._credential is None or force_refresh or not fresh:
+                self._credential, self._expires_at = self._run()
+            return self._credential
+
+    @staticmethod
+    def _parse_timestamp(value: str) -> Optional[float]:
+        # RFC 3339 with optional fractional seconds, which fromisoformat only
+        # partially understands before Python 3.11
+        match = re.match(r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.\d+)?(Z|[+-]\d{2}:\d{2})?$", value or "")
+        if not match:
+            return None
+        zone = match.group(2) or "Z"
+        zone = "+00:00" if zone == "Z" else zone
+        return datetime.fromisoformat(match.group(1) + zone).timestamp()
+
+    def _run(self) -> Tuple[dict, Optional[float]]:
+        command = self.exec_config.get('command')
+        if not command:
+            raise UnsupportedConfig("exec plugin without command")
+        api_version = self.exec_config.get('apiVersion', 'client.authentication.k8s.io/v1beta1')
+        env = dict(os.environ)
+        for item in self.exec_config.get('env') or []:
+            env[item['name']] = item['value']
+        env['KUBERNETES_EXEC_INFO'] = json.dumps({
+            'apiVersion': api_version,
+            'kind': 'ExecCredential',
+            'spec': {'interactive': False},
+        })
+        try:
+            result = subprocess.run([command] + list(self.exec_config.get('args') or []),
+                                    capture_output=True, text=True, env=env, timeout=60)
+        except FileNotFoundError:
+            raise ApiError(401, f"exec plugin {command} not found")
+        except subprocess.TimeoutExpired:
+            raise ApiError(401, f"exec plugin {command} timed out")
+        if result.returncode != 0:
+            raise ApiError(401, f"exec plugin {command} failed: {result.stderr.strip()}")
+        try:
+            status = json.loads(result.stdout).get('status') or {}
+        except ValueError as e:
+            raise ApiError(401, f"exec plugin {command} returned invalid JSON: {e}")
+        return status, ExecCredentialProvider._parse_timestamp(status.get('expirationTimestamp'))
+
+
+class KubeApiClient:
+    """Minimal Kubernetes API client with a keep-alive HTTP(S) connection pool.
+
+    One client (and therefore one pool) exists per cluster/user pair, so every
+    context that shares them also shares connections. Construct it directly with
+    an ``ssl.SSLContext`` to talk to any server, or use ``for_context`` to build
+    it from kubeconfig credentials.
+    """
+
+    POOL_SIZE = 4
+
+    _clients: Dict[str, "KubeApiClient"] = {}
+    _clients_lock = threading.Lock()
+    _temp_files: List[str] = []
+
+    def __init__(self, server: str, ssl_context: Optional[ssl.SSLContext] = None,
+                 token: Optional[str] = None, token_file: Optional[str] = None,
+                 basic_auth: Optional[Tuple[str, str]] = None,
+                 exec_provider: Optional[ExecCredentialProvider] = None,
+                 ssl_context_factory: Optional[Callable[[Optional[str], Optional[str]], ssl.SSLContext]] = None):
+        parts = urlsplit(server)
+        if parts.scheme not in ("http", "https"):
+            raise UnsupportedConfig(f"unsupported server URL {server}")
+        self.server = server
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.base_path = parts.path.rstrip("/")
+        self.ssl_context = ssl_context
+        self.token = token
+        self.token_file = token_file
+        self.basic_auth = basic_auth
+        self.exec_provider = exec_provider
+        self.ssl_context_factory = ssl_context_factory
+        self._exec_cert: Optional[Tuple[str, str]] = None
+        self._pool: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=self.POOL_SIZE)
+
+    @staticmethod
+    def for_context(context: str) -> "KubeApiClient":
+        config = KubeConfig.load()
+        context_entry = config['contexts'].get(context)
+        if context_entry is None:
+            raise UnsupportedConfig(f"context {context} not found in kubeconfig")
+        cluster = config['clusters'].get(context_entry.get('cluster')) or {}
+        user = config['users'].get(context_entry.get('user')) or {}
+        key = hashlib.sha256(json.dumps([cluster, user], sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        with KubeApiClient._clients_lock:
+            client = KubeApiClient._clients.get(key)
+            if client is None:
+                client = KubeApiClient._from_kubeconfig(cluster, user)
+                KubeApiClient._clients[key] = client
+            return client
+
+    @staticmethod
+    def _data_file(data: str) -> str:
+        fd, path = tempfile.mkstemp(prefix="kubewire-", suffix=".pem")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(base64.b64decode(data))
+        if not KubeApiClient._temp_files:
+            atexit.register(KubeApiClient._remove_temp_files)
+        KubeApiClient._temp_files.append(path)
+        return path
+
+    @staticmethod
+    def _remove_temp_files():
+        for path in KubeApiClient._temp_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _from_kubeconfig(cluster: dict, user: dict) -> "KubeApiClient":
+        server = cluster.get('server')
+        if not server:
+            raise UnsupportedConfig("cluster has no server")
+        if cluster.get('proxy-url') or cluster.get('tls-server-name'):
+            raise UnsupportedConfig("proxy-url and tls-server-name are not supported")
+        if user.get('auth-provider'):
+            raise UnsupportedConfig("auth-provider plugins are not supported")
+
+        ca_file = cluster.get('certificate-authority')
+        if cluster.get('certificate-authority-data'):
+            ca_file = KubeApiClient._data_file(cluster['certificate-authority-data'])
+        insecure = bool(cluster.get('insecure-skip-tls-verify'))
+
+        def ssl_context_factory(cert_file: Optional[str], key_file: Optional[str]) -> ssl.SSLContext:
+            context = ssl.create_default_context(cafile=os.path.expanduser(ca_file) if ca_file else None)
+            if insecure:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            if cert_file and key_file:
+                context.load_cert_chain(os.path.expanduser(cert_file), os.path.expanduser(key_file))
+            return context
+
+        cert_file = user.get('client-certificate')
+        if user.get('client-certificate-data'):
+            cert_file = KubeApiClient._data_file(user['client-certificate-data'])
+        key_file = user.get('client-key')
+        if user.get('client-key-data'):
+            key_file = KubeApiClient._data_file(user['client-key-data'])
+
+        basic_auth = None
+        if user.get('username') and user.get('password'):
+            basic_auth = (user['username'], user['password'])
+
+        return KubeApiClient(
+            server,
+            ssl_context=ssl_context_factory(cert_file, key_file) if server.startswith("https") else None,
+            token=user.get('token'),
+            token_file=user.get('tokenFile'),
+            basic_auth=basic_auth,
+            exec_provider=ExecCredentialProvider(user['exec']) if user.get('exec') else None,
+            ssl_context_factory=ssl_context_factory,
+        )
+
+    def _auth_headers(self, force_refresh: bool) -> Dict[str, str]:
+        headers = {"Accept": "application/json", "User-Agent": "KubeWire"}
+        token = self.token
+        if self.token_file:
+            with open(os.path.expanduser(self.token_file), 'r', encoding='utf-8') as f:
+                token = f.read().strip()
+        if self.exec_provider:
+            credential = self.exec_provider.get(force_refresh)
+            token = credential.get('token') or token
+            cert = (credential.get('clientCertificateData'), credential.get('clientKeyData'))
+            if cert[0] and cert[1] and cert != self._exec_cert:
+                self._use_exec_certificate(*cert)
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        elif self.basic_auth:
+            encoded = base64.b64encode(f"{self.basic_auth[0]}:{self.basic_auth[1]}".encode("utf-8")).decode("ascii")
+            headers["Authorization"] = f"Basic {encoded}"
+        return headers
+
+    def auth_headers(self, force_refresh: bool = False) -> Dict[str, str]:
+        """Headers for connections made outside ``request``, such as WebSocket upgrades."""
+        return self._auth_headers(force_refresh)
+
+    def _use_exec_certificate(self, cert_pem: str, key_pem: str):
+        if self.ssl_context_factory is None:
+            raise UnsupportedConfig("exec client certificates need an ssl_context_factory")
+        cert_file = KubeApiClient._data_file(base64.b64encode(cert_pem.encode("utf-8")).decode("ascii"))
+        key_file = KubeApiClient._data_file(base64.b64encode(key_pem.encode("utf-8")).decode("ascii"))
+        self.ssl_context = self.ssl_context_factory(cert_file, key_file)
+        self._exec_cert = (cert_pem, key_pem)
+        self.close()
+
+    def _new_connection(self, timeout: float) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _acquire(self, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            return self._new_connection(timeout), False
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        return connection, True
+
+    def _release(self, connection: http.client.HTTPConnection, response: http.client.HTTPResponse):
+        if response.will_close:
+            connection.close()
+            return
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def request(self, method: str, path: str, timeout: float = 10.0) -> Tuple[int, bytes]:
+        refreshed = False
+        while True:
+            headers = self._auth_headers(force_refresh=refreshed)
+            connection, reused = self._acquire(timeout)
+            try:
+                connection.request(method, self.base_path + path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if reused:
+                    # The server dropped an idle keep-alive connection
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+            self._release(connection, response)
+            if response.status == 401 and self.exec_provider and not refreshed:
+                refreshed = True
+                continue
+            return response.status, body
+
+    def get_json(self, path: str, timeout: float = 10.0) -> dict:
+        status, body = self.request("GET", path, timeout=timeout)
+        if status != 200:
+            message = body.decode("utf-8", errors="replace")
+            try:
+                message = json.loads(message).get('message', message)
+            except (ValueError, AttributeError):
+                pass
+            raise ApiError(status, message)
+        return json.loads(body)
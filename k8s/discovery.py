@@ -1,8 +1,71 @@
-import json
+import codecs
+import socket
 import subprocess
-from typing import List, Dict, Tuple
+import tempfile
+import threading
+import time
+from typing import Callable, List, Dict, Tuple, Optional, Set
+from urllib.parse import quote, urlencode
+
+import yaml
+
+from k8s.api_client import ApiError, KubeApiClient, UnsupportedConfig
+from k8s.json_stream import ListItemParser
+from k8s.kubeconfig import KubeConfig
+from metrics.runtime_stats import RuntimeStats
+
+EXCLUDED_NAMESPACES = ('kube-system', 'kube-public', 'kube-node-lease', 'default')
+DEADLINE_EXCEEDED = "deadline exceeded"
+
+
+class Deadline:
+    """Time budget shared by every call made for one context.
+
+    The clock starts with the first call made against the context, so time
+    spent queued behind other contexts in the worker pool does not count.
+    """
+
+    def __init__(self, seconds: Optional[float]):
+        self.seconds = seconds
+        self.started_at: Optional[float] = None
+
+    def remaining(self) -> Optional[float]:
+        now = time.monotonic()
+        if self.started_at is None:
+            self.started_at = now
+        if not self.seconds:
+            return None
+        return max(0.0, self.seconds - (now - self.started_at))
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at if self.started_at is not None else 0.0
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def timeout(self, call_timeout: Optional[float]) -> Optional[float]:
+        """Returns the timeout for the next call: the per-call limit, capped by what is left."""
+        remaining = self.remaining()
+        if remaining is None:
+            return call_timeout
+        if not call_timeout:
+            return remaining
+        return min(call_timeout, remaining)
+
 
 class KubernetesDiscovery:
+    # Listing calls take a ``backend``: "kubectl" spawns a process per call,
+    # "api" uses the pooled in-process client
+    API_PAGE_SIZE = 500
+    # Extra time kubectl gets to exit on its own after --request-timeout
+    PROCESS_GRACE = 2
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    _processes: Set[subprocess.Popen] = set()
+    _processes_lock = threading.Lock()
+    _cancelled = threading.Event()
+
     @staticmethod
     def _log_console(message):
         from datetime import datetime
@@ -10,18 +73,219 @@ class KubernetesDiscovery:
         print(f"[{timestamp}] {message}")
 
     @staticmethod
-    def run_kubectl_command(cmd: List[str]) -> Tuple[bool, str]:
+    def deadline_exceeded_output(timeout: float) -> str:
+        return f"Unable to connect to the server: {DEADLINE_EXCEEDED} (timeout after {timeout:.1f}s)"
+
+    @staticmethod
+    def is_deadline_exceeded(output: str) -> bool:
+        return DEADLINE_EXCEEDED in output
+
+    @staticmethod
+    def cancel_all():
+        """Kills every in-flight discovery subprocess and refuses new ones until ``reset_cancel``."""
+        KubernetesDiscovery._cancelled.set()
+        with KubernetesDiscovery._processes_lock:
+            processes = list(KubernetesDiscovery._processes)
+        for process in processes:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    @staticmethod
+    def reset_cancel():
+        KubernetesDiscovery._cancelled.clear()
+
+    @staticmethod
+    def running_processes() -> int:
+        with KubernetesDiscovery._processes_lock:
+            return len(KubernetesDiscovery._processes)
+
+    @staticmethod
+    def run_kubectl_command(cmd: List[str], timeout: Optional[float] = None) -> Tuple[bool, str]:
+        if KubernetesDiscovery._cancelled.is_set():
+            return False, "discovery cancelled"
+        if timeout is not None and timeout <= 0:
+            return False, KubernetesDiscovery.deadline_exceeded_output(0)
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            return True, result.stdout.strip()
-        except subprocess.CalledProcessError as e:
-            return False, e.stderr.strip()
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
         except FileNotFoundError:
             return False, "kubectl command not found"
+        RuntimeStats.count_kubectl("discovery")
+
+        with KubernetesDiscovery._processes_lock:
+            KubernetesDiscovery._processes.add(process)
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            return False, KubernetesDiscovery.deadline_exceeded_output(timeout)
+        finally:
+            with KubernetesDiscovery._processes_lock:
+                KubernetesDiscovery._processes.discard(process)
+
+        if process.returncode != 0:
+            if KubernetesDiscovery._cancelled.is_set():
+                return False, "discovery cancelled"
+            return False, stderr.strip()
+        return True, stdout.strip()
+
+    @staticmethod
+    def stream_kubectl_items(cmd: List[str], timeout: Optional[float] = None,
+                             project: Optional[Callable[[dict], dict]] = None) -> Tuple[bool, str, List[Dict[str, any]]]:
+        """Runs a ``kubectl get -o json`` and parses its ``items`` while the output
+        is still arriving (see ``ListItemParser``), instead of buffering the
+        whole document. The process is killed once ``timeout`` elapses."""
+        if KubernetesDiscovery._cancelled.is_set():
+            return False, "discovery cancelled", []
+        with tempfile.TemporaryFile() as stderr_file:
+            try:
+                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file)
+            except FileNotFoundError:
+                return False, "kubectl command not found", []
+            RuntimeStats.count_kubectl("discovery")
+
+            timed_out = threading.Event()
+
+            def expire():
+                timed_out.set()
+                process.kill()
+
+            timer = threading.Timer(timeout, expire) if timeout else None
+            if timer:
+                timer.daemon = True
+                timer.start()
+            with KubernetesDiscovery._processes_lock:
+                KubernetesDiscovery._processes.add(process)
+
+            parser = ListItemParser(project)
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            items = []
+            parse_error = None
+            try:
+                for chunk in iter(lambda: process.stdout.read1(KubernetesDiscovery.STREAM_CHUNK_SIZE), b""):
+                    if parse_error is None:
+                        try:
+                            items.extend(parser.feed(decoder.decode(chunk)))
+                        except ValueError as e:
+                            # Keep draining so kubectl does not block on a full pipe
+                            parse_error = e
+                            items = []
+                process.wait()
+            finally:
+                if timer:
+                    timer.cancel()
+                process.stdout.close()
+                with KubernetesDiscovery._processes_lock:
+                    KubernetesDiscovery._processes.discard(process)
+
+            if timed_out.is_set():
+                return False, KubernetesDiscovery.deadline_exceeded_output(timeout), []
+            if process.returncode != 0:
+                if KubernetesDiscovery._cancelled.is_set():
+                    return False, "discovery cancelled", []
+                stderr_file.seek(0)
+                return False, stderr_file.read().decode("utf-8", errors="replace").strip(), []
+        if parse_error is None and not parser.done:
+            parse_error = ValueError("kubectl output ended before the JSON document was complete")
+        if parse_error is not None:
+            KubernetesDiscovery._log_console(f"   ❌ Failed to parse kubectl JSON: {parse_error}")
+            return False, str(parse_error), []
+        return True, "", items
+
+    @staticmethod
+    def _api_error_output(error: Exception) -> str:
+        # Phrased like kubectl's stderr so classify_access_error and
+        # is_forbidden work the same for both backends.
+        if isinstance(error, ApiError):
+            if error.status == 401:
+                return f"error: You must be logged in to the server (Unauthorized): {error}"
+            if error.status == 403:
+                return f"Error from server (Forbidden): {error}"
+            if error.status == 404:
+                return f"Error from server (NotFound): {error}"
+            return f"Error from server ({error.status}): {error}"
+        if isinstance(error, (socket.timeout, TimeoutError)):
+            return f"Unable to connect to the server: i/o timeout ({DEADLINE_EXCEEDED})"
+        if isinstance(error, ConnectionRefusedError):
+            return "Unable to connect to the server: connection refused"
+        return f"Unable to connect to the server: {error}"
+
+    @staticmethod
+    def _api_path(resource: str, namespace: Optional[str]) -> str:
+        if namespace:
+            return f"/api/v1/namespaces/{quote(namespace, safe='')}/{resource}"
+        return f"/api/v1/{resource}"
+
+    @staticmethod
+    def _list_items_api(context: str, resource: str, namespace: Optional[str], request_timeout: Optional[float],
+                        project: Optional[Callable[[dict], dict]]) -> Tuple[bool, str, List[Dict[str, any]]]:
+        path = KubernetesDiscovery._api_path(resource, namespace)
+        items = []
+        continue_token = ""
+        try:
+            # Unreadable client certificates or kubeconfig files only fail
+            # this context, as they would fail its kubectl calls
+            client = KubeApiClient.for_context(context)
+            while True:
+                query = {"limit": KubernetesDiscovery.API_PAGE_SIZE}
+                if continue_token:
+                    query["continue"] = continue_token
+                data = client.get_json(f"{path}?{urlencode(query)}", timeout=request_timeout or 30)
+                page = data.get('items') or []
+                items.extend(map(project, page) if project else page)
+                continue_token = (data.get('metadata') or {}).get('continue')
+                if not continue_token:
+                    return True, "", items
+        except (ApiError, OSError, ValueError, yaml.YAMLError) as e:
+            return False, KubernetesDiscovery._api_error_output(e), []
+
+    @staticmethod
+    def list_items(context: str, resource: str, namespace: Optional[str] = None, all_namespaces: bool = False,
+                   request_timeout: Optional[float] = None, project: Optional[Callable[[dict], dict]] = None,
+                   backend: str = "kubectl") -> Tuple[bool, str, List[Dict[str, any]]]:
+        """Lists a core/v1 resource through ``backend``.
+
+        With the ``api`` backend the in-process client is used; kubeconfigs it
+        cannot handle fall back to kubectl. ``request_timeout`` bounds the whole
+        call: kubectl gets it as ``--request-timeout`` and is killed shortly
+        after it if it has not exited by then. ``project`` is applied to every
+        item as soon as it is parsed, so only the fields it keeps stay in memory.
+        """
+        if KubernetesDiscovery._cancelled.is_set():
+            return False, "discovery cancelled", []
+        if request_timeout is not None and request_timeout <= 0:
+            return False, KubernetesDiscovery.deadline_exceeded_output(0), []
+        if backend == "api":
+            try:
+                return KubernetesDiscovery._list_items_api(context, resource, namespace, request_timeout, project)
+            except UnsupportedConfig as e:
+                KubernetesDiscovery._log_console(f"   ⚠️  API client unavailable for {context} ({e}), using kubectl")
+
+        cmd = ["kubectl", "get", resource, "--context", context, "-o", "json"]
+        if all_namespaces:
+            cmd.append("--all-namespaces")
+        elif namespace:
+            cmd.extend(["--namespace", namespace])
+        process_timeout = None
+        if request_timeout:
+            cmd.append(f"--request-timeout={max(1, int(request_timeout))}s")
+            process_timeout = request_timeout + KubernetesDiscovery.PROCESS_GRACE
+        return KubernetesDiscovery.stream_kubectl_items(cmd, process_timeout, project)
 
     @staticmethod
     def get_contexts() -> List[str]:
         KubernetesDiscovery._log_console("🔧 Discovering Kubernetes contexts...")
+        try:
+            contexts = KubeConfig.get_contexts()
+            KubernetesDiscovery._log_console(f"   Found {len(contexts)} contexts")
+            return contexts
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            KubernetesDiscovery._log_console(f"   ⚠️  Could not parse kubeconfig ({e}), asking kubectl")
+
         success, output = KubernetesDiscovery.run_kubectl_command([
             "kubectl", "config", "get-contexts", "-o", "name"
         ])
@@ -34,76 +298,142 @@ class KubernetesDiscovery:
             return []
 
     @staticmethod
-    def check_context_access(context: str) -> Tuple[bool, str]:
-        success, output = KubernetesDiscovery.run_kubectl_command([
-            "kubectl", "get", "namespaces", "--context", context, "-o", "name", "--request-timeout=5s"
-        ])
-        if success:
-            return True, ""
+    def classify_access_error(output: str) -> str:
+        output_lower = output.lower()
+        if "provide credentials" in output_lower or "logged in" in output_lower:
+            return "Authentication required"
+        elif DEADLINE_EXCEEDED in output_lower:
+            return "Deadline exceeded"
+        elif "timeout" in output_lower or "connection refused" in output_lower:
+            return "Connection timeout"
+        elif "forbidden" in output_lower or "unauthorized" in output_lower:
+            return "Access denied"
+        elif "not found" in output_lower:
+            return "Context not found"
         else:
-            output_lower = output.lower()
-            if "provide credentials" in output_lower or "logged in" in output_lower:
-                return False, "Authentication required"
-            elif "timeout" in output_lower or "connection refused" in output_lower:
-                return False, "Connection timeout"
-            elif "forbidden" in output_lower or "unauthorized" in output_lower:
-                return False, "Access denied"
-            elif "not found" in output_lower:
-                return False, "Context not found"
-            else:
-                return False, "Unknown error"
+            return "Unknown error"
 
     @staticmethod
-    def get_namespaces(context: str) -> List[str]:
+    def list_namespaces(context: str, timeout: Optional[float] = 5,
+                        backend: str = "kubectl") -> Tuple[bool, str, List[str]]:
+        """Checks access to a context and lists its namespaces with a single call.
+
+        Returns ``(accessible, error_message, namespaces)`` where the error
+        message comes from ``classify_access_error``.
+        """
         KubernetesDiscovery._log_console(f"🔍 Discovering namespaces in context: {context}")
-        success, output = KubernetesDiscovery.run_kubectl_command([
-            "kubectl", "get", "namespaces", "--context", context, "-o", "name"
-        ])
-        if success:
-            namespaces = []
-            for line in output.split('\n'):
-                if line.strip().startswith('namespace/'):
-                    ns = line.strip().replace('namespace/', '')
-                    namespaces.append(ns)
-            KubernetesDiscovery._log_console(f"   Found {len(namespaces)} namespaces")
-            return namespaces
-        else:
-            if "provide credentials" in output.lower() or "logged in" in output.lower():
-                KubernetesDiscovery._log_console(f"   ❌ Authentication required for context: {context}")
-            else:
-                KubernetesDiscovery._log_console(f"   ❌ Failed to get namespaces: {output}")
-            return []
+        success, output, items = KubernetesDiscovery.list_items(context, "namespaces", request_timeout=timeout,
+                                                                project=KubernetesDiscovery.namespace_fields,
+                                                                backend=backend)
+        if not success:
+            return False, KubernetesDiscovery.classify_access_error(output), []
+
+        namespaces = [item.get('metadata', {}).get('name', '') for item in items]
+        namespaces = [ns for ns in namespaces if ns]
+        KubernetesDiscovery._log_console(f"   Found {len(namespaces)} namespaces")
+        return True, "", namespaces
 
     @staticmethod
-    def get_services(context: str, namespace: str) -> List[Dict[str, any]]:
+    def check_context_access(context: str) -> Tuple[bool, str]:
+        accessible, error_msg, _namespaces = KubernetesDiscovery.list_namespaces(context)
+        return accessible, error_msg
+
+    @staticmethod
+    def get_namespaces(context: str) -> List[str]:
+        accessible, error_msg, namespaces = KubernetesDiscovery.list_namespaces(context)
+        if not accessible:
+            KubernetesDiscovery._log_console(f"   ❌ Failed to get namespaces in {context}: {error_msg}")
+        return namespaces
+
+    @staticmethod
+    def namespace_fields(item: Dict[str, any]) -> Dict[str, any]:
+        return {'metadata': {'name': (item.get('metadata') or {}).get('name', '')}}
+
+    @staticmethod
+    def service_fields(item: Dict[str, any]) -> Dict[str, any]:
+        """Keeps only what ``parse_service_item`` reads from a service."""
+        metadata = item.get('metadata') or {}
+        ports = (item.get('spec') or {}).get('ports') or []
+        return {
+            'metadata': {'name': metadata.get('name', ''), 'namespace': metadata.get('namespace', '')},
+            'spec': {'ports': [{'port': port.get('port')} for port in ports]},
+        }
+
+    @staticmethod
+    def parse_service_item(item: Dict[str, any]) -> Optional[Dict[str, any]]:
+        service_name = item.get('metadata', {}).get('name', '')
+        service_spec = item.get('spec', {})
+        ports = service_spec.get('ports', [])
+        if service_name == 'kubernetes' or not ports:
+            return None
+        first_port = ports[0].get('port', 80)
+        return {
+            'name': service_name,
+            'port': first_port,
+            'all_ports': [p.get('port') for p in ports]
+        }
+
+    @staticmethod
+    def is_forbidden(output: str) -> bool:
+        return "forbidden" in output.lower()
+
+    @staticmethod
+    def list_services(context: str, namespace: str, timeout: Optional[float] = None,
+                      backend: str = "kubectl") -> Tuple[bool, str, List[Dict[str, any]]]:
+        """Like ``get_services`` but returns ``(success, error_output, services)`` so a
+        timeout can be told apart from an empty namespace."""
         KubernetesDiscovery._log_console(f"🔍 Discovering services in {context}/{namespace}")
-        success, output = KubernetesDiscovery.run_kubectl_command([
-            "kubectl", "get", "services", "--context", context, "--namespace", namespace, "-o", "json"
-        ])
+        success, output, items = KubernetesDiscovery.list_items(context, "services", namespace=namespace,
+                                                                request_timeout=timeout,
+                                                                project=KubernetesDiscovery.service_fields,
+                                                                backend=backend)
         if success:
-            try:
-                services_data = json.loads(output)
-                services = []
-                for item in services_data.get('items', []):
-                    service_name = item.get('metadata', {}).get('name', '')
-                    service_spec = item.get('spec', {})
-                    ports = service_spec.get('ports', [])
-                    if service_name == 'kubernetes' or not ports:
-                        continue
-                    first_port = ports[0].get('port', 80)
-                    services.append({
-                        'name': service_name,
-                        'port': first_port,
-                        'all_ports': [p.get('port') for p in ports]
-                    })
-                KubernetesDiscovery._log_console(f"   Found {len(services)} services")
-                return services
-            except json.JSONDecodeError as e:
-                KubernetesDiscovery._log_console(f"   ❌ Failed to parse services JSON: {e}")
-                return []
+            services = []
+            for item in items:
+                service = KubernetesDiscovery.parse_service_item(item)
+                if service:
+                    services.append(service)
+            KubernetesDiscovery._log_console(f"   Found {len(services)} services")
+            return True, "", services
         else:
             if "provide credentials" in output.lower() or "logged in" in output.lower():
                 KubernetesDiscovery._log_console(f"   ❌ Authentication required for context: {context}")
             else:
                 KubernetesDiscovery._log_console(f"   ❌ Failed to get services: {output}")
-            return []
+            return False, output, []
+
+    @staticmethod
+    def get_services(context: str, namespace: str, timeout: Optional[float] = None) -> List[Dict[str, any]]:
+        _success, _output, services = KubernetesDiscovery.list_services(context, namespace, timeout)
+        return services
+
+    @staticmethod
+    def get_all_services(context: str, timeout: Optional[float] = 10,
+                         backend: str = "kubectl") -> Tuple[bool, str, Dict[str, List[Dict[str, any]]]]:
+        """Lists every service of the cluster with a single call, grouped by namespace.
+
+        Returns ``(success, error_output, services_by_namespace)``; namespaces in
+        ``EXCLUDED_NAMESPACES`` are dropped. The call doubles as the access check
+        for the context: on failure the caller classifies the output with
+        ``classify_access_error`` or falls back to per-namespace listing when it
+        is forbidden (see ``is_forbidden``).
+        """
+        KubernetesDiscovery._log_console(f"🔍 Discovering services in all namespaces of {context}")
+        success, output, items = KubernetesDiscovery.list_items(context, "services", all_namespaces=True,
+                                                                request_timeout=timeout,
+                                                                project=KubernetesDiscovery.service_fields,
+                                                                backend=backend)
+        if not success:
+            return False, output, {}
+
+        services_by_namespace = {}
+        for item in items:
+            namespace = item.get('metadata', {}).get('namespace', '')
+            if not namespace or namespace in EXCLUDED_NAMESPACES:
+                continue
+            service = KubernetesDiscovery.parse_service_item(item)
+            if service:
+                services_by_namespace.setdefault(namespace, []).append(service)
+        total = sum(len(services) for services in services_by_namespace.values())
+        KubernetesDiscovery._log_console(f"   Found {total} services in {len(services_by_namespace)} namespaces")
+        return True, "", services_by_namespace
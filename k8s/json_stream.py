@@ -0,0 +1,95 @@
+import json
+import re
+from typing import Callable, List, Optional
+
+# A complete JSON string, or one of the structural characters that matter
+# for finding the boundaries of the items
+_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]:"]', re.DOTALL)
+# Inside an item only nesting matters: skip strings and scalars in one match
+_SKIP = re.compile(r'(?:[^"{}\[\]]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.DOTALL)
+_DECODER = json.JSONDecoder()
+
+
+class ListItemParser:
+    """Incremental parser for the ``items`` array of a Kubernetes list document.
+
+    Text is fed in chunks as it arrives from kubectl; ``feed`` returns the
+    items completed by that chunk. Only the item currently being read is
+    buffered, and ``project`` (if given) is applied to it straight away, so
+    peak memory stays flat however many items the list holds. Everything
+    outside ``items`` (``kind``, ``metadata``...) is skipped without parsing.
+    """
+
+    def __init__(self, project: Optional[Callable[[dict], dict]] = None):
+        self.project = project
+        self.done = False
+        self._depth = 0
+        self._pending_key: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._in_items = False
+        self._item_parts: Optional[List[str]] = None
+        self._tail = ""
+
+    def feed(self, text: str) -> List[dict]:
+        items = []
+        chunk = self._tail + text
+        self._tail = ""
+        item_start = 0
+        pos = 0
+        while True:
+            if self._depth > 2:
+                start = _SKIP.match(chunk, pos).end()
+                if start >= len(chunk):
+                    break
+                token = chunk[start]
+            else:
+                match = _TOKEN.search(chunk, pos)
+                if match is None:
+                    break
+                start, token = match.start(), match.group()
+            if token == '"':
+                # String cut by the end of the chunk: keep it for the next one
+                self._tail = chunk[start:]
+                chunk = chunk[:start]
+                break
+            pos = start + len(token)
+            if token[0] == '"':
+                if self._depth == 1:
+                    self._pending_key = token
+            elif token == ':':
+                if self._depth == 1:
+                    self._current_key = self._pending_key
+            elif token in '{[':
+                if self._depth == 2 and self._in_items and token == '{':
+                    # Fast path: the whole item is already in this chunk
+                    try:
+                        item, pos = _DECODER.raw_decode(chunk, start)
+                    except ValueError:
+                        self._item_parts = []
+                        item_start = start
+                    else:
+                        items.append(self.project(item) if self.project else item)
+                        continue
+                elif self._depth == 1 and token == '[' and self._current_key == '"items"':
+                    self._in_items = True
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth < 0:
+                    raise ValueError("unbalanced JSON in kubectl output")
+                if self._depth == 2 and self._item_parts is not None:
+                    self._item_parts.append(chunk[item_start:pos])
+                    items.append(self._finish_item())
+                elif self._depth == 1 and self._in_items:
+                    self._in_items = False
+                elif self._depth == 0:
+                    self.done = True
+
+        if self._item_parts is not None:
+            self._item_parts.append(chunk[item_start:])
+        return items
+
+    def _finish_item(self) -> dict:
+        item = json.loads("".join(self._item_parts))
+        self._item_parts = None
+        return self.project(item) if self.project else item
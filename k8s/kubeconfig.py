@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+
+class KubeConfig:
+    """Reads kubeconfig files directly, following kubectl's merge rules.
+
+    ``KUBECONFIG`` may list several files; for contexts, clusters and users the
+    first file defining a name wins, and the first non-empty current-context
+    wins. Parsed files are cached by mtime and size, so repeated lookups do
+    not touch the disk beyond a ``stat``.
+    """
+
+    _file_cache: Dict[Path, Tuple[Tuple[int, int], dict]] = {}
+    _merged_cache: Optional[Tuple[tuple, dict]] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def paths() -> List[Path]:
+        kubeconfig = os.environ.get("KUBECONFIG")
+        if kubeconfig:
+            return [Path(p).expanduser() for p in kubeconfig.split(os.pathsep) if p]
+        return [Path.home() / ".kube" / "config"]
+
+    @staticmethod
+    def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _load_file(path: Path, stamp: Tuple[int, int]) -> dict:
+        cached = KubeConfig._file_cache.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+        if not isinstance(data, dict):
+            raise ValueError(f"{path} is not a kubeconfig mapping")
+        KubeConfig._file_cache[path] = (stamp, data)
+        return data
+
+    @staticmethod
+    def _resolve_paths(entry: dict, base_dir: Path) -> dict:
+        # File references are relative to the kubeconfig that declares them
+        resolved = dict(entry)
+        for key in ('certificate-authority', 'client-certificate', 'client-key', 'tokenFile'):
+            value = resolved.get(key)
+            if value and not os.path.isabs(os.path.expanduser(value)):
+                resolved[key] = str(base_dir / value)
+        return resolved
+
+    @staticmethod
+    def load() -> dict:
+        """Returns the merged kubeconfig as ``{'contexts', 'clusters', 'users', 'current-context'}``.
+
+        Raises ``FileNotFoundError`` when none of the kubeconfig files exist and
+        ``ValueError``/``yaml.YAMLError`` when one of them cannot be parsed.
+        """
+        paths = KubeConfig.paths()
+        stamps = tuple((path, KubeConfig._stamp(path)) for path in paths)
+        with KubeConfig._lock:
+            if KubeConfig._merged_cache and KubeConfig._merged_cache[0] == stamps:
+                return KubeConfig._merged_cache[1]
+
+            if all(stamp is None for _path, stamp in stamps):
+                raise FileNotFoundError("No kubeconfig file found")
+
+            merged = {'contexts': {}, 'clusters': {}, 'users': {}, 'current-context': ''}
+            for path, stamp in stamps:
+                if stamp is None:
+                    continue
+                data = KubeConfig._load_file(path, stamp)
+                for section, key in (('contexts', 'context'), ('clusters', 'cluster'), ('users', 'user')):
+                    for entry in data.get(section) or []:
+                        name = entry.get('name') if isinstance(entry, dict) else None
+                        if name and name not in merged[section]:
+                            merged[section][name] = KubeConfig._resolve_paths(entry.get(key) or {}, path.parent)
+                if not merged['current-context'] and data.get('current-context'):
+                    merged['current-context'] = data['current-context']
+
+            KubeConfig._merged_cache = (stamps, merged)
+            return merged
+
+    @staticmethod
+    def get_contexts() -> List[str]:
+        # Same order as `kubectl config get-contexts -o name`
+        return sorted(KubeConfig.load()['contexts'].keys())
+
+    @staticmethod
+    def current_context() -> str:
+        try:
+            return KubeConfig.load()['current-context']
+        except (OSError, ValueError, yaml.YAMLError):
+            return ""
+
+    @staticmethod
+    def context_fingerprint(context: str) -> str:
+        """Hash of the context, its cluster and the name of its user.
+
+        Credentials are left out on purpose: auth plugins rewrite tokens in place
+        and that must not invalidate cached discovery results.
+        """
+        try:
+            config = KubeConfig.load()
+        except (OSError, ValueError, yaml.YAMLError):
+            config = {'contexts': {}, 'clusters': {}, 'users': {}}
+        context_entry = config['contexts'].get(context)
+        if context_entry is None:
+            material = {'context': context, 'missing': True}
+        else:
+            material = {
+                'context': context_entry,
+                'cluster': config['clusters'].get(context_entry.get('cluster')),
+            }
+        digest = hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()[:16]
@@ -0,0 +1,268 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from k8s.api_client import ApiError, KubeApiClient
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+# Channel protocols understood by the kubelet's portforward endpoint
+PORTFORWARD_PROTOCOLS = "v4.channel.k8s.io, channel.k8s.io"
+
+OP_CONTINUATION = 0x0
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+class TargetLost(Exception):
+    """The service no longer leads to a pod that can be forwarded to."""
+
+
+def _mask(data, key: bytes) -> bytes:
+    # XOR over the whole payload as one integer: far cheaper in CPython than
+    # a per-byte loop
+    length = len(data)
+    if not length:
+        return b""
+    keystream = (key * (length // 4 + 1))[:length]
+    return (int.from_bytes(data, "little") ^ int.from_bytes(keystream, "little")).to_bytes(length, "little")
+
+
+def _frame(opcode: int, payload: bytes) -> List[bytes]:
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, 0x80 | length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, length)
+    key = os.urandom(4)
+    return [header, key, _mask(payload, key)]
+
+
+class PortForwardStream:
+    """One TCP stream to a pod port over the Kubernetes portforward WebSocket.
+
+    Every message carries a channel byte (0 data, 1 error), and the first
+    message of each channel starts with the port number. ``read``/``write``/
+    ``drain``/``close`` mirror ``asyncio`` streams so the relay can treat both
+    alike.
+    """
+
+    DATA_CHANNEL = 0
+    ERROR_CHANNEL = 1
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._port_header_pending = {PortForwardStream.DATA_CHANNEL: True, PortForwardStream.ERROR_CHANNEL: True}
+        self.error = ""
+
+    async def _read_frame(self) -> Tuple[int, bytes]:
+        opcode = None
+        parts = []
+        while True:
+            first, second = await self._reader.readexactly(2)
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", await self._reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", await self._reader.readexactly(8))[0]
+            key = await self._reader.readexactly(4) if second & 0x80 else None
+            payload = await self._reader.readexactly(length) if length else b""
+            if key:
+                payload = _mask(payload, key)
+            frame_opcode = first & 0x0F
+            if frame_opcode >= OP_CLOSE:
+                # Control frames may arrive between the fragments of a message
+                return frame_opcode, payload
+            if frame_opcode != OP_CONTINUATION:
+                opcode = frame_opcode
+            parts.append(payload)
+            if first & 0x80:
+                return opcode, parts[0] if len(parts) == 1 else b"".join(parts)
+
+    async def read(self, _size: int = -1):
+        """Returns the next chunk of data from the pod, b"" once the stream ends."""
+        while True:
+            try:
+                opcode, payload = await self._read_frame()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return b""
+            if opcode == OP_CLOSE:
+                return b""
+            if opcode == OP_PING:
+                self._writer.writelines(_frame(OP_PONG, payload))
+                continue
+            if opcode == OP_PONG or not payload:
+                continue
+            channel, data = payload[0], memoryview(payload)[1:]
+            if self._port_header_pending.get(channel):
+                self._port_header_pending[channel] = False
+                data = data[2:]
+            if not len(data):
+                continue
+            if channel == PortForwardStream.ERROR_CHANNEL:
+                self.error += bytes(data).decode("utf-8", errors="replace")
+                return b""
+            if channel == PortForwardStream.DATA_CHANNEL:
+                return data
+
+    def write(self, data):
+        # Channel byte and data in one buffer, masked in a single pass
+        payload = bytearray(len(data) + 1)
+        payload[1:] = data
+        self._writer.writelines(_frame(OP_BINARY, payload))
+
+    async def drain(self):
+        await self._writer.drain()
+
+    def can_write_eof(self) -> bool:
+        # The protocol has no half-close
+        return False
+
+    def close(self):
+        try:
+            self._writer.writelines(_frame(OP_CLOSE, struct.pack("!H", 1000)))
+        except Exception:
+            pass
+        self._writer.close()
+
+
+class PortForwarder:
+    """Opens streams to a service port the way ``kubectl port-forward`` does.
+
+    The service is resolved to one ready pod and its port to the container
+    port, and every stream is a portforward WebSocket to that pod. When the
+    pod goes away, the service is resolved again once before giving up with
+    ``TargetLost``.
+    """
+
+    CONNECT_TIMEOUT = 10
+
+    def __init__(self, context: str, namespace: str, service: str, client: Optional[KubeApiClient] = None):
+        self.namespace = namespace
+        self.service = service
+        self.client = client or KubeApiClient.for_context(context)
+        self._targets: Dict[int, Tuple[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, remote_port: int) -> Tuple[str, int]:
+        """Returns (pod name, container port) for a service port. Blocking."""
+        base = f"/api/v1/namespaces/{quote(self.namespace)}"
+        try:
+            service = self.client.get_json(f"{base}/services/{quote(self.service)}")
+        except ApiError as e:
+            if e.status == 404:
+                raise TargetLost(f"service \"{self.service}\" not found") from e
+            raise
+        spec = service.get('spec') or {}
+        selector = spec.get('selector') or {}
+        if not selector:
+            raise TargetLost(f"service \"{self.service}\" has no selector")
+        port = next((p for p in spec.get('ports') or [] if p.get('port') == remote_port), None)
+        if port is None:
+            raise TargetLost(f"service \"{self.service}\" has no port {remote_port}")
+        target_port = port.get('targetPort', remote_port)
+
+        label_selector = ",".join(f"{key}={value}" for key, value in sorted(selector.items()))
+        pods = self.client.get_json(f"{base}/pods?labelSelector={quote(label_selector)}").get('items') or []
+        running = [pod for pod in pods if (pod.get('status') or {}).get('phase') == "Running"
+                   and not (pod.get('metadata') or {}).get('deletionTimestamp')]
+        ready = [pod for pod in running if any(condition.get('type') == "Ready" and condition.get('status') == "True"
+                                               for condition in (pod.get('status') or {}).get('conditions') or [])]
+        if not (ready or running):
+            raise TargetLost(f"no running pod behind service \"{self.service}\"")
+        pod = (ready or running)[0]
+
+        if isinstance(target_port, str):
+            containers = (pod.get('spec') or {}).get('containers') or []
+            named = [p.get('containerPort') for container in containers for p in container.get('ports') or []
+                     if p.get('name') == target_port]
+            if not named:
+                raise TargetLost(f"pod has no port named \"{target_port}\"")
+            target_port = named[0]
+        return pod['metadata']['name'], int(target_port)
+
+    def resolve_all(self, remote_ports: List[int]):
+        for remote_port in remote_ports:
+            target = self.resolve(remote_port)
+            with self._lock:
+                self._targets[remote_port] = target
+
+    async def open_stream(self, remote_port: int) -> PortForwardStream:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            target = self._targets.get(remote_port)
+        if target is None:
+            target = await loop.run_in_executor(None, self.resolve, remote_port)
+        try:
+            return await self._open(*target)
+        except (ApiError, OSError, asyncio.TimeoutError):
+            # The pod may have been replaced: look it up again, once
+            new_target = await loop.run_in_executor(None, self.resolve, remote_port)
+            with self._lock:
+                self._targets[remote_port] = new_target
+            if new_target == target:
+                raise
+            return await self._open(*new_target)
+
+    async def _open(self, pod: str, port: int) -> PortForwardStream:
+        path = (f"{self.client.base_path}/api/v1/namespaces/{quote(self.namespace)}/pods/{quote(pod)}"
+                f"/portforward?ports={port}")
+        loop = asyncio.get_running_loop()
+        refreshed = False
+        while True:
+            # Credential plugins may run a process: keep them off the loop
+            headers = await loop.run_in_executor(None, self.client.auth_headers, refreshed)
+            try:
+                return await asyncio.wait_for(self._handshake(path, headers), PortForwarder.CONNECT_TIMEOUT)
+            except ApiError as e:
+                if e.status == 401 and self.client.exec_provider and not refreshed:
+                    refreshed = True
+                    continue
+                raise
+
+    async def _handshake(self, path: str, headers: Dict[str, str]) -> PortForwardStream:
+        secure = self.client.scheme == "https"
+        reader, writer = await asyncio.open_connection(
+            self.client.host, self.client.port,
+            ssl=self.client.ssl_context if secure else None,
+            server_hostname=self.client.host if secure else None)
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        lines = [f"GET {path} HTTP/1.1", f"Host: {self.client.host}:{self.client.port}",
+                 "Upgrade: websocket", "Connection: Upgrade", f"Sec-WebSocket-Key: {key}",
+                 "Sec-WebSocket-Version: 13", f"Sec-WebSocket-Protocol: {PORTFORWARD_PROTOCOLS}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            status_line, *header_lines = head.decode("latin-1").split("\r\n")
+            status = int(status_line.split(" ", 2)[1])
+            response_headers = {}
+            for line in header_lines:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    response_headers[name.strip().lower()] = value.strip()
+            if status != 101:
+                length = int(response_headers.get('content-length') or 0)
+                body = (await reader.readexactly(length)).decode("utf-8", errors="replace") if length else ""
+                try:
+                    body = json.loads(body).get('message', body)
+                except (ValueError, AttributeError):
+                    pass
+                raise ApiError(status, body or status_line)
+            expected = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+            if response_headers.get('sec-websocket-accept') != expected:
+                raise ApiError(status, "invalid WebSocket handshake")
+        except BaseException:
+            writer.close()
+            raise
+        return PortForwardStream(reader, writer)
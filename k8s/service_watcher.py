@@ -0,0 +1,215 @@
+import json
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from k8s.discovery import KubernetesDiscovery
+from metrics.runtime_stats import RuntimeStats
+
+
+@dataclass
+class ServiceEvent:
+    type: str
+    namespace: str
+    name: str
+    resource_version: str
+    service: Optional[Dict[str, any]] = None
+
+
+class ServiceWatcher:
+    """Streams service deltas of one context from ``kubectl get --watch``.
+
+    The last seen resourceVersion of every object is kept so that the ADDED
+    replay kubectl sends after a reconnect does not produce spurious events.
+    The replay cannot tell about services deleted while the watch was down,
+    so every reconnect is followed by a resync: a fresh listing is compared
+    with the known objects and the missing ones are reported as DELETED.
+    """
+
+    RECONNECT_DELAY = 5
+    # Seconds between restarting kubectl and listing the services for the
+    # resync, so that the listing is not older than kubectl's own
+    RESYNC_DELAY = 2
+    RESYNC_TIMEOUT = 30
+
+    def __init__(self, context: str, on_event: Callable[[str, ServiceEvent], None], backend: str = "kubectl"):
+        self.context = context
+        self.on_event = on_event
+        # Discovery backend of the resync listing; the watch itself is kubectl's
+        self.backend = backend
+        self._object_versions: Dict[Tuple[str, str], str] = {}
+        # Final resourceVersion of objects deleted since the last resync
+        # started, so that a listing taken before the deletion cannot bring
+        # them back
+        self._deleted_versions: Dict[Tuple[str, str], str] = {}
+        self._events_lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch_loop, name=f"watch-{self.context}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        process = self._process
+        if process and process.poll() is None:
+            try:
+                process.terminate()
+                process.wait(timeout=2)
+            except Exception:
+                process.kill()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    def _watch_loop(self):
+        reconnecting = False
+        while not self._stop_event.is_set():
+            if not self._watch_once(reconnecting):
+                return
+            reconnecting = True
+            self._stop_event.wait(self.RECONNECT_DELAY)
+
+    def _watch_once(self, reconnecting: bool) -> bool:
+        cmd = [
+            "kubectl", "get", "services", "--context", self.context, "--all-namespaces",
+            "--watch", "--output-watch-events", "-o", "json"
+        ]
+        try:
+            self._process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                             text=True, bufsize=1)
+        except FileNotFoundError:
+            KubernetesDiscovery._log_console("❌ kubectl command not found, service watch disabled")
+            return False
+        RuntimeStats.count_kubectl("watch")
+        if reconnecting:
+            threading.Thread(target=self._resync_after_reconnect, name=f"resync-{self.context}", daemon=True).start()
+
+        decoder = json.JSONDecoder()
+        buffer = []
+        for line in self._process.stdout:
+            if self._stop_event.is_set():
+                break
+            buffer.append(line)
+            # kubectl pretty-prints every event; a closing brace in column
+            # zero is the only place where a document can end.
+            if not line.startswith("}"):
+                continue
+            try:
+                raw_event, _end = decoder.raw_decode("".join(buffer))
+            except ValueError:
+                continue
+            buffer = []
+            self._apply(raw_event)
+
+        if self._process.poll() is None:
+            self._process.terminate()
+        self._process.wait()
+        return True
+
+    def _apply(self, raw_event: Dict[str, any]):
+        try:
+            with self._events_lock:
+                self._handle_event(raw_event)
+        except Exception as e:
+            KubernetesDiscovery._log_console(f"❌ Error applying service event in {self.context}: {e}")
+
+    @staticmethod
+    def resync_fields(item: Dict[str, any]) -> Dict[str, any]:
+        """``service_fields`` plus the resourceVersion the resync compares."""
+        fields = KubernetesDiscovery.service_fields(item)
+        fields['metadata']['resourceVersion'] = (item.get('metadata') or {}).get('resourceVersion', '')
+        return fields
+
+    def _resync_after_reconnect(self):
+        if self._stop_event.wait(self.RESYNC_DELAY):
+            return
+        with self._events_lock:
+            self._deleted_versions.clear()
+            known = dict(self._object_versions)
+        success, output, items = KubernetesDiscovery.list_items(self.context, "services", all_namespaces=True,
+                                                                request_timeout=self.RESYNC_TIMEOUT,
+                                                                project=ServiceWatcher.resync_fields,
+                                                                backend=self.backend)
+        if not success:
+            KubernetesDiscovery._log_console(f"⚠️  Could not resync services of {self.context}: {output}")
+            return
+        listed = set()
+        for item in items:
+            metadata = item['metadata']
+            key = (metadata['namespace'], metadata['name'])
+            listed.add(key)
+            self._apply({'type': "MODIFIED" if key in known else "ADDED", 'object': item})
+        for (namespace, name), resource_version in known.items():
+            if (namespace, name) in listed:
+                continue
+            try:
+                with self._events_lock:
+                    # Only if nothing newer about it arrived while listing
+                    if self._object_versions.get((namespace, name)) == resource_version:
+                        self._handle_event({'type': "DELETED", 'object': {'metadata': {
+                            'namespace': namespace, 'name': name, 'resourceVersion': resource_version}}})
+            except Exception as e:
+                KubernetesDiscovery._log_console(f"❌ Error applying service event in {self.context}: {e}")
+
+    @staticmethod
+    def _is_newer(resource_version: str, known: Optional[str]) -> bool:
+        if known is None:
+            return True
+        if resource_version.isdigit() and known.isdigit():
+            return int(resource_version) > int(known)
+        return resource_version != known
+
+    def _handle_event(self, raw_event: Dict[str, any]):
+        event_type = raw_event.get('type')
+        obj = raw_event.get('object') or {}
+        metadata = obj.get('metadata') or {}
+        namespace = metadata.get('namespace', '')
+        name = metadata.get('name', '')
+        resource_version = metadata.get('resourceVersion', '')
+        key = (namespace, name)
+
+        if event_type in ("ADDED", "MODIFIED"):
+            known = self._object_versions.get(key) or self._deleted_versions.get(key)
+            if not self._is_newer(resource_version, known):
+                return
+            self._object_versions[key] = resource_version
+            self._deleted_versions.pop(key, None)
+            service = KubernetesDiscovery.parse_service_item(obj)
+        elif event_type == "DELETED":
+            if self._object_versions.pop(key, None) is None:
+                return
+            self._deleted_versions[key] = resource_version
+            service = None
+        else:
+            return
+
+        self.on_event(self.context, ServiceEvent(type=event_type, namespace=namespace, name=name,
+                                                 resource_version=resource_version, service=service))
+
+
+class ServiceWatchManager:
+    def __init__(self, on_event: Callable[[str, ServiceEvent], None], backend: str = "kubectl"):
+        self.on_event = on_event
+        self.backend = backend
+        self.watchers: Dict[str, ServiceWatcher] = {}
+
+    def sync(self, contexts: List[str]):
+        for context in list(self.watchers):
+            if context not in contexts:
+                self.watchers.pop(context).stop()
+        for context in contexts:
+            if context not in self.watchers:
+                watcher = ServiceWatcher(context, self.on_event, self.backend)
+                self.watchers[context] = watcher
+                watcher.start()
+
+    def stop_all(self):
+        for watcher in self.watchers.values():
+            watcher.stop()
+        self.watchers.clear()
@@ -3,6 +3,8 @@ import subprocess
 import threading
 import tkinter as tk
 
+from metrics.runtime_stats import RuntimeStats
+
 
 class LogsManager:
     def __init__(self, gui_instance):
@@ -61,6 +63,9 @@ class LogsManager:
                     bufsize=1,
                     universal_newlines=True
                 )
+            RuntimeStats.count_log_stream()
+            if cmd[0] == "kubectl":
+                RuntimeStats.count_kubectl("logs")
             
             # Leer línea por línea
             for line in iter(self.current_process.stdout.readline, ''):
@@ -68,6 +73,7 @@ class LogsManager:
                     break
                 if line.strip():  # Solo agregar líneas no vacías
                     self.log_queue.put(line)
+                    RuntimeStats.count_log_lines()
             
         except subprocess.CalledProcessError as e:
             self._log_console(f"❌ Error ejecutando comando de logs: {e}")
@@ -0,0 +1,197 @@
+import threading
+import time
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from k8s.discovery import KubernetesDiscovery
+from metrics.runtime_stats import RuntimeStats
+from pods.pod_monitor import PodMonitor
+from pods.pod_ui import PodUI
+from pods.tunnel_metrics import LATENCY_BOUNDS
+from pods.tunnel_registry import TunnelRegistry
+
+# name, type, help; rendered in this order
+FAMILIES = (
+    ("kubewire_tunnel_up", "gauge", "1 while the tunnel is running."),
+    ("kubewire_tunnel_failed", "gauge", "1 while the tunnel is shown as failed after dropping."),
+    ("kubewire_tunnel_degraded", "gauge", "1 while the running tunnel fails its health probes."),
+    ("kubewire_tunnel_drops_total", "counter", "Times the tunnel dropped on its own."),
+    ("kubewire_tunnel_restarts_total", "counter", "Times the tunnel was reconnected automatically."),
+    ("kubewire_tunnel_sent_bytes_total", "counter", "Bytes relayed from local clients to the service."),
+    ("kubewire_tunnel_received_bytes_total", "counter", "Bytes relayed from the service to local clients."),
+    ("kubewire_tunnel_connections_total", "counter", "Connections accepted by the tunnel."),
+    ("kubewire_tunnel_open_connections", "gauge", "Connections currently relayed by the tunnel."),
+    ("kubewire_tunnel_connection_errors_total", "counter", "Connections that could not reach the service."),
+    ("kubewire_tunnel_setup_seconds", "histogram", "Time from accepting a connection to reaching the service."),
+    ("kubewire_tunnels_failed", "gauge", "Tunnels shown as failed after dropping."),
+    ("kubewire_kubectl_started_total", "counter", "kubectl processes started, by purpose."),
+    ("kubewire_kubectl_processes", "gauge", "kubectl processes running, by purpose."),
+    ("kubewire_discovery_duration_seconds", "gauge", "Duration of the last discovery of the context."),
+    ("kubewire_discoveries_total", "counter", "Discoveries of the context."),
+    ("kubewire_log_streams_total", "counter", "Log streams started."),
+    ("kubewire_log_lines_total", "counter", "Log lines streamed."),
+)
+BUCKET_LABELS = tuple(f'le="{bound:g}"' for bound in LATENCY_BOUNDS) + ('le="+Inf"',)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class PrometheusExporter:
+    """Serves KubeWire's metrics in the Prometheus text format on localhost.
+
+    Tunnel state is read off ``registry`` and ``monitor`` when scraped,
+    process-wide counters come from RuntimeStats. A rendering is reused for
+    RENDER_TTL seconds, so scrapers polling at once cost one rendering, and
+    the label set of each tunnel is built only once.
+    """
+
+    RENDER_TTL = 0.5
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, registry: TunnelRegistry, monitor: Optional[PodMonitor] = None, port: int = 9464,
+                 host: str = "127.0.0.1"):
+        self.registry = registry
+        self.monitor = monitor
+        self.port = int(port)
+        self.host = host
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._labels: "weakref.WeakKeyDictionary[PodUI, str]" = weakref.WeakKeyDictionary()
+        self._render_lock = threading.Lock()
+        self._rendered: bytes = b""
+        self._rendered_at: Optional[float] = None
+
+    @staticmethod
+    def from_settings(settings, registry: TunnelRegistry,
+                      monitor: Optional[PodMonitor] = None) -> Optional["PrometheusExporter"]:
+        if int(settings.metrics_port) <= 0:
+            return None
+        return PrometheusExporter(registry, monitor, settings.metrics_port)
+
+    def start(self) -> bool:
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.scrape()
+                self.send_response(200)
+                self.send_header("Content-Type", PrometheusExporter.CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            PodUI._log_console(f"❌ Metrics endpoint could not listen on {self.host}:{self.port}: {e}")
+            return False
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        PodUI._log_console(f"📈 Metrics at http://{self.host}:{self.port}/metrics")
+        return True
+
+    def stop(self):
+        server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    def scrape(self) -> bytes:
+        with self._render_lock:
+            now = time.monotonic()
+            if self._rendered_at is None or now - self._rendered_at >= PrometheusExporter.RENDER_TTL:
+                self._rendered = self.render().encode("utf-8")
+                self._rendered_at = now
+            return self._rendered
+
+    def _tunnel_labels(self, pod: PodUI) -> str:
+        labels = self._labels.get(pod)
+        if labels is None:
+            labels = (f'context="{_escape(pod.get_context())}",namespace="{_escape(pod.get_namespace())}",'
+                      f'service="{_escape(pod.get_service())}",port="{pod.get_port()}"')
+            self._labels[pod] = labels
+        return labels
+
+    def render(self) -> str:
+        samples: Dict[str, List[str]] = {name: [] for name, _type, _help in FAMILIES}
+        failed, drops, restarts, degraded = set(), {}, {}, set()
+        if self.monitor is not None:
+            with self.monitor.lock:
+                failed = set(self.monitor.recently_failed_pods)
+                drops = dict(self.monitor.drops)
+                restarts = {pod_id: state.reconnects for pod_id, state in self.monitor.reconnect_states.items()
+                            if state.reconnects}
+                degraded = {pod_id for pod_id, state in self.monitor.health.items() if state.healthy is False}
+
+        tunnel_kubectls = 0
+        for pod in self.registry.all_pods():
+            pod_id = TunnelRegistry.pod_id(pod)
+            labels = self._tunnel_labels(pod)
+            running = pod.is_running()
+            samples["kubewire_tunnel_up"].append(f"kubewire_tunnel_up{{{labels}}} {int(running)}")
+            samples["kubewire_tunnel_failed"].append(f"kubewire_tunnel_failed{{{labels}}} {int(pod_id in failed)}")
+            if running and pod.has_kubectl():
+                tunnel_kubectls += 1
+            if pod_id in degraded:
+                samples["kubewire_tunnel_degraded"].append(f"kubewire_tunnel_degraded{{{labels}}} 1")
+            if pod_id in drops:
+                samples["kubewire_tunnel_drops_total"].append(f"kubewire_tunnel_drops_total{{{labels}}} {drops[pod_id]}")
+            if pod_id in restarts:
+                samples["kubewire_tunnel_restarts_total"].append(
+                    f"kubewire_tunnel_restarts_total{{{labels}}} {restarts[pod_id]}")
+            if pod.metrics is not None:
+                self._render_traffic(samples, labels, pod)
+
+        samples["kubewire_tunnels_failed"].append(f"kubewire_tunnels_failed {len(failed)}")
+        for kind, count in sorted(RuntimeStats.kubectl_started.items()):
+            samples["kubewire_kubectl_started_total"].append(f'kubewire_kubectl_started_total{{kind="{kind}"}} {count}')
+        samples["kubewire_kubectl_processes"].append(f'kubewire_kubectl_processes{{kind="port-forward"}} {tunnel_kubectls}')
+        samples["kubewire_kubectl_processes"].append(
+            f'kubewire_kubectl_processes{{kind="discovery"}} {KubernetesDiscovery.running_processes()}')
+        for context, seconds in sorted(RuntimeStats.discovery_seconds.items()):
+            context_label = f'context="{_escape(context)}"'
+            samples["kubewire_discovery_duration_seconds"].append(
+                f"kubewire_discovery_duration_seconds{{{context_label}}} {seconds:.3f}")
+            samples["kubewire_discoveries_total"].append(
+                f"kubewire_discoveries_total{{{context_label}}} {RuntimeStats.discovery_runs.get(context, 0)}")
+        samples["kubewire_log_streams_total"].append(f"kubewire_log_streams_total {RuntimeStats.log_streams}")
+        samples["kubewire_log_lines_total"].append(f"kubewire_log_lines_total {RuntimeStats.log_lines}")
+
+        lines = []
+        for name, metric_type, help_text in FAMILIES:
+            if samples[name]:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.extend(samples[name])
+        lines.append("")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _render_traffic(samples: Dict[str, List[str]], labels: str, pod: PodUI):
+        metrics = pod.metrics
+        samples["kubewire_tunnel_sent_bytes_total"].append(
+            f"kubewire_tunnel_sent_bytes_total{{{labels}}} {metrics.bytes_sent}")
+        samples["kubewire_tunnel_received_bytes_total"].append(
+            f"kubewire_tunnel_received_bytes_total{{{labels}}} {metrics.bytes_received}")
+        samples["kubewire_tunnel_connections_total"].append(
+            f"kubewire_tunnel_connections_total{{{labels}}} {metrics.connections}")
+        samples["kubewire_tunnel_open_connections"].append(
+            f"kubewire_tunnel_open_connections{{{labels}}} {metrics.active_connections}")
+        samples["kubewire_tunnel_connection_errors_total"].append(
+            f"kubewire_tunnel_connection_errors_total{{{labels}}} {metrics.errors}")
+        counts, total, count = metrics.setup_latency.totals()
+        histogram = samples["kubewire_tunnel_setup_seconds"]
+        cumulative = 0
+        for bucket_label, bucket_count in zip(BUCKET_LABELS, counts):
+            cumulative += bucket_count
+            histogram.append(f"kubewire_tunnel_setup_seconds_bucket{{{labels},{bucket_label}}} {cumulative}")
+        histogram.append(f"kubewire_tunnel_setup_seconds_sum{{{labels}}} {total:.6f}")
+        histogram.append(f"kubewire_tunnel_setup_seconds_count{{{labels}}} {count}")
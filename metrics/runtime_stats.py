@@ -0,0 +1,40 @@
+import threading
+from typing import Dict
+
+
+class RuntimeStats:
+    """Process-wide counters for the metrics endpoint.
+
+    Tunnel state is read off the tunnels themselves when metrics are
+    rendered; this only keeps what would otherwise be gone by then: how
+    many kubectl processes were started, how long the last discovery of
+    each context took and how many log lines were streamed.
+    """
+
+    _lock = threading.Lock()
+    kubectl_started: Dict[str, int] = {}
+    discovery_seconds: Dict[str, float] = {}
+    discovery_runs: Dict[str, int] = {}
+    log_streams = 0
+    log_lines = 0
+
+    @staticmethod
+    def count_kubectl(kind: str):
+        with RuntimeStats._lock:
+            RuntimeStats.kubectl_started[kind] = RuntimeStats.kubectl_started.get(kind, 0) + 1
+
+    @staticmethod
+    def record_discovery(context: str, seconds: float):
+        with RuntimeStats._lock:
+            RuntimeStats.discovery_seconds[context] = seconds
+            RuntimeStats.discovery_runs[context] = RuntimeStats.discovery_runs.get(context, 0) + 1
+
+    @staticmethod
+    def count_log_stream():
+        with RuntimeStats._lock:
+            RuntimeStats.log_streams += 1
+
+    @staticmethod
+    def count_log_lines(count: int = 1):
+        # A single streaming thread at a time, and this runs for every line
+        RuntimeStats.log_lines += count
@@ -1,10 +1,20 @@
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+@dataclass
+class ExtraPortConfig:
+    port: int
+    remote_port: int
 
 @dataclass
 class PodConfig:
     service: str
     port: int
+    remote_port: int = 80
+    extra_ports: List[ExtraPortConfig] = field(default_factory=list)
+    auto_reconnect: bool = False
+    tunnel_backend: Optional[str] = None
+    health_path: Optional[str] = None
 
 @dataclass
 class NamespaceConfig:
@@ -26,3 +36,28 @@ class ContextStatus:
     accessible: bool
     error_message: str = ""
     service_count: int = 0
+    degraded: bool = False
+
+@dataclass
+class Settings:
+    discovery_workers: int = 8
+    cluster_wide_discovery: bool = True
+    discovery_cache_ttl: int = 86400
+    watch_services: bool = False
+    discovery_backend: str = "kubectl"
+    discovery_call_timeout: int = 15
+    discovery_context_deadline: int = 45
+    tunnel_ready_timeout: float = 10
+    bulk_concurrency: int = 8
+    reconnect_base_delay: float = 1
+    reconnect_max_delay: float = 30
+    reconnect_max_attempts: int = 5
+    reconnect_cooldown: float = 300
+    forward_all_ports: bool = False
+    tunnel_backend: str = "kubectl"
+    lazy_tunnels: bool = False
+    lazy_idle_timeout: float = 300
+    health_probe_interval: float = 0
+    health_probe_timeout: float = 3
+    tunnel_metrics: bool = False
+    metrics_port: int = 0
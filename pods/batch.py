@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from pods.pod_ui import PodUI
+
+
+@dataclass
+class BatchResult:
+    pod: PodUI
+    success: bool
+    elapsed: float
+    error: str = ""
+
+
+@dataclass
+class BatchSummary:
+    action: str
+    results: List[BatchResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def succeeded(self) -> List[BatchResult]:
+        return [result for result in self.results if result.success]
+
+    @property
+    def failed(self) -> List[BatchResult]:
+        return [result for result in self.results if not result.success]
+
+
+# Called as each tunnel finishes, with the number done so far and the total
+ResultCallback = Callable[[BatchResult, int, int], None]
+
+
+class BatchRunner:
+    """Starts or stops many tunnels concurrently, at most ``concurrency`` at a time.
+
+    Results are reported through ``on_result`` in completion order, so slow
+    tunnels never hold back the report of fast ones.
+    """
+
+    def __init__(self, concurrency: int = 8):
+        self.concurrency = max(1, int(concurrency))
+
+    async def start_all(self, pods: List[PodUI], on_result: Optional[ResultCallback] = None) -> BatchSummary:
+        return await self._run("start", pods, self._start, on_result)
+
+    async def stop_all(self, pods: List[PodUI], on_result: Optional[ResultCallback] = None) -> BatchSummary:
+        return await self._run("stop", pods, self._stop, on_result)
+
+    @staticmethod
+    async def _start(pod: PodUI) -> bool:
+        return await pod.start()
+
+    @staticmethod
+    async def _stop(pod: PodUI) -> bool:
+        # stop() waits for kubectl to exit, so keep it off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, pod.stop)
+
+    async def _run(self, action: str, pods: List[PodUI], operation, on_result: Optional[ResultCallback]) -> BatchSummary:
+        summary = BatchSummary(action=action)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        total = len(pods)
+        started_at = time.monotonic()
+
+        async def run_one(pod: PodUI):
+            async with semaphore:
+                pod_started_at = time.monotonic()
+                try:
+                    success, error = bool(await operation(pod)), ""
+                except Exception as e:
+                    success, error = False, str(e)
+                result = BatchResult(pod, success, time.monotonic() - pod_started_at, error)
+            summary.results.append(result)
+            if on_result:
+                on_result(result, len(summary.results), total)
+
+        await asyncio.gather(*(run_one(pod) for pod in pods))
+        summary.elapsed = time.monotonic() - started_at
+        return summary
+
+
+class TunnelExecutor:
+    """Long-lived event loop that runs individual tunnel starts and stops.
+
+    The GUI submits every start/stop here instead of spawning a thread (and an
+    event loop) per click. At most ``concurrency`` operations run at a time;
+    each submission returns a ``concurrent.futures.Future`` of a ``BatchResult``.
+    """
+
+    def __init__(self, concurrency: int = 8):
+        self.concurrency = max(1, int(concurrency))
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="tunnel-stop"))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(started,), name="tunnel-executor", daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def _run(self, started: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    def submit_start(self, pod: PodUI, delay: float = 0,
+                     should_run: Optional[Callable[[], bool]] = None) -> Future:
+        """Starts ``pod`` after ``delay`` seconds, unless ``should_run()`` says
+        otherwise by then."""
+        return self._submit(BatchRunner._start, pod, delay, should_run)
+
+    def submit_stop(self, pod: PodUI) -> Future:
+        return self._submit(BatchRunner._stop, pod)
+
+    def _submit(self, operation, pod: PodUI, delay: float = 0,
+                should_run: Optional[Callable[[], bool]] = None) -> Future:
+        return asyncio.run_coroutine_threadsafe(self._run_one(operation, pod, delay, should_run), self._loop)
+
+    async def _run_one(self, operation, pod: PodUI, delay: float = 0,
+                       should_run: Optional[Callable[[], bool]] = None) -> BatchResult:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if should_run is not None and not should_run():
+            return BatchResult(pod, False, 0.0, "cancelled")
+        async with self._semaphore:
+            started_at = time.monotonic()
+            try:
+                success, error = bool(await operation(pod)), ""
+            except Exception as e:
+                success, error = False, str(e)
+            return BatchResult(pod, success, time.monotonic() - started_at, error)
+
+    def shutdown(self):
+        if self._loop.is_closed():
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        except RuntimeError:
+            pass
@@ -0,0 +1,100 @@
+import os
+import selectors
+import subprocess
+import threading
+from typing import Callable, Optional
+
+ExitCallback = Callable[[subprocess.Popen], None]
+
+
+class ExitWatcher:
+    """Reports the exit of tunnel processes as it happens, without polling.
+
+    On Linux every process gets a pidfd, and one selector thread waits on all
+    of them at once. Where pidfds are not available (macOS, Windows, kernels
+    older than 5.3) each process gets a thread blocked in ``wait()`` instead.
+    """
+
+    _shared: Optional["ExitWatcher"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._use_pidfd = hasattr(os, "pidfd_open")
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._wake_r: Optional[int] = None
+        self._wake_w: Optional[int] = None
+
+    @staticmethod
+    def shared() -> "ExitWatcher":
+        with ExitWatcher._shared_lock:
+            if ExitWatcher._shared is None:
+                ExitWatcher._shared = ExitWatcher()
+            return ExitWatcher._shared
+
+    def watch(self, process: subprocess.Popen, on_exit: ExitCallback):
+        """Calls ``on_exit(process)`` from a watcher thread once ``process`` exits."""
+        if self._use_pidfd:
+            try:
+                pidfd = os.pidfd_open(process.pid)
+            except ProcessLookupError:
+                # Already exited and reaped
+                ExitWatcher._notify(process, on_exit)
+                return
+            except OSError:
+                # ENOSYS: the kernel has no pidfd support, use threads from now on
+                self._use_pidfd = False
+            else:
+                with self._lock:
+                    self._ensure_thread()
+                    self._selector.register(pidfd, selectors.EVENT_READ, (process, on_exit))
+                os.write(self._wake_w, b"\0")
+                return
+        threading.Thread(target=self._wait_blocking, args=(process, on_exit),
+                         name="tunnel-exit-waiter", daemon=True).start()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._thread = threading.Thread(target=self._run, name="tunnel-exit-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            for key, _events in self._selector.select():
+                if key.data is None:
+                    try:
+                        os.read(self._wake_r, 4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+                with self._lock:
+                    self._selector.unregister(key.fd)
+                os.close(key.fd)
+                process, on_exit = key.data
+                ExitWatcher._notify(process, on_exit)
+
+    @staticmethod
+    def _wait_blocking(process: subprocess.Popen, on_exit: ExitCallback):
+        try:
+            process.wait()
+        except Exception:
+            pass
+        ExitWatcher._notify(process, on_exit)
+
+    @staticmethod
+    def _notify(process: subprocess.Popen, on_exit: ExitCallback):
+        # Reap the process so that poll() and returncode are up to date
+        try:
+            process.poll()
+        except Exception:
+            pass
+        try:
+            on_exit(process)
+        except Exception as e:
+            print(f"❌ Error in tunnel exit callback: {e}")
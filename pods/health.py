@@ -0,0 +1,108 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from pods.pod_ui import PodUI
+
+
+@dataclass
+class HealthState:
+    healthy: Optional[bool] = None
+    # Round trip to the service; None unless something came back through the
+    # tunnel, since connecting only reaches kubectl's local listener
+    latency: Optional[float] = None
+    error: str = ""
+    checked_at: Optional[float] = None
+
+    def summary(self) -> str:
+        """Probe round-trip time, or why the probe failed, for the service lists."""
+        if self.healthy is None:
+            return ""
+        if self.healthy:
+            return f"{self.latency * 1000:.0f} ms" if self.latency is not None else "reachable"
+        return f"✖ {self.error}"
+
+
+class HealthProber:
+    """Checks that running tunnels still reach their service.
+
+    A kubectl port-forward whose pod is gone keeps running and accepts
+    connections, only to close each of them. Every round connects through the
+    local port of each tunnel and, for services with a ``health_path``,
+    sends an HTTP GET there; otherwise the tunnel must not hang up on the
+    connection within BANNER_WAIT. Latency is only reported when the service
+    answered: the HTTP status line, or the first bytes of a server that speaks
+    first. All tunnels are probed concurrently and share one ``timeout`` per
+    round.
+    """
+
+    CONCURRENCY = 32
+    BANNER_WAIT = 0.5
+
+    def __init__(self, interval: float = 30.0, timeout: float = 3.0):
+        self.interval = float(interval)
+        self.timeout = float(timeout)
+
+    @staticmethod
+    def from_settings(settings) -> Optional["HealthProber"]:
+        if float(settings.health_probe_interval) <= 0:
+            return None
+        return HealthProber(settings.health_probe_interval, settings.health_probe_timeout)
+
+    async def probe_all(self, pods: List[PodUI]) -> Dict[PodUI, HealthState]:
+        semaphore = asyncio.Semaphore(HealthProber.CONCURRENCY)
+
+        async def probe_one(pod: PodUI) -> HealthState:
+            async with semaphore:
+                return await HealthProber.probe(pod)
+
+        tasks = {pod: asyncio.ensure_future(probe_one(pod)) for pod in pods}
+        if tasks:
+            await asyncio.wait(list(tasks.values()), timeout=self.timeout)
+        results = {}
+        for pod, task in tasks.items():
+            if task.done():
+                results[pod] = task.result()
+            else:
+                task.cancel()
+                results[pod] = HealthState(False, None, f"no answer within {self.timeout:g}s", time.time())
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        return results
+
+    @staticmethod
+    async def probe(pod: PodUI) -> HealthState:
+        started = time.monotonic()
+        writer = None
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", pod.get_port())
+            path = pod.get_health_path()
+            if path:
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nUser-Agent: KubeWire\r\n"
+                             f"Connection: close\r\n\r\n".encode("latin-1"))
+                status_line = await reader.readline()
+                if not status_line:
+                    return HealthState(False, None, "connection closed by the tunnel", time.time())
+                latency = time.monotonic() - started
+                parts = status_line.split()
+                if len(parts) < 2 or not parts[1].isdigit():
+                    return HealthState(False, latency, "not an HTTP response", time.time())
+                status = int(parts[1])
+                if status >= 500:
+                    return HealthState(False, latency, f"HTTP {status}", time.time())
+                return HealthState(True, latency, "", time.time())
+
+            try:
+                # Servers that speak first answer now; others wait for us,
+                # and a dead tunnel hangs up
+                if not await asyncio.wait_for(reader.read(1), HealthProber.BANNER_WAIT):
+                    return HealthState(False, None, "connection closed by the tunnel", time.time())
+            except asyncio.TimeoutError:
+                # Still open, but nothing came back to time
+                return HealthState(True, None, "", time.time())
+            return HealthState(True, time.monotonic() - started, "", time.time())
+        except (OSError, asyncio.IncompleteReadError) as e:
+            return HealthState(False, None, str(e) or type(e).__name__, time.time())
+        finally:
+            if writer is not None:
+                writer.close()
@@ -0,0 +1,175 @@
+import os
+import selectors
+import subprocess
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, List, Optional, Tuple
+
+LineCallback = Callable[[str, str], None]
+
+
+class TunnelOutput:
+    """Bounded record of what one kubectl process wrote to stdout and stderr.
+
+    Lines are kept in a ring buffer of ``max_lines`` entries, so a tunnel that
+    logs "Handling connection" for hours costs a fixed amount of memory.
+    """
+
+    def __init__(self, max_lines: int, on_line: Optional[LineCallback] = None):
+        self.lines: Deque[Tuple[float, str, str]] = deque(maxlen=max_lines)
+        self.on_line = on_line
+        self.line_count = 0
+        self.connection_count = 0
+        self.closed = threading.Event()
+        self._open_streams = 2
+        self._lock = threading.Lock()
+
+    def append(self, stream: str, line: str):
+        with self._lock:
+            self.lines.append((time.time(), stream, line))
+            self.line_count += 1
+            if line.startswith("Handling connection"):
+                self.connection_count += 1
+        if self.on_line:
+            try:
+                self.on_line(stream, line)
+            except Exception as e:
+                print(f"❌ Error in tunnel output callback: {e}")
+
+    def stream_closed(self):
+        with self._lock:
+            self._open_streams -= 1
+            if self._open_streams == 0:
+                self.closed.set()
+
+    def tail(self, count: Optional[int] = None) -> List[str]:
+        with self._lock:
+            lines = list(self.lines)
+        if count is not None:
+            lines = lines[-count:]
+        return [f"{datetime.fromtimestamp(ts).strftime('%H:%M:%S')} [{stream}] {line}" for ts, stream, line in lines]
+
+    def stderr_text(self) -> str:
+        with self._lock:
+            return "\n".join(line for _ts, stream, line in self.lines if stream == "stderr")
+
+
+class OutputPump:
+    """Drains the stdout/stderr pipes of every tunnel from one selector thread.
+
+    Pipes are read as soon as data arrives, so kubectl never blocks on a full
+    pipe. Where pipes cannot be selected on (Windows), each pipe gets its own
+    reader thread instead.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+    MAX_LINES = 200
+
+    _shared: Optional["OutputPump"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._use_selector = os.name != "nt"
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._pending: List[Tuple[object, str, TunnelOutput]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._wake_r: Optional[int] = None
+        self._wake_w: Optional[int] = None
+
+    @staticmethod
+    def shared() -> "OutputPump":
+        with OutputPump._shared_lock:
+            if OutputPump._shared is None:
+                OutputPump._shared = OutputPump()
+            return OutputPump._shared
+
+    def register(self, process: subprocess.Popen, on_line: Optional[LineCallback] = None) -> TunnelOutput:
+        """Starts draining a process opened with binary ``stdout=PIPE, stderr=PIPE``.
+
+        ``on_line(stream, line)`` is called from the pump thread for every line.
+        """
+        output = TunnelOutput(OutputPump.MAX_LINES, on_line)
+        pipes = [(process.stdout, "stdout"), (process.stderr, "stderr")]
+        if not self._use_selector:
+            for pipe, stream in pipes:
+                threading.Thread(target=self._read_blocking, args=(pipe, stream, output), daemon=True).start()
+            return output
+
+        for pipe, _stream in pipes:
+            os.set_blocking(pipe.fileno(), False)
+        with self._lock:
+            self._pending.extend((pipe, stream, output) for pipe, stream in pipes)
+            self._ensure_thread()
+        os.write(self._wake_w, b"\0")
+        return output
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._thread = threading.Thread(target=self._run, name="tunnel-output-pump", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            for pipe, stream, output in pending:
+                self._selector.register(pipe, selectors.EVENT_READ, [stream, output, b""])
+
+            for key, _events in self._selector.select():
+                if key.data is None:
+                    try:
+                        os.read(self._wake_r, 4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+                self._read_ready(key)
+
+    def _read_ready(self, key: selectors.SelectorKey):
+        stream, output, partial = key.data
+        try:
+            data = os.read(key.fd, OutputPump.CHUNK_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+
+        if not data:
+            if partial:
+                output.append(stream, partial.decode("utf-8", errors="replace").rstrip("\r"))
+            self._selector.unregister(key.fileobj)
+            try:
+                key.fileobj.close()
+            except OSError:
+                pass
+            output.stream_closed()
+            return
+
+        *lines, partial = (partial + data).split(b"\n")
+        if len(partial) > OutputPump.CHUNK_SIZE:
+            lines.append(partial)
+            partial = b""
+        key.data[2] = partial
+        for line in lines:
+            output.append(stream, line.decode("utf-8", errors="replace").rstrip("\r"))
+
+    @staticmethod
+    def _read_blocking(pipe, stream: str, output: TunnelOutput):
+        try:
+            for line in iter(pipe.readline, b""):
+                output.append(stream, line.decode("utf-8", errors="replace").rstrip("\r\n"))
+        except (OSError, ValueError):
+            pass
+        finally:
+            try:
+                pipe.close()
+            except OSError:
+                pass
+            output.stream_closed()
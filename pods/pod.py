@@ -1,9 +1,22 @@
+from typing import Iterable, List, Optional, Tuple
+
+
 class Pod:
-    def __init__(self, context: str, namespace: str, service: str, port: int):
+    def __init__(self, context: str, namespace: str, service: str, port: int, auto_reconnect: bool = False,
+                 remote_port: int = 80, extra_ports: Optional[Iterable[Tuple[int, int]]] = None,
+                 tunnel_backend: Optional[str] = None, health_path: Optional[str] = None):
         self.context = context
         self.namespace = namespace
         self.service = service
         self.port = port
+        self.auto_reconnect = auto_reconnect
+        self.remote_port = remote_port
+        # Further (local, remote) pairs forwarded by the same kubectl process
+        self.extra_ports: List[Tuple[int, int]] = [(int(local), int(remote)) for local, remote in extra_ports or []]
+        # "kubectl" or "api"; None follows the tunnel_backend setting
+        self.tunnel_backend = tunnel_backend
+        # HTTP path probed by the health checks; None probes the port only
+        self.health_path = health_path
 
     def get_service(self) -> str:
         return self.service
@@ -16,3 +29,21 @@ class Pod:
 
     def get_port(self) -> int:
         return self.port
+
+    def get_auto_reconnect(self) -> bool:
+        return self.auto_reconnect
+
+    def get_remote_port(self) -> int:
+        return self.remote_port
+
+    def get_extra_ports(self) -> List[Tuple[int, int]]:
+        return self.extra_ports
+
+    def get_tunnel_backend(self) -> Optional[str]:
+        return self.tunnel_backend
+
+    def get_health_path(self) -> Optional[str]:
+        return self.health_path
+
+    def get_port_pairs(self) -> List[Tuple[int, int]]:
+        return [(self.port, self.remote_port)] + self.extra_ports
@@ -1,81 +1,248 @@
+import asyncio
 import threading
 import time
-from typing import Set
+from concurrent.futures import Future
+from typing import Dict, Optional, Set
+
+from pods.batch import TunnelExecutor
+from pods.health import HealthProber, HealthState
+from pods.pod_ui import PodUI
+from pods.reconnect import ReconnectPolicy, ReconnectState
+from pods.tunnel_registry import TunnelRegistry
 
 
 class PodMonitor:
-    def __init__(self, tui_instance):
+    """Detects dropped tunnels from process exit events (see ExitWatcher).
+
+    Nothing is polled: PodUI reports a kubectl process that exits on its own,
+    and the UI is asked to refresh straight away. One monitor covers every
+    tunnel in the UI's ``registry``, whichever context is on screen.
+
+    Services with ``auto_reconnect`` are restarted following ``policy``; the
+    restarts run on ``executor`` (a private one is created when needed).
+
+    With a ``prober``, running tunnels are also probed every
+    ``prober.interval`` seconds from a background thread, since a live
+    kubectl does not mean a reachable pod; tunnels failing their probe are
+    reported as degraded.
+    """
+
+    def __init__(self, tui_instance, policy: Optional[ReconnectPolicy] = None,
+                 executor: Optional[TunnelExecutor] = None, prober: Optional[HealthProber] = None):
         self.tui = tui_instance
         self.monitoring = False
-        self.monitor_thread = None
-        self.check_interval = 5
         self.recently_failed_pods: Set[str] = set()
+        # Times each tunnel dropped on its own, for the metrics endpoint
+        self.drops: Dict[str, int] = {}
         self.lock = threading.Lock()
         self.user_stopped_pods: Set[str] = set()
+        self.policy = policy or ReconnectPolicy()
+        self.executor = executor
+        self.reconnect_states: Dict[str, ReconnectState] = {}
+        # One token per scheduled attempt; an attempt whose token was
+        # withdrawn (user took over, monitoring stopped) does not start
+        self._pending_reconnects: Dict[str, object] = {}
+        self.prober = prober
+        self.health: Dict[str, HealthState] = {}
+        self._probe_stop = threading.Event()
 
     def start_monitoring(self):
         if self.monitoring:
             return
         self.monitoring = True
-        self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-        self.monitor_thread.start()
+        PodUI.add_exit_listener(self._on_tunnel_exit)
+        if self.prober is not None:
+            self._probe_stop = threading.Event()
+            threading.Thread(target=self._probe_loop, args=(self._probe_stop,), name="tunnel-health",
+                             daemon=True).start()
+        # Catch anything that exited while nobody was listening
+        try:
+            self._check_pods_status()
+        except Exception as e:
+            print(f"❌ Error in pod monitor: {e}")
 
     def stop_monitoring(self):
         self.monitoring = False
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=1)
-
-    def _monitor_loop(self):
-        while self.monitoring:
-            try:
-                self._check_pods_status()
-                time.sleep(self.check_interval)
-            except Exception as e:
-                print(f"❌ Error in pod monitor: {e}")
-                time.sleep(self.check_interval)
+        PodUI.remove_exit_listener(self._on_tunnel_exit)
+        self._probe_stop.set()
+        with self.lock:
+            for pod_id in self._pending_reconnects:
+                self.reconnect_states[pod_id].next_attempt_at = None
+            self._pending_reconnects = {}
 
-    def _check_pods_status(self):
-        if not self.tui.current_pods:
+    def _on_tunnel_exit(self, pod: PodUI):
+        if not self.monitoring or not self.tui.registry.owns(pod):
+            return
+        pod_id = TunnelRegistry.pod_id(pod)
+        with self.lock:
+            status_changed = self._update_pod(pod)
+            failed = pod_id in self.recently_failed_pods
+        if not status_changed:
             return
+        if failed and pod.get_auto_reconnect() and not pod.remote:
+            self._schedule_reconnect(pod)
+        if pod.get_context() == self.tui.current_context:
+            self.tui.request_refresh()
+        elif failed:
+            # Not on screen: report it now rather than when its context is opened
+            self.tui.trigger_refresh_with_failures([pod_id])
 
+    def _check_pods_status(self):
         status_changed = False
-        failed_pods = []
-
+        dropped = []
         with self.lock:
-            for pod in self.tui.current_pods:
-                pod_id = f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
-                current_running = pod.is_running()
-                was_running = getattr(pod, '_was_running', False)
-
-                if pod_id not in self.user_stopped_pods:
-                    if was_running and not current_running:
-                        if pod_id not in self.recently_failed_pods:
-                            self.recently_failed_pods.add(pod_id)
-                            failed_pods.append(pod)
-                            status_changed = True
-
-                if was_running != current_running:
+            for pod in self.tui.registry.all_pods():
+                if self._update_pod(pod):
                     status_changed = True
+                    if TunnelRegistry.pod_id(pod) in self.recently_failed_pods:
+                        dropped.append(pod)
 
-                pod._was_running = current_running
+        for pod in dropped:
+            if pod.get_auto_reconnect() and not pod.remote:
+                self._schedule_reconnect(pod)
+        if status_changed and self.tui.current_context:
+            self.tui.request_refresh()
 
-                if current_running and pod_id in self.recently_failed_pods:
-                    self.recently_failed_pods.remove(pod_id)
-                    self.user_stopped_pods.discard(pod_id)
-                    status_changed = True
+    def reconnect_state(self, pod_id: str) -> Optional[ReconnectState]:
+        return self.reconnect_states.get(pod_id)
 
-        if status_changed and self.tui.current_context:
+    def health_state(self, pod_id: str) -> Optional[HealthState]:
+        return self.health.get(pod_id)
+
+    def is_degraded(self, pod_id: str) -> bool:
+        state = self.health.get(pod_id)
+        return state is not None and state.healthy is False
+
+    def _probe_loop(self, stop: threading.Event):
+        while not stop.wait(self.prober.interval):
+            try:
+                self._probe_once()
+            except Exception as e:
+                print(f"❌ Error in health probe: {e}")
+
+    def _probe_once(self):
+        # Idle lazy tunnels would be woken up by a probe; starting ones are
+        # not ready to answer yet
+        pods = [pod for pod in self.tui.registry.running()
+                if not pod.is_idle() and not getattr(pod, "_is_starting", False)]
+        results = asyncio.run(self.prober.probe_all(pods)) if pods else {}
+        transitions = []
+        with self.lock:
+            probed = set()
+            for pod, state in results.items():
+                pod_id = TunnelRegistry.pod_id(pod)
+                if not pod.is_running():
+                    continue
+                probed.add(pod_id)
+                previous = self.health.get(pod_id)
+                if state.healthy is False and (previous is None or previous.healthy is not False):
+                    transitions.append(f"🩺 {pod.get_service()} does not answer through its tunnel: {state.error}")
+                elif state.healthy and previous is not None and previous.healthy is False:
+                    transitions.append(f"🩺 {pod.get_service()} answers again")
+                self.health[pod_id] = state
+            changed = bool(probed) or any(pod_id not in probed for pod_id in self.health)
+            self.health = {pod_id: state for pod_id, state in self.health.items() if pod_id in probed}
+        for message in transitions:
+            PodUI._log_console(message)
+        if changed and self.monitoring:
             self.tui.request_refresh()
 
+    def _schedule_reconnect(self, pod: PodUI):
+        pod_id = TunnelRegistry.pod_id(pod)
+        now = time.time()
+        with self.lock:
+            if not self.monitoring or pod_id in self.user_stopped_pods or pod_id in self._pending_reconnects:
+                return
+            state = self.reconnect_states.setdefault(pod_id, ReconnectState())
+            delay = self.policy.next_delay(state, now)
+            if delay is None:
+                # Circuit open: one trial attempt once the cooldown is over
+                delay = max(0.0, state.circuit_open_until - now)
+                state.half_open = True
+                message = (f"⛔ {pod.get_service()} keeps failing, pausing reconnects for {delay:.0f}s")
+            else:
+                message = (f"🔁 Reconnecting {pod.get_service()} in {delay:.1f}s "
+                           f"(attempt {state.attempts}/{self.policy.max_attempts})")
+            state.next_attempt_at = now + delay
+            if self.executor is None:
+                self.executor = TunnelExecutor()
+            token = object()
+            self._pending_reconnects[pod_id] = token
+            future = self.executor.submit_start(
+                pod, delay, should_run=lambda: self._pending_reconnects.get(pod_id) is token)
+        PodUI._log_console(message)
+        future.add_done_callback(lambda f: self._on_reconnect_result(pod, token, f))
+
+    def _on_reconnect_result(self, pod: PodUI, token: object, future: Future):
+        pod_id = TunnelRegistry.pod_id(pod)
+        result = future.result()
+        with self.lock:
+            superseded = self._pending_reconnects.get(pod_id) is not token
+            if not superseded:
+                del self._pending_reconnects[pod_id]
+                state = self.reconnect_states[pod_id]
+                state.next_attempt_at = None
+            if not superseded and result.success:
+                ReconnectPolicy.record_success(state, time.time())
+                self.recently_failed_pods.discard(pod_id)
+                pod._was_running = True
+        if superseded:
+            # The user took over while the attempt was running
+            if result.success and pod_id in self.user_stopped_pods:
+                pod.stop()
+            return
+        if result.success:
+            PodUI._log_console(f"✅ Reconnected {pod.get_service()} ({state.reconnects} reconnect(s) so far)")
+        else:
+            self._schedule_reconnect(pod)
+        self.tui.request_refresh()
+
+    def _update_pod(self, pod: PodUI) -> bool:
+        pod_id = TunnelRegistry.pod_id(pod)
+        current_running = pod.is_running()
+        was_running = getattr(pod, '_was_running', False)
+        status_changed = False
+
+        if pod_id not in self.user_stopped_pods and was_running and not current_running:
+            if pod_id not in self.recently_failed_pods:
+                self.recently_failed_pods.add(pod_id)
+                self.drops[pod_id] = self.drops.get(pod_id, 0) + 1
+                status_changed = True
+            # _was_running stays set so the UIs show the tunnel as FAILED
+            # until the user starts or stops it again
+            return status_changed
+
+        if was_running != current_running:
+            status_changed = True
+
+        pod._was_running = current_running
+
+        if current_running and pod_id in self.recently_failed_pods:
+            self.recently_failed_pods.remove(pod_id)
+            self.user_stopped_pods.discard(pod_id)
+            status_changed = True
+
+        return status_changed
+
     def mark_user_stopped(self, pod_id: str):
         with self.lock:
             self.user_stopped_pods.add(pod_id)
             self.recently_failed_pods.discard(pod_id)
+            self.health.pop(pod_id, None)
+            self._reset_reconnect(pod_id)
 
     def mark_user_started(self, pod_id: str):
         with self.lock:
             self.user_stopped_pods.discard(pod_id)
             self.recently_failed_pods.discard(pod_id)
+            self.health.pop(pod_id, None)
+            self._reset_reconnect(pod_id)
+
+    def _reset_reconnect(self, pod_id: str):
+        self._pending_reconnects.pop(pod_id, None)
+        state = self.reconnect_states.get(pod_id)
+        if state is not None:
+            ReconnectPolicy.reset(state)
 
     def stop(self):
         self.stop_monitoring()
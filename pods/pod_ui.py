@@ -1,14 +1,72 @@
 import asyncio
+import os
+import re
 import socket
 import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
+from k8s.portforward import PortForwarder, TargetLost
+from metrics.runtime_stats import RuntimeStats
+from pods.exit_watcher import ExitWatcher
+from pods.output_pump import OutputPump, TunnelOutput
 from pods.pod import Pod
+from pods.relay import RelayLoop, StreamUpstream, TcpRelay
+from pods.tunnel_metrics import TunnelMetrics
+
+FORWARDING_PATTERN = re.compile(r"Forwarding from (?:127\.0\.0\.1|\[::1\]):(\d+)")
 
 
 class PodUI:
+    # Seconds a tunnel may take to report readiness; set from the
+    # tunnel_ready_timeout setting by the UIs
+    ready_timeout = 10.0
+    READY_POLL_INTERVAL = 0.05
+    # kubectl announces readiness on stdout; connecting to the local port is
+    # only tried when that line has not shown up after PROBE_AFTER seconds
+    PROBE_AFTER = 2.0
+    PROBE_INTERVAL = 0.5
+    PROBE_TIMEOUT = 0.2
+    # "kubectl" runs one kubectl port-forward per tunnel, "api" relays in
+    # process over the API server's portforward endpoint; set from the
+    # tunnel_backend setting by the UIs, overridden per service by the pod
+    tunnel_backend = "kubectl"
+    BACKENDS = ("kubectl", "api")
+    # With lazy set, kubectl tunnels only hold their local ports and start
+    # kubectl when a client connects, stopping it again after idle_timeout
+    # seconds without connections (0 keeps it); set from the lazy_tunnels
+    # and lazy_idle_timeout settings by the UIs
+    lazy = False
+    idle_timeout = 300.0
+    # With instrumented set, kubectl tunnels also run behind a relay, which
+    # records traffic in each tunnel's metrics (api tunnels have one anyway);
+    # set from the tunnel_metrics setting by the UIs
+    instrumented = False
+    # Set on tunnels run by another process (see core.daemon.RemotePodUI),
+    # which also takes care of reconnecting them
+    remote = False
+    # Called with the PodUI whenever a running tunnel's kubectl exits (or its
+    # relay fails) on its own, not through stop(); see add_exit_listener
+    _exit_listeners: List[Callable[["PodUI"], None]] = []
+
     def __init__(self, pod: Pod):
         self.pod = pod
         self.process: subprocess.Popen = None
+        # Set instead of process while the tunnel runs on the api backend
+        self.relay: Optional[TcpRelay] = None
+        # kubectl behind a lazy or instrumented relay, and the internal port
+        # per remote port
+        self._backing: Optional[subprocess.Popen] = None
+        self._backing_ports: Dict[int, int] = {}
+        self._backing_lock: Optional[asyncio.Lock] = None
+        self._ready = threading.Event()
+        self._forwarded: Set[int] = set()
+        self._expected_ports: Set[int] = set()
+        # Output of the current (or last) kubectl process or relay, for diagnostics
+        self.output: Optional[TunnelOutput] = None
+        # Traffic of every run of this tunnel while instrumented
+        self.metrics: Optional[TunnelMetrics] = None
 
     def get_service(self) -> str:
         return self.pod.get_service()
@@ -22,7 +80,39 @@ class PodUI:
     def get_port(self) -> int:
         return self.pod.get_port()
 
+    def get_auto_reconnect(self) -> bool:
+        return self.pod.get_auto_reconnect()
+
+    def get_remote_port(self) -> int:
+        return self.pod.get_remote_port()
+
+    def get_extra_ports(self) -> List[Tuple[int, int]]:
+        return self.pod.get_extra_ports()
+
+    def get_port_pairs(self) -> List[Tuple[int, int]]:
+        return self.pod.get_port_pairs()
+
+    def get_health_path(self) -> Optional[str]:
+        return self.pod.get_health_path()
+
+    def get_tunnel_backend(self) -> str:
+        backend = self.pod.get_tunnel_backend() or PodUI.tunnel_backend
+        return backend if backend in PodUI.BACKENDS else "kubectl"
+
+    def get_local_ports(self) -> List[int]:
+        return [local for local, _remote in self.get_port_pairs()]
+
+    def describe_ports(self) -> str:
+        """Local port, followed by any extra pairs as ``+local→remote``."""
+        extras = "".join(f" +{local}→{remote}" for local, remote in self.get_extra_ports())
+        return f"{self.get_port()}{extras}"
+
     def is_running(self) -> bool:
+        if self.relay is not None:
+            if self.relay.running:
+                return True
+            self.relay = None
+            return False
         if self.process is None:
             return False
         try:
@@ -38,6 +128,10 @@ class PodUI:
 
     def _is_port_available(self, port: int) -> bool:
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            if os.name != "nt":
+                # Connections lingering in TIME_WAIT do not stop kubectl or the
+                # relay from listening, so they must not count as "in use"
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             try:
                 s.bind(("127.0.0.1", port))
                 return True
@@ -50,82 +144,307 @@ class PodUI:
         timestamp = datetime.now().strftime("%H:%M:%S")
         print(f"[{timestamp}] {message}")
 
+    @staticmethod
+    def add_exit_listener(listener: Callable[["PodUI"], None]):
+        if listener not in PodUI._exit_listeners:
+            PodUI._exit_listeners.append(listener)
+
+    @staticmethod
+    def remove_exit_listener(listener: Callable[["PodUI"], None]):
+        if listener in PodUI._exit_listeners:
+            PodUI._exit_listeners.remove(listener)
+
+    def _on_process_exit(self, handle):
+        # stop() and failed starts detach the process (or relay) first, so
+        # only unexpected exits get this far
+        if handle is not self.process and handle is not self.relay:
+            return
+        self._notify_exit()
+
+    def _notify_exit(self):
+        for listener in list(PodUI._exit_listeners):
+            try:
+                listener(self)
+            except Exception as e:
+                print(f"❌ Error in tunnel exit listener: {e}")
+
+    def _on_output_line(self, stream: str, line: str):
+        if stream != "stdout" or self._ready.is_set():
+            return
+        match = FORWARDING_PATTERN.search(line)
+        if match:
+            # kubectl reports every pair; ready once all of them listen
+            self._forwarded.add(int(match.group(1)))
+            if self._forwarded.issuperset(self._expected_ports):
+                self._ready.set()
+
+    async def _probe_port(self) -> bool:
+        # Runs on the loop every other tunnel waits on, so it must not block
+        for port in self._expected_ports:
+            try:
+                _reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port),
+                                                         PodUI.PROBE_TIMEOUT)
+            except (OSError, asyncio.TimeoutError):
+                return False
+            writer.close()
+        return True
+
+    async def _wait_until_ready(self, process: subprocess.Popen) -> Optional[bool]:
+        """Waits for kubectl's "Forwarding from" line, falling back to connecting
+        to the local port. Returns None when the deadline passes first."""
+        now = time.monotonic()
+        deadline = now + float(PodUI.ready_timeout)
+        next_probe = now + PodUI.PROBE_AFTER
+        while True:
+            if self._ready.is_set():
+                return True
+            if process.poll() is not None:
+                return False
+            now = time.monotonic()
+            if now >= deadline:
+                return None
+            if now >= next_probe:
+                if await self._probe_port():
+                    return True
+                next_probe = now + PodUI.PROBE_INTERVAL
+            await asyncio.sleep(PodUI.READY_POLL_INTERVAL)
+
+    def _report_failure(self, stderr_data: str):
+        stderr_lower = stderr_data.lower()
+        if "unable to listen on port" in stderr_lower:
+            match = re.search(r"unable to listen on port (\d+)", stderr_lower)
+            port = match.group(1) if match else self.get_port()
+            PodUI._log_console(f"❌ Port {port} is already in use for {self.get_service()}")
+        elif "service" in stderr_lower and "not found" in stderr_lower:
+            PodUI._log_console(f"❌ Service '{self.get_service()}' not found in namespace '{self.get_namespace()}'")
+        elif "context" in stderr_lower and "not found" in stderr_lower:
+            PodUI._log_console(f"❌ Kubernetes context not found. Check kubectl configuration.")
+        elif "kubectl" in stderr_lower and "not found" in stderr_lower:
+            PodUI._log_console(f"❌ kubectl command not found. Please install kubectl.")
+
     async def start(self) -> bool:
         if self.is_running():
             return True
+        if self.get_tunnel_backend() == "api":
+            return await self._start_relay()
+        if PodUI.lazy or PodUI.instrumented:
+            return await self._start_fronted()
+
+        for port in self.get_local_ports():
+            if not self._is_port_available(port):
+                PodUI._log_console(f"❌ Port {port} is already in use for {self.get_service()}")
+                return False
+
+        if self.process and not self.is_running():
+            self.process = None
+
+        try:
+            process, self.output = self._launch_kubectl(self.get_port_pairs(), self._on_output_line)
+            self.process = process
+            if await self._await_kubectl(process, self.output):
+                ExitWatcher.shared().watch(process, self._on_process_exit)
+                return True
+            self.process = None
+            return False
+
+        except FileNotFoundError:
+            PodUI._log_console(f"❌ kubectl command not found. Please install kubectl.")
+            return False
+        except Exception as e:
+            PodUI._log_console(f"❌ Unexpected error for {self.get_service()}: {e}")
+            return False
 
+    def _launch_kubectl(self, pairs: List[Tuple[int, int]], on_line) -> Tuple[subprocess.Popen, TunnelOutput]:
         cmd = [
             "kubectl",
             "port-forward",
             f"--context={self.get_context()}",
             f"--namespace={self.get_namespace()}",
             f"service/{self.get_service()}",
-            f"{self.get_port()}:80"
-        ]
+        ] + [f"{local}:{remote}" for local, remote in pairs]
+        self._ready = threading.Event()
+        self._forwarded = set()
+        self._expected_ports = {local for local, _remote in pairs}
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        RuntimeStats.count_kubectl("port-forward")
+        return process, OutputPump.shared().register(process, on_line)
+
+    async def _await_kubectl(self, process: subprocess.Popen, output: TunnelOutput) -> bool:
+        """Waits until kubectl listens on every port; otherwise kills it and
+        reports why."""
+        ready = await self._wait_until_ready(process)
+        if ready:
+            return True
+        if ready is None:
+            PodUI._log_console(f"❌ {self.get_service()} was not ready after {PodUI.ready_timeout}s, giving up")
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        output.closed.wait(timeout=1)
+        self._report_failure(output.stderr_text())
+        return False
+
+    async def _start_fronted(self) -> bool:
+        """kubectl on internal ports behind a relay that holds the local ones:
+        started by the first connection when lazy, right away otherwise."""
+        for port in self.get_local_ports():
+            if not self._is_port_available(port):
+                PodUI._log_console(f"❌ Port {port} is already in use for {self.get_service()}")
+                return False
+
+        self.output = TunnelOutput(OutputPump.MAX_LINES)
+        self._backing_lock = None
+        lazy = PodUI.lazy
+        relay = TcpRelay(self.get_port_pairs(), self._open_backing, self.output,
+                         fatal_errors=(TargetLost,), on_failed=lambda: self._on_process_exit(relay),
+                         idle_timeout=float(PodUI.idle_timeout) if lazy else 0,
+                         on_idle=self._stop_backing if lazy else None, metrics=self._relay_metrics())
+        try:
+            await asyncio.wrap_future(RelayLoop.shared().submit(relay.start()))
+        except OSError as e:
+            PodUI._log_console(f"❌ Cannot listen for {self.get_service()}: {e}")
+            return False
+        self.relay = relay
+        if not lazy:
+            try:
+                await asyncio.wrap_future(RelayLoop.shared().submit(self._ensure_backing()))
+            except TargetLost:
+                self.relay = None
+                await asyncio.wrap_future(RelayLoop.shared().submit(relay.stop()))
+                return False
+        return True
+
+    def _relay_metrics(self) -> Optional[TunnelMetrics]:
+        if not PodUI.instrumented:
+            return None
+        if self.metrics is None:
+            self.metrics = TunnelMetrics()
+        return self.metrics
 
-        if not self._is_port_available(self.get_port()):
-            PodUI._log_console(f"❌ Port {self.get_port()} is already in use for {self.get_service()}")
+    def is_idle(self) -> bool:
+        """A lazy tunnel that listens but has no kubectl behind it right now."""
+        if self.relay is None or self.relay.on_idle is None:
             return False
+        return self._backing is None or self._backing.poll() is not None
 
-        if self.process and not self.is_running():
-            self.process = None
+    def has_kubectl(self) -> bool:
+        """Whether a kubectl process, plain or behind a relay, is alive for this tunnel."""
+        process = self.process or self._backing
+        return process is not None and process.returncode is None
+
+    @staticmethod
+    def _free_port() -> int:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(("127.0.0.1", 0))
+            return s.getsockname()[1]
 
+    def _on_backing_line(self, stream: str, line: str):
+        self._on_output_line(stream, line)
+        # The relay already records one "Handling connection" per client
+        if self.output is not None and not line.startswith("Handling connection"):
+            self.output.append(stream, line)
+
+    async def _open_backing(self, remote_port: int) -> StreamUpstream:
+        """Upstream of a lazy or instrumented tunnel: a connection to the
+        kubectl behind it, which the first connection starts if needed."""
+        await self._ensure_backing()
+        return await StreamUpstream.connect("127.0.0.1", self._backing_ports[remote_port])
+
+    async def _ensure_backing(self):
+        if self._backing_lock is None:
+            self._backing_lock = asyncio.Lock()
+        async with self._backing_lock:
+            if self._backing is None or self._backing.poll() is not None:
+                self._backing = None
+                pairs = [(PodUI._free_port(), remote) for _local, remote in self.get_port_pairs()]
+                try:
+                    process, output = self._launch_kubectl(pairs, self._on_backing_line)
+                except FileNotFoundError:
+                    raise TargetLost("kubectl command not found")
+                if not await self._await_kubectl(process, output):
+                    raise TargetLost(f"kubectl port-forward for {self.get_service()} did not start")
+                self._backing = process
+                self._backing_ports = {remote: local for local, remote in pairs}
+                if self.relay is not None and self.relay.on_idle is not None:
+                    PodUI._log_console(f"🚀 {self.get_service()} started on first connection")
+                else:
+                    ExitWatcher.shared().watch(process, self._on_backing_exit)
+
+    def _on_backing_exit(self, process: subprocess.Popen):
+        # Only for eager (instrumented) tunnels: their kubectl exiting is the
+        # tunnel dropping, just as without the relay
+        relay = self.relay
+        if process is self._backing and relay is not None:
+            relay.abort("kubectl port-forward exited")
+
+    async def _stop_backing(self):
+        async with self._backing_lock:
+            if self.relay is None or self.relay.active_connections:
+                return
+            process, self._backing = self._backing, None
+        if process is not None and process.poll() is None:
+            await asyncio.get_running_loop().run_in_executor(None, PodUI._terminate, process)
+            PodUI._log_console(f"💤 {self.get_service()} idle for {PodUI.idle_timeout:g}s, kubectl stopped")
+
+    @staticmethod
+    def _terminate(process: subprocess.Popen):
+        process.terminate()
         try:
-            self.process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
-
-            await asyncio.sleep(1.5)
-
-            if self.is_running():
-                return True
-            else:
-                if self.process:
-                    try:
-                        stdout_data, stderr_data = self.process.communicate(timeout=1)
-                    except subprocess.TimeoutExpired:
-                        self.process.kill()
-                        stdout_data, stderr_data = self.process.communicate()
-
-                    if stderr_data:
-                        stderr_lower = stderr_data.lower()
-                        if "unable to listen on port" in stderr_lower:
-                            PodUI._log_console(f"❌ Port {self.get_port()} is already in use for {self.get_service()}")
-                        elif "service" in stderr_lower and "not found" in stderr_lower:
-                            PodUI._log_console(f"❌ Service '{self.get_service()}' not found in namespace '{self.get_namespace()}'")
-                        elif "context" in stderr_lower and "not found" in stderr_lower:
-                            PodUI._log_console(f"❌ Kubernetes context not found. Check kubectl configuration.")
-                        elif "kubectl" in stderr_lower and "not found" in stderr_lower:
-                            PodUI._log_console(f"❌ kubectl command not found. Please install kubectl.")
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
 
-                self.process = None
+    async def _start_relay(self) -> bool:
+        for port in self.get_local_ports():
+            if not self._is_port_available(port):
+                PodUI._log_console(f"❌ Port {port} is already in use for {self.get_service()}")
                 return False
 
-        except FileNotFoundError:
-            PodUI._log_console(f"❌ kubectl command not found. Please install kubectl.")
+        self.output = TunnelOutput(OutputPump.MAX_LINES)
+        try:
+            forwarder = PortForwarder(self.get_context(), self.get_namespace(), self.get_service())
+            # Resolve the pod up front so a broken service fails the start
+            # like kubectl would, instead of on the first connection
+            await asyncio.get_running_loop().run_in_executor(
+                None, forwarder.resolve_all, [remote for _local, remote in self.get_port_pairs()])
+        except TargetLost as e:
+            PodUI._log_console(f"❌ {self.get_service()}: {e}")
             return False
         except Exception as e:
-            PodUI._log_console(f"❌ Unexpected error for {self.get_service()}: {e}")
+            PodUI._log_console(f"❌ Cannot forward {self.get_service()} through the API server: {e}")
+            return False
+
+        relay = TcpRelay(self.get_port_pairs(), forwarder.open_stream, self.output,
+                         fatal_errors=(TargetLost,), on_failed=lambda: self._on_process_exit(relay),
+                         metrics=self._relay_metrics())
+        try:
+            await asyncio.wrap_future(RelayLoop.shared().submit(relay.start()))
+        except OSError as e:
+            PodUI._log_console(f"❌ Cannot listen for {self.get_service()}: {e}")
             return False
+        self.relay = relay
+        return True
 
     def stop(self) -> bool:
         if not self.is_running():
             return True
 
         try:
-            if self.process:
-                self.process.terminate()
-                try:
-                    self.process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    self.process.kill()
-                    self.process.wait()
-                self.process = None
+            relay, self.relay = self.relay, None
+            if relay:
+                RelayLoop.shared().call(relay.stop(), timeout=5)
+                backing, self._backing = self._backing, None
+                if backing is not None and backing.poll() is None:
+                    PodUI._terminate(backing)
+                return True
+            process, self.process = self.process, None
+            if process:
+                PodUI._terminate(process)
                 return True
         except Exception as e:
             print(f"❌ Error stopping {self.get_service()}: {e}")
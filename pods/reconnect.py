@@ -0,0 +1,100 @@
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional
+
+
+@dataclass
+class ReconnectState:
+    attempts: int = 0
+    reconnects: int = 0
+    last_restart: Optional[float] = None
+    up_since: Optional[float] = None
+    next_attempt_at: Optional[float] = None
+    circuit_open_until: Optional[float] = None
+    half_open: bool = False
+
+    @property
+    def pending(self) -> bool:
+        return self.next_attempt_at is not None
+
+    def circuit_open(self, now: Optional[float] = None) -> bool:
+        return self.circuit_open_until is not None and (now or time.time()) < self.circuit_open_until
+
+    def summary(self) -> str:
+        """Reconnect count and time of the last restart, for the service lists."""
+        if not self.reconnects:
+            return ""
+        return f"🔁 {self.reconnects}× (last {datetime.fromtimestamp(self.last_restart).strftime('%H:%M:%S')})"
+
+
+class ReconnectPolicy:
+    """Backoff, jitter and circuit breaker for restarting dropped tunnels.
+
+    Attempt ``n`` waits between half and all of ``base_delay * 2**(n-1)``
+    (capped at ``max_delay``), so tunnels dropped by the same API server blip
+    do not all reconnect in the same instant. After ``max_attempts`` failed
+    attempts in a row the circuit opens: nothing is tried for ``cooldown``
+    seconds, then a single trial attempt decides whether it closes again.
+    A tunnel that stayed up for ``STABLE_AFTER`` seconds starts from zero.
+    """
+
+    STABLE_AFTER = 60.0
+
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 30.0, max_attempts: int = 5,
+                 cooldown: float = 300.0, rng: Callable[[], float] = random.random):
+        self.base_delay = max(0.0, float(base_delay))
+        self.max_delay = max(self.base_delay, float(max_delay))
+        self.max_attempts = max(1, int(max_attempts))
+        self.cooldown = max(0.0, float(cooldown))
+        self.rng = rng
+
+    @staticmethod
+    def from_settings(settings) -> "ReconnectPolicy":
+        return ReconnectPolicy(
+            base_delay=settings.reconnect_base_delay,
+            max_delay=settings.reconnect_max_delay,
+            max_attempts=settings.reconnect_max_attempts,
+            cooldown=settings.reconnect_cooldown,
+        )
+
+    def delay(self, attempt: int) -> float:
+        cap = min(self.max_delay, self.base_delay * (2 ** max(0, attempt - 1)))
+        return cap / 2 + self.rng() * cap / 2
+
+    def next_delay(self, state: ReconnectState, now: float) -> Optional[float]:
+        """Advances ``state`` for one more attempt and returns how long to wait
+        before it, or None when the circuit is open (or was just opened) and
+        the caller should wait for ``state.circuit_open_until`` instead."""
+        if state.up_since is not None and time.monotonic() - state.up_since >= ReconnectPolicy.STABLE_AFTER:
+            state.attempts = 0
+        state.up_since = None
+        if state.circuit_open(now):
+            return None
+        if state.half_open or state.attempts >= self.max_attempts:
+            # The trial attempt failed too, or we ran out of attempts
+            state.circuit_open_until = now + self.cooldown
+            state.half_open = False
+            state.attempts = 0
+            return None
+        state.attempts += 1
+        return self.delay(state.attempts)
+
+    @staticmethod
+    def record_success(state: ReconnectState, now: float):
+        state.reconnects += 1
+        state.last_restart = now
+        state.up_since = time.monotonic()
+        state.next_attempt_at = None
+        state.circuit_open_until = None
+        state.half_open = False
+
+    @staticmethod
+    def reset(state: ReconnectState):
+        """The user took over: forget attempts and close the circuit."""
+        state.attempts = 0
+        state.up_since = time.monotonic()
+        state.next_attempt_at = None
+        state.circuit_open_until = None
+        state.half_open = False
@@ -0,0 +1,252 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+from typing import Awaitable, Callable, List, Optional, Set, Tuple, Type
+
+from pods.output_pump import TunnelOutput
+from pods.tunnel_metrics import TunnelMetrics
+
+# Returns a connected upstream for a remote port: anything with the asyncio
+# stream methods read/write/drain/close/can_write_eof
+OpenUpstream = Callable[[int], Awaitable[object]]
+
+
+class RelayLoop:
+    """Event loop thread shared by every in-process tunnel.
+
+    Relays outlive whichever loop started them (the TUI's, a TunnelExecutor's,
+    a BatchRunner's), so their servers and connections all live here.
+    """
+
+    _shared: Optional["RelayLoop"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(started,), name="tunnel-relay", daemon=True)
+        self._thread.start()
+        started.wait()
+
+    @staticmethod
+    def shared() -> "RelayLoop":
+        with RelayLoop._shared_lock:
+            if RelayLoop._shared is None:
+                RelayLoop._shared = RelayLoop()
+            return RelayLoop._shared
+
+    def _run(self, started: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(started.set)
+        self._loop.run_forever()
+
+    def submit(self, coroutine) -> Future:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def call(self, coroutine, timeout: Optional[float] = None):
+        """Runs ``coroutine`` on the relay loop and waits for it, unless called
+        from the loop itself, where it can only be scheduled."""
+        if threading.current_thread() is self._thread:
+            self._loop.create_task(coroutine)
+            return None
+        return self.submit(coroutine).result(timeout)
+
+
+class StreamUpstream:
+    """A plain TCP connection as a relay upstream."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+
+    @staticmethod
+    async def connect(host: str, port: int) -> "StreamUpstream":
+        return StreamUpstream(*await asyncio.open_connection(host, port))
+
+    async def read(self, size: int = -1):
+        return await self._reader.read(size)
+
+    def write(self, data):
+        self._writer.write(data)
+
+    async def drain(self):
+        await self._writer.drain()
+
+    def can_write_eof(self) -> bool:
+        return self._writer.can_write_eof()
+
+    def write_eof(self):
+        self._writer.write_eof()
+
+    def close(self):
+        self._writer.close()
+
+
+class TcpRelay:
+    """Listens on local ports and pipes every accepted connection to its own
+    upstream, so a tunnel needs no process of its own.
+
+    Chunks of up to BUFFER_SIZE are handed from one side to the other as
+    they were read, without being joined or re-buffered. An upstream error of
+    one of the ``fatal_errors`` types stops the whole relay and calls
+    ``on_failed``, the way kubectl exits when its pod goes away. With an
+    ``idle_timeout``, ``on_idle`` is awaited once no connection has been open
+    for that many seconds. With ``metrics``, traffic and setup latency of
+    every connection are recorded there.
+    """
+
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, pairs: List[Tuple[int, int]], open_upstream: OpenUpstream, output: TunnelOutput,
+                 fatal_errors: Tuple[Type[BaseException], ...] = (), on_failed: Optional[Callable[[], None]] = None,
+                 idle_timeout: float = 0, on_idle: Optional[Callable[[], Awaitable[None]]] = None,
+                 metrics: Optional[TunnelMetrics] = None):
+        self.pairs = list(pairs)
+        self.open_upstream = open_upstream
+        self.output = output
+        self.fatal_errors = fatal_errors
+        self.on_failed = on_failed
+        self.idle_timeout = idle_timeout
+        self.on_idle = on_idle
+        self.metrics = metrics
+        self.active_connections = 0
+        self.running = False
+        self.failure = ""
+        self._servers: List[asyncio.AbstractServer] = []
+        self._connections: Set[asyncio.Task] = set()
+        self._idle_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        try:
+            for local, remote in self.pairs:
+                server = await asyncio.start_server(partial(self._accept, local, remote), "127.0.0.1", local)
+                self._servers.append(server)
+                self.output.append("stdout", f"Forwarding from 127.0.0.1:{local} -> {remote}")
+        except BaseException:
+            self._close_servers()
+            raise
+        self.running = True
+
+    async def stop(self):
+        self.running = False
+        self._close_servers()
+        self._cancel_idle()
+        connections = [task for task in self._connections if task is not asyncio.current_task()]
+        for task in connections:
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+
+    def _close_servers(self):
+        for server in self._servers:
+            server.close()
+        self._servers = []
+
+    def _cancel_idle(self):
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+
+    def _arm_idle(self):
+        if self.running and self.idle_timeout > 0 and self.on_idle is not None:
+            self._idle_handle = asyncio.get_running_loop().call_later(
+                self.idle_timeout, lambda: asyncio.ensure_future(self._report_idle()))
+
+    async def _report_idle(self):
+        self._idle_handle = None
+        if self.running and not self.active_connections:
+            await self.on_idle()
+
+    def abort(self, reason: str):
+        """Fails the relay from any thread, as if its upstream were lost."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._fail, reason)
+
+    def _fail(self, reason: str):
+        if not self.running:
+            return
+        self.running = False
+        self.failure = reason
+        asyncio.ensure_future(self._stop_and_report())
+
+    async def _stop_and_report(self):
+        await self.stop()
+        if self.on_failed:
+            self.on_failed()
+
+    async def _accept(self, local: int, remote: int, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        self.active_connections += 1
+        self._cancel_idle()
+        self.output.append("stdout", f"Handling connection for {local}")
+        metrics = self.metrics
+        if metrics:
+            metrics.connection_opened()
+        upstream = None
+        try:
+            accepted = time.monotonic()
+            upstream = await self.open_upstream(remote)
+            if metrics:
+                metrics.setup_latency.observe(time.monotonic() - accepted)
+            await self._pipe_both(reader, writer, upstream)
+            error = getattr(upstream, 'error', "")
+            if error:
+                self.output.append("stderr", f"error forwarding port {remote}: {error}")
+                if metrics:
+                    metrics.connection_failed()
+        except asyncio.CancelledError:
+            pass
+        except self.fatal_errors as e:
+            self.output.append("stderr", f"error: {e}")
+            if metrics:
+                metrics.connection_failed()
+            self._fail(str(e))
+        except Exception as e:
+            self.output.append("stderr", f"error forwarding port {remote}: {e}")
+            if metrics:
+                metrics.connection_failed()
+        finally:
+            if metrics:
+                metrics.connection_closed()
+            writer.close()
+            if upstream is not None:
+                upstream.close()
+            self._connections.discard(task)
+            self.active_connections -= 1
+            if not self.active_connections:
+                self._arm_idle()
+
+    @staticmethod
+    async def _pipe(source, sink, count: Optional[Callable[[int], None]] = None):
+        while True:
+            data = await source.read(TcpRelay.BUFFER_SIZE)
+            if not data:
+                return
+            sink.write(data)
+            if count:
+                count(len(data))
+            await sink.drain()
+
+    async def _pipe_both(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, upstream):
+        metrics = self.metrics
+        downstream = asyncio.ensure_future(
+            TcpRelay._pipe(upstream, writer, metrics.add_received if metrics else None))
+        to_upstream = asyncio.ensure_future(
+            TcpRelay._pipe(reader, upstream, metrics.add_sent if metrics else None))
+        try:
+            done, _pending = await asyncio.wait([downstream, to_upstream], return_when=asyncio.FIRST_COMPLETED)
+            if downstream not in done and to_upstream.exception() is None and upstream.can_write_eof():
+                # The client is done sending; its answer may still be on the way.
+                # Upstreams that cannot half-close are closed with the client
+                upstream.write_eof()
+                await downstream
+            elif downstream in done:
+                downstream.result()
+        finally:
+            for pipe in (downstream, to_upstream):
+                pipe.cancel()
+            await asyncio.gather(downstream, to_upstream, return_exceptions=True)
@@ -0,0 +1,149 @@
+import bisect
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+# Upper bounds in seconds; a last, unbounded bucket catches the rest
+LATENCY_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_bytes(count: int) -> str:
+    value = float(count)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+class RollingHistogram:
+    """Latency distribution over the last ``window`` seconds in fixed memory.
+
+    Samples are counted in fixed buckets (``bounds``). The window is split
+    into ``slots`` sub-histograms that are recycled as time moves on, so the
+    cost is ``slots × buckets`` counters however much traffic there is.
+    Percentiles interpolate within the bucket they fall into. All-time
+    cumulative counts are kept as well, for exporters.
+    """
+
+    def __init__(self, window: float = 300.0, slots: int = 10, bounds: Tuple[float, ...] = LATENCY_BOUNDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.bounds = tuple(bounds)
+        self.slot_seconds = float(window) / max(1, slots)
+        self.clock = clock
+        buckets = len(self.bounds) + 1
+        self._slots: List[List[int]] = [[0] * buckets for _ in range(max(1, slots))]
+        self._slot_index = [None] * max(1, slots)
+        self.total_counts = [0] * buckets
+        self.total_sum = 0.0
+        self.total_count = 0
+        self._lock = threading.Lock()
+
+    def _current_slot(self) -> List[int]:
+        tick = int(self.clock() // self.slot_seconds)
+        position = tick % len(self._slots)
+        if self._slot_index[position] != tick:
+            # The slot last held a window that has gone by: start it afresh
+            self._slots[position] = [0] * len(self.total_counts)
+            self._slot_index[position] = tick
+        return self._slots[position]
+
+    def observe(self, value: float):
+        bucket = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._current_slot()[bucket] += 1
+            self.total_counts[bucket] += 1
+            self.total_sum += value
+            self.total_count += 1
+
+    def totals(self) -> Tuple[List[int], float, int]:
+        """All-time bucket counts, sum and count, taken together."""
+        with self._lock:
+            return list(self.total_counts), self.total_sum, self.total_count
+
+    def window_counts(self) -> List[int]:
+        with self._lock:
+            oldest = int(self.clock() // self.slot_seconds) - len(self._slots) + 1
+            counts = [0] * len(self.total_counts)
+            for index, slot in zip(self._slot_index, self._slots):
+                if index is not None and index >= oldest:
+                    for bucket, count in enumerate(slot):
+                        counts[bucket] += count
+            return counts
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        counts = self.window_counts()
+        total = sum(counts)
+        if not total:
+            return None
+        rank = quantile * total
+        seen = 0
+        for bucket, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[bucket - 1] if bucket else 0.0
+                if bucket == len(self.bounds):
+                    return lower
+                return lower + (self.bounds[bucket] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+
+class TunnelMetrics:
+    """Traffic counters of one tunnel, fed by its relay.
+
+    ``bytes_sent`` goes from local clients to the service, ``bytes_received``
+    comes back. Setup latency is the time from accepting a client to having
+    its upstream connected.
+    """
+
+    def __init__(self):
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.connections = 0
+        self.active_connections = 0
+        self.errors = 0
+        self.last_connection: Optional[float] = None
+        self.setup_latency = RollingHistogram()
+        self._lock = threading.Lock()
+
+    def connection_opened(self):
+        with self._lock:
+            self.connections += 1
+            self.active_connections += 1
+            self.last_connection = time.time()
+
+    def connection_closed(self):
+        with self._lock:
+            self.active_connections -= 1
+
+    def connection_failed(self):
+        with self._lock:
+            self.errors += 1
+
+    def add_sent(self, count: int):
+        self.bytes_sent += count
+
+    def add_received(self, count: int):
+        self.bytes_received += count
+
+    def connections_summary(self) -> str:
+        return f"{self.connections} ({self.active_connections} open)"
+
+    def traffic_summary(self) -> str:
+        return f"↑{format_bytes(self.bytes_sent)} ↓{format_bytes(self.bytes_received)}"
+
+    def setup_summary(self) -> str:
+        p50 = self.setup_latency.percentile(0.5)
+        if p50 is None:
+            return ""
+        p99 = self.setup_latency.percentile(0.99)
+        return f"{p50 * 1000:.0f} / {p99 * 1000:.0f} ms"
+
+    def summary(self) -> str:
+        """One line for the TUI service list."""
+        parts = [f"{self.connections_summary()} conn", self.traffic_summary()]
+        if self.setup_summary():
+            parts.append(f"setup p50/p99 {self.setup_summary()}")
+        if self.errors:
+            parts.append(f"{self.errors} err")
+        return " · ".join(parts)
@@ -0,0 +1,82 @@
+import threading
+from typing import Dict, List, Optional
+
+from pods.pod_ui import PodUI
+
+
+class TunnelRegistry:
+    """Owns the ``PodUI`` of every service in every context.
+
+    Tunnels belong to the registry, not to the context a UI is showing, so
+    they keep running while another context is browsed. The per-context
+    service lists are projections of it (``pods(context)``), and lookups by
+    pod id are indexed so exit events stay cheap with hundreds of tunnels.
+    """
+
+    def __init__(self, contexts: Optional[Dict[str, List[PodUI]]] = None):
+        self._lock = threading.RLock()
+        self._contexts: Dict[str, List[PodUI]] = {}
+        self._index: Dict[str, PodUI] = {}
+        self.replace(contexts or {})
+
+    @staticmethod
+    def pod_id(pod: PodUI) -> str:
+        return f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
+
+    @property
+    def contexts(self) -> Dict[str, List[PodUI]]:
+        return self._contexts
+
+    def replace(self, contexts: Dict[str, List[PodUI]]):
+        with self._lock:
+            self._contexts = contexts
+            self._reindex()
+
+    def reindex(self):
+        """Rebuilds the index after ``contexts`` was edited in place."""
+        with self._lock:
+            self._reindex()
+
+    def _reindex(self):
+        self._index = {TunnelRegistry.pod_id(pod): pod for pods in self._contexts.values() for pod in pods}
+
+    def pods(self, context: Optional[str]) -> List[PodUI]:
+        return self._contexts.get(context, []) if context else []
+
+    def all_pods(self) -> List[PodUI]:
+        with self._lock:
+            return list(self._index.values())
+
+    def get(self, pod_id: str) -> Optional[PodUI]:
+        return self._index.get(pod_id)
+
+    def owns(self, pod: PodUI) -> bool:
+        return self._index.get(TunnelRegistry.pod_id(pod)) is pod
+
+    def running(self, context: Optional[str] = None) -> List[PodUI]:
+        pods = self.pods(context) if context else self.all_pods()
+        return [pod for pod in pods if pod.is_running()]
+
+    def running_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for pod in self.running():
+            counts[pod.get_context()] = counts.get(pod.get_context(), 0) + 1
+        return counts
+
+    def port_owner(self, pod: PodUI) -> Optional[PodUI]:
+        """Returns the running tunnel of another service that holds one of
+        ``pod``'s local ports. Discovery numbers ports across all contexts, so
+        this only catches ports set by hand to the same value."""
+        ports = set(pod.get_local_ports())
+        for other in self.running():
+            if other is not pod and ports.intersection(other.get_local_ports()):
+                return other
+        return None
+
+    def stop_all(self, context: Optional[str] = None) -> List[PodUI]:
+        stopped = []
+        for pod in self.running(context):
+            pod.stop()
+            pod._was_running = False
+            stopped.append(pod)
+        return stopped
@@ -0,0 +1,145 @@
+"""Discovery through the in-process API client, against bench.stub_apiserver."""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import yaml
+
+from bench.stub_apiserver import StubThread
+from config.config_manager import ConfigManager
+from k8s.discovery import KubernetesDiscovery
+from metrics.runtime_stats import RuntimeStats
+
+EXEC_PLUGIN = """
+import json, sys
+counter = sys.argv[1]
+try:
+    runs = int(open(counter).read())
+except OSError:
+    runs = 0
+open(counter, "w").write(str(runs + 1))
+# The first credential is already revoked on the server
+token = "stale" if runs == 0 else "fresh"
+print(json.dumps({"apiVersion": "client.authentication.k8s.io/v1beta1", "kind": "ExecCredential",
+                  "status": {"token": token}}))
+"""
+
+
+class ApiDiscoveryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.workdir = tempfile.TemporaryDirectory()
+        workdir = Path(cls.workdir.name)
+        cls.stubs = {
+            "plain": StubThread(token="plain-token").start(),
+            "exec": StubThread(token="fresh").start(),
+            "forbidden": StubThread(forbid_cluster_wide=True).start(),
+            "slow": StubThread(delay=3).start(),
+        }
+        cls.exec_counter = workdir / "exec-runs"
+        plugin = workdir / "exec_plugin.py"
+        plugin.write_text(EXEC_PLUGIN, encoding="utf-8")
+        users = {
+            "plain": {"token": "plain-token"},
+            "exec": {"exec": {"apiVersion": "client.authentication.k8s.io/v1beta1", "command": sys.executable,
+                              "args": [str(plugin), str(cls.exec_counter)]}},
+            "forbidden": {"token": "any"},
+            "slow": {"token": "any"},
+        }
+        kubeconfig = workdir / "kubeconfig"
+        kubeconfig.write_text(json.dumps({
+            "apiVersion": "v1", "kind": "Config", "current-context": "plain",
+            "clusters": [{"name": name, "cluster": {"server": f"http://127.0.0.1:{stub.port}"}}
+                         for name, stub in cls.stubs.items()],
+            "users": [{"name": name, "user": user} for name, user in users.items()],
+            "contexts": [{"name": name, "context": {"cluster": name, "user": name}} for name in cls.stubs],
+        }), encoding="utf-8")
+        # A context whose client certificate cannot be read
+        config = json.loads(kubeconfig.read_text(encoding="utf-8"))
+        config["clusters"].append({"name": "badcert", "cluster": {
+            "server": f"https://127.0.0.1:{cls.stubs['plain'].port}", "insecure-skip-tls-verify": True}})
+        config["users"].append({"name": "badcert", "user": {
+            "client-certificate": str(workdir / "nonexistent.crt"), "client-key": str(workdir / "nonexistent.key")}})
+        config["contexts"].append({"name": "badcert", "context": {"cluster": "badcert", "user": "badcert"}})
+        kubeconfig.write_text(json.dumps(config), encoding="utf-8")
+        (workdir / "config.yml").write_text(yaml.safe_dump({"settings": {
+            "discovery_backend": "api", "discovery_call_timeout": 1, "discovery_context_deadline": 2}}),
+            encoding="utf-8")
+
+        cls.environ = {name: os.environ.get(name) for name in ("KUBECONFIG", "KubeWire_CONFIG")}
+        os.environ["KUBECONFIG"] = str(kubeconfig)
+        os.environ["KubeWire_CONFIG"] = str(workdir)
+        ConfigManager._discovery_cache = None
+        cls.page_size = KubernetesDiscovery.API_PAGE_SIZE
+        # Four services per context: several pages per listing
+        KubernetesDiscovery.API_PAGE_SIZE = 1
+
+    @classmethod
+    def tearDownClass(cls):
+        KubernetesDiscovery.API_PAGE_SIZE = cls.page_size
+        for name, value in cls.environ.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        ConfigManager._discovery_cache = None
+        for stub in cls.stubs.values():
+            stub.stop()
+        cls.workdir.cleanup()
+
+    def test_discovery_uses_the_api_backend(self):
+        kubectl_started = dict(RuntimeStats.kubectl_started)
+        contexts, statuses = ConfigManager.discover_config(use_cache=False)
+        statuses = {status.name: status for status in statuses}
+
+        expected = [("team-a", "api"), ("team-a", "web"), ("team-b", "api"), ("team-b", "web")]
+        for context in ("plain", "exec", "forbidden"):
+            self.assertTrue(statuses[context].accessible, statuses[context].error_message)
+            self.assertEqual(sorted((pod.get_namespace(), pod.get_service()) for pod in contexts[context]), expected)
+        self.assertEqual(RuntimeStats.kubectl_started, kubectl_started, "discovery fell back to kubectl")
+
+        # Every page of the listing went over one pooled keep-alive connection
+        plain = self.stubs["plain"].stub
+        self.assertGreaterEqual(plain.requests, 4)
+        self.assertEqual(plain.connections, 1)
+
+        # The revoked exec credential got a 401 and the plugin ran again
+        self.assertEqual(self.stubs["exec"].stub.unauthorized, 1)
+        self.assertEqual(self.exec_counter.read_text(), "2")
+
+        # Cluster-wide listing was refused, namespaces were listed one by one
+        self.assertGreater(self.stubs["forbidden"].stub.requests, 2)
+
+        self.assertFalse(statuses["slow"].accessible)
+        self.assertEqual(statuses["slow"].error_message, "Deadline exceeded")
+        self.assertNotIn("slow", contexts)
+
+    def test_unreadable_client_certificate_only_fails_its_context(self):
+        contexts, statuses = ConfigManager.discover_config(use_cache=False)
+        statuses = {status.name: status for status in statuses}
+
+        self.assertFalse(statuses["badcert"].accessible)
+        self.assertNotIn("badcert", contexts)
+        for context in ("plain", "exec", "forbidden"):
+            self.assertTrue(statuses[context].accessible, statuses[context].error_message)
+            self.assertEqual(len(contexts[context]), 4)
+
+        success, output, _services = KubernetesDiscovery.get_all_services("badcert", backend="api")
+        self.assertFalse(success)
+        self.assertIn("No such file", output)
+
+    def test_forbidden_and_timeout_are_classified(self):
+        success, output, _services = KubernetesDiscovery.get_all_services("forbidden", backend="api")
+        self.assertFalse(success)
+        self.assertTrue(KubernetesDiscovery.is_forbidden(output))
+
+        accessible, error_msg, _namespaces = KubernetesDiscovery.list_namespaces("slow", timeout=0.5, backend="api")
+        self.assertFalse(accessible)
+        self.assertEqual(error_msg, "Deadline exceeded")
+
+
+if __name__ == "__main__":
+    unittest.main()
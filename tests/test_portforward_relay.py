@@ -0,0 +1,118 @@
+"""The api tunnel backend: TcpRelay over portforward WebSockets of bench.stub_apiserver."""
+import asyncio
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from bench.stub_apiserver import StubThread, write_kubeconfig
+from pods import Pod, PodUI
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(condition, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+class PortForwardRelayTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.workdir = tempfile.TemporaryDirectory()
+        cls.stub = StubThread(token="relay-token").start()
+        kubeconfig = Path(cls.workdir.name) / "kubeconfig"
+        write_kubeconfig(str(kubeconfig), cls.stub.port, "relay-token")
+        cls.kubeconfig = os.environ.get("KUBECONFIG")
+        os.environ["KUBECONFIG"] = str(kubeconfig)
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.kubeconfig is None:
+            os.environ.pop("KUBECONFIG", None)
+        else:
+            os.environ["KUBECONFIG"] = cls.kubeconfig
+        cls.stub.stop()
+        cls.workdir.cleanup()
+
+    def setUp(self):
+        self.pod = PodUI(Pod(context="stub", namespace="team-a", service="api", port=free_port(), remote_port=80,
+                             tunnel_backend="api"))
+        self.assertTrue(asyncio.run(self.pod.start()))
+        self.addCleanup(self.pod.stop)
+
+    def connect(self) -> socket.socket:
+        connection = socket.create_connection(("127.0.0.1", self.pod.get_port()), timeout=5)
+        self.addCleanup(connection.close)
+        return connection
+
+    @staticmethod
+    def receive(connection: socket.socket, size: int) -> bytes:
+        received = b""
+        while len(received) < size:
+            data = connection.recv(65536)
+            if not data:
+                break
+            received += data
+        return received
+
+    def test_concurrent_connections_echo_through_their_own_streams(self):
+        portforwards = self.stub.stub.portforwards
+        # Large enough for WebSocket frames with 64-bit lengths
+        payloads = [bytes([n]) * (70000 * (n + 1)) for n in range(4)]
+        results = {}
+
+        def echo(n: int):
+            connection = self.connect()
+            connection.sendall(payloads[n])
+            results[n] = self.receive(connection, len(payloads[n]))
+
+        threads = [threading.Thread(target=echo, args=(n,)) for n in range(len(payloads))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        for n, payload in enumerate(payloads):
+            self.assertEqual(results.get(n), payload)
+        self.assertEqual(self.stub.stub.portforwards - portforwards, len(payloads))
+
+    def test_client_half_close_ends_the_connection(self):
+        connection = self.connect()
+        connection.sendall(b"ping")
+        self.assertEqual(self.receive(connection, 4), b"ping")
+        # A portforward stream cannot half-close, so the relay closes it
+        # together with the client instead of leaving it open
+        connection.shutdown(socket.SHUT_WR)
+        self.assertEqual(connection.recv(1), b"")
+        self.assertTrue(wait_for(lambda: self.pod.relay.active_connections == 0))
+
+    def test_unreachable_target_is_reported_on_the_connection(self):
+        stub = self.stub.stub
+        backend, stub.backend = stub.backend, ("127.0.0.1", free_port())
+        self.addCleanup(setattr, stub, "backend", backend)
+        connection = self.connect()
+        connection.sendall(b"ping")
+        self.assertEqual(self.receive(connection, 4), b"")
+        self.assertTrue(wait_for(lambda: "dial backend" in self.pod.output.stderr_text()))
+        self.assertTrue(self.pod.is_running())
+
+    def test_stop_releases_the_local_port(self):
+        self.assertTrue(self.pod.stop())
+        self.assertFalse(self.pod.is_running())
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", self.pod.get_port()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 import os
+import re
 import subprocess
 import threading
 import tkinter as tk
@@ -6,9 +7,18 @@ from datetime import datetime
 from tkinter import ttk, messagebox
 
 from config.config_manager import ConfigManager
+from k8s.discovery import KubernetesDiscovery
+from k8s.kubeconfig import KubeConfig
+from k8s.service_watcher import ServiceWatchManager
 from logs.log_manager import LogsManager
+from metrics.prometheus import PrometheusExporter
+from pods import PodUI
+from pods.batch import TunnelExecutor
+from pods.health import HealthProber
 from pods.pod_monitor import PodMonitor
+from pods.reconnect import ReconnectPolicy
 from pods.sound_notifier import SoundNotifier
+from pods.tunnel_registry import TunnelRegistry
 
 SOLARIZED = {
     'base03': '#002b36',
@@ -29,8 +39,19 @@ SOLARIZED = {
     'green':  '#859900',
 }
 
+TRAFFIC_PATTERN = re.compile(r"[↑↓]([\d.]+) (B|KB|MB|GB)")
+BYTE_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
 class KubeWireGUI:
-    def __init__(self):
+    COLUMNS = ('Service', 'Port', 'Namespace', 'Status', 'Probe')
+    # Added with the tunnel_metrics setting
+    METRIC_COLUMNS = ('Conns', 'Traffic', 'Setup', 'Errors')
+    # Finished starts/stops arriving within this window share one UI refresh
+    RESULT_FLUSH_MS = 50
+
+    def __init__(self, daemon=None):
+        # The client of the daemon running the tunnels, when main attached one
+        self.daemon = daemon
         self.status_label = None
         self.logs_frame = None
         self.toggle_logs_button = None
@@ -66,12 +87,10 @@ class KubeWireGUI:
         except Exception as e:
             print(f"⚠️ No se pudo cargar el icono: {e}")
 
-        self.contexts = {}
+        self.registry = TunnelRegistry()
         self.context_statuses = []
         self.current_context = None
-        self.current_pods = []
         self.running = True
-        self.pod_monitor = None
         self.sound_notifier = SoundNotifier()
         self.sound_enabled = True
         self.notified_disconnected_pods = set()
@@ -81,6 +100,29 @@ class KubeWireGUI:
         self.original_order = []
         self.window_has_focus = True
         self._service_to_item = {}
+        self.service_watch = None
+        settings = ConfigManager.read_settings()
+        PodUI.ready_timeout = settings.tunnel_ready_timeout
+        PodUI.tunnel_backend = settings.tunnel_backend
+        PodUI.lazy = settings.lazy_tunnels
+        PodUI.idle_timeout = settings.lazy_idle_timeout
+        PodUI.instrumented = settings.tunnel_metrics
+        self.columns = KubeWireGUI.COLUMNS + (KubeWireGUI.METRIC_COLUMNS if settings.tunnel_metrics else ())
+        self.tunnel_executor = TunnelExecutor(settings.bulk_concurrency)
+        self._tunnel_results = []
+        self._tunnel_results_lock = threading.Lock()
+        self._tunnel_flush_scheduled = False
+        self._context_running_counts = {}
+        # Attached to a daemon, probing and metrics are the daemon's job
+        attached = self.daemon is not None
+        self.pod_monitor = PodMonitor(self, ReconnectPolicy.from_settings(settings), self.tunnel_executor,
+                                      None if attached else HealthProber.from_settings(settings))
+        self.metrics_exporter = None if attached else PrometheusExporter.from_settings(settings, self.registry,
+                                                                                       self.pod_monitor)
+        if settings.watch_services:
+            self.service_watch = ServiceWatchManager(self._on_service_event, settings.discovery_backend)
+        if self.metrics_exporter:
+            self.metrics_exporter.start()
 
         self.current_selection = None
 
@@ -99,6 +141,18 @@ class KubeWireGUI:
         self.initialize_app()
 
 
+    @property
+    def contexts(self):
+        return self.registry.contexts
+
+    @contexts.setter
+    def contexts(self, contexts):
+        self.registry.replace(contexts)
+
+    @property
+    def current_pods(self):
+        return self.registry.pods(self.current_context)
+
     def on_root_focus_out(self, event):
         if event.widget == self.root:
             if hasattr(self, '_loading_overlay') and self._loading_overlay:
@@ -292,11 +346,12 @@ class KubeWireGUI:
         controls_frame.grid(row=0, column=2)
 
         ttk.Button(controls_frame, text="🔄", command=self.refresh_contexts, width=3).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(controls_frame, text="🔄 Context", command=self.refresh_current_context).pack(side=tk.LEFT, padx=(0, 5))
 
         self.toggle_logs_button = ttk.Button(controls_frame, text="🔼 Show logs", command=self.toggle_logs_panel)
         self.toggle_logs_button.pack(side=tk.LEFT)
 
-        columns = ('Service', 'Port', 'Namespace', 'Status')
+        columns = self.columns
         self.services_tree = ttk.Treeview(services_frame, columns=columns, show='headings', height=15, style='Treeview')
 
         for col in columns:
@@ -305,7 +360,11 @@ class KubeWireGUI:
         self.services_tree.column('Service', width=240)
         self.services_tree.column('Port', width=100)
         self.services_tree.column('Namespace', width=180)
-        self.services_tree.column('Status', width=160)
+        self.services_tree.column('Status', width=300)
+        self.services_tree.column('Probe', width=140)
+        for col, width in zip(KubeWireGUI.METRIC_COLUMNS, (110, 170, 110, 70)):
+            if col in columns:
+                self.services_tree.column(col, width=width)
 
         services_scrollbar = ttk.Scrollbar(services_frame, orient=tk.VERTICAL, command=self.services_tree.yview)
         self.services_tree.configure(yscrollcommand=services_scrollbar.set)
@@ -325,7 +384,9 @@ class KubeWireGUI:
         ttk.Button(services_buttons_frame, text="⏹️ Stop", command=self.stop_selected_service).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(services_buttons_frame, text="🚀 Start All", command=self.start_all_services).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(services_buttons_frame, text="🛑 Stop All", command=self.stop_all_services).pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(services_buttons_frame, text="📜 Logs", command=self.show_logs).pack(side=tk.LEFT)
+        ttk.Button(services_buttons_frame, text="📜 Logs", command=self.show_logs).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(services_buttons_frame, text="🩺 Tunnel", command=self.show_tunnel_output).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(services_buttons_frame, text="♻️ Auto-reconnect", command=self.toggle_auto_reconnect).pack(side=tk.LEFT)
 
     def on_treeview_double_click(self, event):
         region = self.services_tree.identify("region", event.x, event.y)
@@ -353,13 +414,8 @@ class KubeWireGUI:
             values = self.services_tree.item(item_id, 'values')
             items.append((item_id, values))
 
-        column_index = {'Service': 0, 'Port': 1, 'Namespace': 2, 'Status': 3}[column]
-
-        if column == 'Port':
-            items.sort(key=lambda x: int(x[1][column_index]) if str(x[1][column_index]).isdigit() else 0,
-                       reverse=self.sort_reverse)
-        else:
-            items.sort(key=lambda x: x[1][column_index], reverse=self.sort_reverse)
+        column_index = self.columns.index(column)
+        items.sort(key=lambda x: KubeWireGUI._sort_key(column, x[1][column_index]), reverse=self.sort_reverse)
 
         for index, (item_id, _values) in enumerate(items):
             self.services_tree.move(item_id, '', index)
@@ -367,8 +423,7 @@ class KubeWireGUI:
         self.update_column_headers()
 
     def update_column_headers(self):
-        columns = ['Service', 'Port', 'Namespace', 'Status']
-        for col in columns:
+        for col in self.columns:
             if col == self.sort_column:
                 symbol = " ↓" if not self.sort_reverse else " ↑"
                 self.services_tree.heading(col, text=f"{col}{symbol}")
@@ -392,21 +447,15 @@ class KubeWireGUI:
         return 'break'
 
     def start_service_async_with_enter(self, pod):
-        pod._is_starting = True
-        def restore_focus_callback():
-            self.root.after(10, self._force_focus_restoration)
-            self.root.after(100, self._force_focus_restoration)
-            self.root.after(300, self._force_focus_restoration)
-        threading.Thread(target=self._start_service_with_focus,
-                         args=(pod, restore_focus_callback), daemon=True).start()
+        self._submit_tunnel_operation("start", pod, self._restore_focus_after_enter)
 
     def stop_service_async_with_enter(self, pod):
-        def restore_focus_callback():
-            self.root.after(10, self._force_focus_restoration)
-            self.root.after(100, self._force_focus_restoration)
-            self.root.after(300, self._force_focus_restoration)
-        threading.Thread(target=self._stop_service_with_focus,
-                         args=(pod, restore_focus_callback), daemon=True).start()
+        self._submit_tunnel_operation("stop", pod, self._restore_focus_after_enter)
+
+    def _restore_focus_after_enter(self):
+        self.root.after(10, self._force_focus_restoration)
+        self.root.after(100, self._force_focus_restoration)
+        self.root.after(300, self._force_focus_restoration)
 
     def _force_focus_restoration(self):
         if not self.running or not self.window_has_focus:
@@ -461,187 +510,124 @@ class KubeWireGUI:
         self.services_tree.focus_set()
 
     def start_service_async_with_focus(self, pod):
-        def restore_focus_callback():
-            self.root.after(50, self._ensure_focus_and_selection)
-            self.root.after(150, self._ensure_focus_and_selection)
-        threading.Thread(target=self._start_service_with_focus,
-                         args=(pod, restore_focus_callback), daemon=True).start()
+        self._submit_tunnel_operation("start", pod, self._restore_focus_after_operation)
 
     def stop_service_async_with_focus(self, pod):
-        def restore_focus_callback():
-            self.root.after(50, self._ensure_focus_and_selection)
-            self.root.after(150, self._ensure_focus_and_selection)
-        threading.Thread(target=self._stop_service_with_focus,
-                         args=(pod, restore_focus_callback), daemon=True).start()
+        self._submit_tunnel_operation("stop", pod, self._restore_focus_after_operation)
 
-    def _start_service_with_focus(self, pod, callback):
-        service_name = pod.get_service()
-        self.root.after(0, self.log_message, f"🚀 Starting {service_name}")
-        was_running_before = getattr(pod, "_was_running", False)
-        pod._is_starting = True
-        self.root.after(0, self.update_services_list)
-        try:
-            if hasattr(pod, '_start_port_forward') and callable(getattr(pod, '_start_port_forward')):
-                success = pod._start_port_forward()
-            elif hasattr(pod, 'start_sync') and callable(getattr(pod, 'start_sync')):
-                success = pod.start_sync()
-            else:
-                start_method = getattr(pod, 'start', None)
-                if start_method:
-                    import asyncio, inspect
-                    if inspect.iscoroutinefunction(start_method):
-                        try:
-                            loop = asyncio.get_event_loop()
-                            created = False
-                        except RuntimeError:
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                            created = True
-                        try:
-                            success = loop.run_until_complete(start_method())
-                        finally:
-                            if created:
-                                loop.close()
-                    else:
-                        success = start_method()
-                else:
-                    success = False
-
-            pod_id = f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
-
-            pod._is_starting = False
-            if success:
-                pod._was_running = True
-                if self.pod_monitor:
-                    self.pod_monitor.mark_user_started(pod_id)
-                    self.notified_disconnected_pods.discard(pod_id)
-                    if hasattr(self.pod_monitor, 'recently_failed_pods'):
-                        self.pod_monitor.recently_failed_pods.discard(pod_id)
-                self.root.after(0, self.log_message, f"✅ {service_name} successfully initiated")
-            else:
-                if not was_running_before:
-                    pod._was_running = False
-                    if self.pod_monitor and hasattr(self.pod_monitor, 'recently_failed_pods'):
-                        self.pod_monitor.recently_failed_pods.discard(pod_id)
-                    self.notified_disconnected_pods.discard(pod_id)
-                    self.root.after(0, self.log_message, f"❌ Error at starting {service_name}, staying STOPPED")
-                else:
-                    self.root.after(0, self.log_message, f"❌ Restart failed for {service_name}; keeping FAILED")
-
-            self.root.after(100, self.update_services_list)
-
-        except Exception as e:
-            pod._is_starting = False
-            if not was_running_before:
-                pod._was_running = False
-                pod_id = f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
-                if self.pod_monitor and hasattr(self.pod_monitor, 'recently_failed_pods'):
-                    self.pod_monitor.recently_failed_pods.discard(pod_id)
-                self.notified_disconnected_pods.discard(pod_id)
-            self.root.after(0, self.log_message, f"❌ Error at starting {service_name}: {e}")
-        finally:
-            if callback:
-                self.root.after(0, callback)
-
-    def _stop_service_with_focus(self, pod, callback):
-        service_name = pod.get_service()
-        self.root.after(0, self.log_message, f"🛑 Stopping {service_name}...")
-        try:
-            success = pod.stop()
-            pod._was_running = False
-            if self.pod_monitor:
-                pod_id = f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
-                self.pod_monitor.mark_user_stopped(pod_id)
-                self.notified_disconnected_pods.discard(pod_id)
-            if success:
-                self.root.after(0, self.log_message, f"✅ {service_name} successfully stopped")
-            else:
-                self.root.after(0, self.log_message, f"❌ Error at stopping {service_name}")
-        except Exception as e:
-            self.root.after(0, self.log_message, f"❌ Error at stopping {service_name}: {e}")
-        finally:
-            if callback:
-                self.root.after(0, callback)
+    def _restore_focus_after_operation(self):
+        self.root.after(50, self._ensure_focus_and_selection)
+        self.root.after(150, self._ensure_focus_and_selection)
 
     def start_service_async_with_callback(self, pod, operation_id=None):
-        def callback():
-            if operation_id and hasattr(self, '_active_operations'):
-                self._active_operations.discard(operation_id)
-            self.root.after(100, self._ensure_focus_and_selection)
-        threading.Thread(target=self._start_service_with_callback,
-                         args=(pod, callback), daemon=True).start()
+        self._submit_tunnel_operation("start", pod, self._operation_callback(operation_id))
 
     def stop_service_async_with_callback(self, pod, operation_id=None):
+        self._submit_tunnel_operation("stop", pod, self._operation_callback(operation_id))
+
+    def _operation_callback(self, operation_id):
         def callback():
             if operation_id and hasattr(self, '_active_operations'):
                 self._active_operations.discard(operation_id)
             self.root.after(100, self._ensure_focus_and_selection)
-        threading.Thread(target=self._stop_service_with_callback,
-                         args=(pod, callback), daemon=True).start()
+        return callback
 
-    def _start_service_with_callback(self, pod, callback):
+    def _submit_tunnel_operation(self, action, pod, callback=None, refresh=True):
+        """Queues a start or stop on the shared executor. Called on the Tk thread;
+        the result is applied later by _flush_tunnel_results."""
         service_name = pod.get_service()
-        self.root.after(0, self.log_message, f"🚀 Starting {service_name}")
         was_running_before = getattr(pod, "_was_running", False)
-        try:
-            if hasattr(pod, 'start') and callable(getattr(pod, 'start')):
-                success = pod.start()
-            else:
-                success = pod._start_port_forward()
-
-            pod_id = f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
-
-            if success:
-                pod._was_running = True
-                if self.pod_monitor:
-                    self.pod_monitor.mark_user_started(pod_id)
-                    self.notified_disconnected_pods.discard(pod_id)
-                    if hasattr(self.pod_monitor, 'recently_failed_pods'):
-                        self.pod_monitor.recently_failed_pods.discard(pod_id)
-                self.root.after(0, self.log_message, f"✅ {service_name} successfully started")
+        if action == "start":
+            owner = self.registry.port_owner(pod)
+            if owner is not None:
+                shared = sorted(set(pod.get_local_ports()) & set(owner.get_local_ports()))
+                self.log_message(f"❌ Port {shared[0]} for {service_name} is in use by "
+                                 f"{owner.get_service()} in {owner.get_context()}")
+                if callback:
+                    callback()
+                return
+            pod._is_starting = True
+            self.log_message(f"🚀 Starting {service_name}")
+            future = self.tunnel_executor.submit_start(pod)
+        else:
+            self.log_message(f"🛑 Stopping {service_name}...")
+            future = self.tunnel_executor.submit_stop(pod)
+        if refresh:
+            self.update_services_list()
+        future.add_done_callback(
+            lambda f: self._queue_tunnel_result(action, pod, f, was_running_before, callback))
+
+    def _queue_tunnel_result(self, action, pod, future, was_running_before, callback):
+        # Runs on the executor thread: only hand the result over to Tk
+        with self._tunnel_results_lock:
+            self._tunnel_results.append((action, pod, future, was_running_before, callback))
+            if self._tunnel_flush_scheduled:
+                return
+            self._tunnel_flush_scheduled = True
+        if self.running:
+            self.root.after(self.RESULT_FLUSH_MS, self._flush_tunnel_results)
+
+    def _flush_tunnel_results(self):
+        """Applies every finished start/stop at once, with a single list refresh."""
+        with self._tunnel_results_lock:
+            results, self._tunnel_results = self._tunnel_results, []
+            self._tunnel_flush_scheduled = False
+        if not self.running:
+            return
+        callbacks = []
+        for action, pod, future, was_running_before, callback in results:
+            try:
+                result = future.result()
+                success, error = result.success, result.error
+            except Exception as e:
+                success, error = False, str(e)
+            if action == "start":
+                self._apply_start_result(pod, success, error, was_running_before)
             else:
-                if not was_running_before:
-                    pod._was_running = False
-                    if self.pod_monitor and hasattr(self.pod_monitor, 'recently_failed_pods'):
-                        self.pod_monitor.recently_failed_pods.discard(pod_id)
-                    self.notified_disconnected_pods.discard(pod_id)
-                    self.root.after(0, self.log_message, f"❌ Error at starting {service_name}, staying STOPPED")
-                else:
-                    self.root.after(0, self.log_message, f"❌ Restart failed for {service_name}; keeping FAILED")
-
-            self.root.after(100, self.update_services_list)
-
-        except Exception as e:
-            if not was_running_before:
-                pod._was_running = False
-                pod_id = f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
-                if self.pod_monitor and hasattr(self.pod_monitor, 'recently_failed_pods'):
-                    self.pod_monitor.recently_failed_pods.discard(pod_id)
-                self.notified_disconnected_pods.discard(pod_id)
-            self.root.after(0, self.log_message, f"❌ Error at starting {service_name}: {e}")
-        finally:
+                self._apply_stop_result(pod, success, error)
             if callback:
-                self.root.after(0, callback)
+                callbacks.append(callback)
+        self.update_services_list()
+        for callback in callbacks:
+            callback()
 
-    def _stop_service_with_callback(self, pod, callback):
+    def _apply_start_result(self, pod, success, error, was_running_before):
         service_name = pod.get_service()
-        self.root.after(0, self.log_message, f"🛑 Stopping {service_name}...")
-        try:
-            success = pod.stop()
-            pod._was_running = False
+        pod_id = f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
+        pod._is_starting = False
+        if success:
+            pod._was_running = True
             if self.pod_monitor:
-                pod_id = f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
-                self.pod_monitor.mark_user_stopped(pod_id)
+                self.pod_monitor.mark_user_started(pod_id)
                 self.notified_disconnected_pods.discard(pod_id)
-            if success:
-                self.root.after(0, self.log_message, f"✅ {service_name} Successfully stopped")
+                if hasattr(self.pod_monitor, 'recently_failed_pods'):
+                    self.pod_monitor.recently_failed_pods.discard(pod_id)
+            self.log_message(f"✅ {service_name} successfully started")
+        elif not was_running_before:
+            pod._was_running = False
+            if self.pod_monitor and hasattr(self.pod_monitor, 'recently_failed_pods'):
+                self.pod_monitor.recently_failed_pods.discard(pod_id)
+            self.notified_disconnected_pods.discard(pod_id)
+            if error:
+                self.log_message(f"❌ Error at starting {service_name}: {error}")
             else:
-                self.root.after(0, self.log_message, f"❌ Error at stopping {service_name}")
-        except Exception as e:
-            self.root.after(0, self.log_message, f"❌ Error at stopping {service_name}: {e}")
-        finally:
-            if callback:
-                self.root.after(0, callback)
+                self.log_message(f"❌ Error at starting {service_name}, staying STOPPED")
+        else:
+            self.log_message(f"❌ Restart failed for {service_name}; keeping FAILED")
+
+    def _apply_stop_result(self, pod, success, error):
+        service_name = pod.get_service()
+        if self.pod_monitor:
+            pod_id = f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
+            self.pod_monitor.mark_user_stopped(pod_id)
+            self.notified_disconnected_pods.discard(pod_id)
+        if success:
+            pod._was_running = False
+            self.log_message(f"✅ {service_name} stopped correctly")
+        elif error:
+            self.log_message(f"❌ Error at stopping {service_name}: {error}")
+        else:
+            self.log_message(f"❌ Error at stopping {service_name}")
 
     def on_key_press(self, event):
         pass
@@ -664,12 +650,15 @@ class KubeWireGUI:
                 self.set_ui_enabled(False)
                 self.show_loading_overlay("Updating contexts...")
                 self.log_message("🔄 Updating configuration...")
-                contexts, context_statuses = ConfigManager.discover_config()
+                contexts, context_statuses = ConfigManager.discover_config(use_cache=True)
                 self.set_ui_enabled(True)
                 self.hide_loading_overlay()
                 if contexts:
                     ConfigManager.save_discovered_config(contexts)
             self.root.after(0, self._update_contexts, contexts, context_statuses)
+            if ConfigManager.needs_reconcile():
+                self.root.after(0, self.log_message, "🔄 Reconciling cached discovery in background...")
+                self._refresh_contexts_async(blocking=False)
         except Exception as e:
             self.root.after(0, self.log_message, f"❌ Error during initialisation: {e}")
 
@@ -683,7 +672,8 @@ class KubeWireGUI:
             context_to_select = accessible_contexts[0]
             self.log_message(f"🎯 Self-selected single context: {context_to_select}")
         elif len(accessible_contexts) > 1:
-            context_to_select = accessible_contexts[0]
+            current_context = KubeConfig.current_context()
+            context_to_select = current_context if current_context in self.contexts else accessible_contexts[0]
             self.log_message(f"🎯 Selected default context: {context_to_select}")
         if context_to_select:
             self.select_context(context_to_select)
@@ -694,15 +684,20 @@ class KubeWireGUI:
             self.log_message(f"✅ Found {accessible_count} accessible context(s)")
         if inaccessible_count > 0:
             self.log_message(f"⚠️ Found {inaccessible_count} inaccessible context(s)")
+        self._sync_watchers()
 
     def update_context_combobox(self):
         self.context_combobox['values'] = []
         context_list = []
+        degraded = {status.name for status in self.context_statuses if status.degraded}
         for context_name in self.contexts.keys():
             service_count = len(self.contexts[context_name])
-            context_list.append(f"{context_name} ({service_count} services)")
+            marker = " ⏱️ partial" if context_name in degraded else ""
+            running_count = self._context_running_counts.get(context_name, 0)
+            running = f", {running_count} running" if running_count else ""
+            context_list.append(f"{context_name} ({service_count} services{running}{marker})")
         for status in self.context_statuses:
-            if not status.accessible:
+            if not status.accessible and status.name not in self.contexts:
                 context_list.append(f"{status.name} (⚠️ No accesible)")
         self.context_combobox['values'] = context_list
 
@@ -734,20 +729,12 @@ class KubeWireGUI:
     def select_context(self, context_name):
         if context_name not in self.contexts:
             return
-        if self.current_context and self.current_context != context_name:
-            self.stop_all_services()
-        if self.pod_monitor:
-            self.pod_monitor.stop_monitoring()
+        # Tunnels of the previous context keep running in the background
         self.sort_column = None
         self.sort_reverse = False
         self.original_order = []
         self.current_context = context_name
-        self.current_pods = self.contexts[context_name]
-        self.notified_disconnected_pods.clear()
         self.current_selection = None
-        for pod in self.current_pods:
-            pod._was_running = pod.is_running()
-        self.pod_monitor = PodMonitor(self)
         self.pod_monitor.start_monitoring()
         self.update_services_list()
         self.log_message(f"📋 Selected context: {context_name}")
@@ -782,28 +769,42 @@ class KubeWireGUI:
             if starting:
                 status, tags = "🟡 STARTING", ('starting',)
             elif failed:
-                status, tags = "💥 FAILED", ('failed',)
+                reconnect = self.pod_monitor.reconnect_state(pod_id)
+                if reconnect and reconnect.circuit_open():
+                    status, tags = "⛔ PAUSED", ('failed',)
+                elif reconnect and reconnect.pending:
+                    status, tags = "🔁 RECONNECTING", ('starting',)
+                else:
+                    status, tags = "💥 FAILED", ('failed',)
                 if pod_id not in self.notified_disconnected_pods and getattr(pod, "_was_running", False):
                     new_failed_pods.append(pod_id)
+            elif running and self.pod_monitor.is_degraded(pod_id):
+                status, tags = "🟠 DEGRADED", ('degraded',)
+            elif running and pod.is_idle():
+                status, tags = "💤 IDLE", ('idle',)
             elif running:
                 status, tags = "🟢 RUNNING", ('running',)
             else:
                 status, tags = "🔴 STOPPED", ('stopped',)
-            rows.append((pod.get_service(), pod.get_port(), pod.get_namespace(), status, tags))
+            status += self._reconnect_info(pod, pod_id)
+            health = self.pod_monitor.health_state(pod_id) if running else None
+            probe = health.summary() if health else ""
+            values = (pod.get_service(), pod.describe_ports(), pod.get_namespace(), status, probe)
+            if len(self.columns) > len(values):
+                values += KubeWireGUI._metric_values(pod)
+            rows.append((values, tags))
         if self.sort_column:
-            idx = {'Service': 0, 'Port': 1, 'Namespace': 2, 'Status': 3}[self.sort_column]
-            if self.sort_column == 'Port':
-                rows.sort(key=lambda r: int(r[idx]), reverse=self.sort_reverse)
-            else:
-                rows.sort(key=lambda r: r[idx], reverse=self.sort_reverse)
+            idx = self.columns.index(self.sort_column)
+            rows.sort(key=lambda r: KubeWireGUI._sort_key(self.sort_column, r[0][idx]), reverse=self.sort_reverse)
         self._service_to_item = {}
         updated_services = set()
-        for svc, port, ns, status, tags in rows:
+        for values, tags in rows:
+            svc = values[0]
             if svc in existing:
                 iid = existing[svc]
-                self.services_tree.item(iid, values=(svc, port, ns, status), tags=tags)
+                self.services_tree.item(iid, values=values, tags=tags)
             else:
-                iid = self.services_tree.insert('', tk.END, values=(svc, port, ns, status), tags=tags)
+                iid = self.services_tree.insert('', tk.END, values=values, tags=tags)
             self._service_to_item[svc] = iid
             updated_services.add(svc)
         for svc, iid in existing.items():
@@ -813,6 +814,8 @@ class KubeWireGUI:
         self.services_tree.tag_configure('stopped', foreground=SOLARIZED['red'], font=('Arial', 13, 'bold'))
         self.services_tree.tag_configure('failed', foreground=SOLARIZED['orange'], font=('Arial', 13, 'bold'))
         self.services_tree.tag_configure('starting', foreground=SOLARIZED['yellow'], font=('Arial', 13, 'bold'))
+        self.services_tree.tag_configure('idle', foreground=SOLARIZED['cyan'], font=('Arial', 13, 'bold'))
+        self.services_tree.tag_configure('degraded', foreground=SOLARIZED['magenta'], font=('Arial', 13, 'bold'))
 
         if prev_sel and prev_sel in self._service_to_item:
             iid = self._service_to_item[prev_sel]
@@ -837,6 +840,70 @@ class KubeWireGUI:
             threading.Thread(target=self.sound_notifier.play_disconnect_sound, daemon=True).start()
             self.notified_disconnected_pods.update(new_failed_pods)
         self.update_column_headers()
+        self._refresh_running_counts()
+
+    @staticmethod
+    def _metric_values(pod) -> tuple:
+        metrics = pod.metrics
+        if metrics is None:
+            return ("", "", "", "")
+        return (metrics.connections_summary(), metrics.traffic_summary(), metrics.setup_summary(),
+                str(metrics.errors))
+
+    @staticmethod
+    def _sort_key(column, value):
+        if column == 'Port':
+            words = str(value).split()
+            return int(words[0]) if words and words[0].isdigit() else 0
+        if column == 'Traffic':
+            sizes = TRAFFIC_PATTERN.findall(str(value))
+            if not sizes:
+                return float('inf')
+            return sum(float(number) * BYTE_UNITS[unit] for number, unit in sizes)
+        if column in ('Probe',) + KubeWireGUI.METRIC_COLUMNS:
+            return KubeWireGUI._leading_number(value)
+        return value
+
+    @staticmethod
+    def _leading_number(value) -> float:
+        # Empty cells and failures ("✖ ...") sort after every measurement
+        word = str(value).split(" ", 1)[0]
+        try:
+            return float(word)
+        except ValueError:
+            return float('inf')
+
+    def _reconnect_info(self, pod, pod_id):
+        info = " ♻️" if pod.get_auto_reconnect() else ""
+        reconnect = self.pod_monitor.reconnect_state(pod_id)
+        if reconnect and reconnect.summary():
+            info += f" {reconnect.summary()}"
+        return info
+
+    def toggle_auto_reconnect(self):
+        selection = self.services_tree.selection()
+        if not selection:
+            messagebox.showwarning("No Selection", "Select a service first")
+            self.root.after(50, self._ensure_focus_and_selection)
+            return
+        service_name = self.services_tree.item(selection[0], 'values')[0]
+        pod = next((p for p in self.current_pods if p.get_service() == service_name), None)
+        if pod:
+            pod.pod.auto_reconnect = not pod.get_auto_reconnect()
+            state = "enabled" if pod.get_auto_reconnect() else "disabled"
+            self.log_message(f"♻️ Auto-reconnect {state} for {service_name}")
+            ConfigManager.save_discovered_config(self.contexts)
+            self.update_services_list()
+        self.services_tree.focus_set()
+
+    def _refresh_running_counts(self):
+        counts = self.registry.running_counts()
+        if counts == self._context_running_counts:
+            return
+        self._context_running_counts = counts
+        self.update_context_combobox()
+        if self.current_context:
+            self._update_combobox_selection(self.current_context)
 
     def start_auto_refresh(self):
         self.stop_auto_refresh()
@@ -908,96 +975,16 @@ class KubeWireGUI:
         self.services_tree.focus_set()
 
     def start_service_async(self, pod):
-        pod._is_starting = True
-        threading.Thread(target=self._start_service, args=(pod,), daemon=True).start()
-
-    def _start_service(self, pod):
-        service_name = pod.get_service()
-        self.root.after(0, self.log_message, f"🚀 Starting {service_name}")
-        was_running_before = getattr(pod, "_was_running", False)
-        pod._is_starting = True
-        self.root.after(0, self.update_services_list)
-        try:
-            success = False
-            if hasattr(pod, '_start_port_forward') and callable(getattr(pod, '_start_port_forward')):
-                success = pod._start_port_forward()
-            elif hasattr(pod, 'start_sync') and callable(getattr(pod, 'start_sync')):
-                success = pod.start_sync()
-            else:
-                start_method = getattr(pod, 'start', None)
-                if start_method:
-                    import asyncio, inspect
-                    if inspect.iscoroutinefunction(start_method):
-                        try:
-                            loop = asyncio.get_event_loop()
-                            created = False
-                        except RuntimeError:
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                            created = True
-                        try:
-                            success = loop.run_until_complete(start_method())
-                        finally:
-                            if created:
-                                loop.close()
-                    else:
-                        success = start_method()
-
-            pod_id = f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
-
-            pod._is_starting = False
-            if success:
-                pod._was_running = True
-                if self.pod_monitor:
-                    self.pod_monitor.mark_user_started(pod_id)
-                    self.notified_disconnected_pods.discard(pod_id)
-                    if hasattr(self.pod_monitor, 'recently_failed_pods'):
-                        self.pod_monitor.recently_failed_pods.discard(pod_id)
-                self.root.after(0, self.log_message, f"✅ {service_name} successfully initiated")
-            else:
-                if not was_running_before:
-                    pod._was_running = False
-                    if self.pod_monitor and hasattr(self.pod_monitor, 'recently_failed_pods'):
-                        self.pod_monitor.recently_failed_pods.discard(pod_id)
-                    self.notified_disconnected_pods.discard(pod_id)
-                    self.root.after(0, self.log_message, f"❌ Error at starting {service_name}, staying STOPPED")
-                else:
-                    self.root.after(0, self.log_message, f"❌ Restart failed for {service_name}; keeping FAILED")
-
-            self.root.after(100, self.update_services_list)
-            self.root.after(200, self._ensure_focus_and_selection)
-        except Exception as e:
-            pod._is_starting = False
-            if not was_running_before:
-                pod._was_running = False
-                pod_id = f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
-                if self.pod_monitor and hasattr(self.pod_monitor, 'recently_failed_pods'):
-                    self.pod_monitor.recently_failed_pods.discard(pod_id)
-                self.notified_disconnected_pods.discard(pod_id)
-            self.root.after(0, self.log_message, f"❌ Error at starting {service_name}: {e}")
-            self.root.after(100, self._ensure_focus_and_selection)
+        self._submit_tunnel_operation("start", pod,
+                                      lambda: self.root.after(200, self._ensure_focus_and_selection))
 
     def stop_service_async(self, pod):
-        threading.Thread(target=self._stop_service, args=(pod,), daemon=True).start()
-
-    def _stop_service(self, pod):
-        service_name = pod.get_service()
-        if not pod._was_running:
-            self.log_message(f"ℹ️  {service_name} already stopped")
+        if not getattr(pod, "_was_running", False):
+            self.log_message(f"ℹ️  {pod.get_service()} already stopped")
             self.root.after(50, self._ensure_focus_and_selection)
             return
-        self.root.after(0, self.log_message, f"🛑 Stopping {service_name}...")
-        success = pod.stop()
-        if self.pod_monitor:
-            pod_id = f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
-            self.pod_monitor.mark_user_stopped(pod_id)
-            self.notified_disconnected_pods.discard(pod_id)
-        if success:
-            self.root.after(0, self.log_message, f"✅ {service_name} stopped correctly")
-            pod._was_running = False
-        else:
-            self.root.after(0, self.log_message, f"❌ Error at stopping {service_name}")
-        self.root.after(100, self._ensure_focus_and_selection)
+        self._submit_tunnel_operation("stop", pod,
+                                      lambda: self.root.after(100, self._ensure_focus_and_selection))
 
     def start_all_services(self):
         if not self.current_pods:
@@ -1009,8 +996,8 @@ class KubeWireGUI:
             return
         self.log_message(f"🚀 Starting {len(stopped_pods)} service(s)...")
         for pod in stopped_pods:
-            pod._is_starting = True
-            self.start_service_async(pod)
+            self._submit_tunnel_operation("start", pod, refresh=False)
+        self.update_services_list()
         self.services_tree.focus_set()
 
     def stop_all_services(self):
@@ -1030,11 +1017,10 @@ class KubeWireGUI:
         def stop_callback():
             self._pending_stops -= 1
             if self._pending_stops == 0:
-                self.update_services_list()
                 self.root.after(100, self._ensure_focus_and_selection)
                 self.services_tree.focus_set()
         for pod in running_pods:
-            self.stop_service_async_with_callback(pod, stop_callback)
+            self._submit_tunnel_operation("stop", pod, stop_callback, refresh=False)
 
 
     def show_logs(self):
@@ -1052,6 +1038,28 @@ class KubeWireGUI:
             self.show_pod_logs_async(pod)
         self.services_tree.focus_set()
 
+    def show_tunnel_output(self):
+        selection = self.services_tree.selection()
+        if not selection:
+            messagebox.showwarning("No selection", "Select a service first")
+            self.root.after(50, self._ensure_focus_and_selection)
+            return
+        service_name = self.services_tree.item(selection[0], 'values')[0]
+        pod = next((p for p in self.current_pods if p.get_service() == service_name), None)
+        if pod is None:
+            return
+        if not self.logs_frame.winfo_ismapped():
+            self.toggle_logs_panel()
+        output = pod.output
+        if output is None:
+            self.append_service_log(f"🩺 {service_name}: no tunnel has been started yet\n")
+        else:
+            self.append_service_log(f"🩺 {service_name}: kubectl output ({output.line_count} lines, "
+                                    f"{output.connection_count} connections handled)\n")
+            for line in output.tail():
+                self.append_service_log(line + "\n")
+        self.services_tree.focus_set()
+
     def show_pod_logs_async(self, pod):
         """Reemplazar el método show_pod_logs_async existente"""
         selection = self.services_tree.selection()
@@ -1145,34 +1153,104 @@ class KubeWireGUI:
         self.update_status("Done")
 
     def refresh_contexts(self):
-        self.set_ui_enabled(False)
-        self.show_loading_overlay("Updating contexts...")
-        self.log_message("🔄 Updating configuration...")
-        threading.Thread(target=self._refresh_contexts_async, daemon=True).start()
+        cached_contexts, cached_statuses = ConfigManager.read_cached_config()
+        blocking = not cached_contexts
+        if blocking:
+            self.set_ui_enabled(False)
+            self.show_loading_overlay("Updating contexts...")
+            self.log_message("🔄 Updating configuration...")
+        else:
+            self.log_message("⚡ Serving cached discovery, reconciling in background...")
+            self._apply_discovery(cached_contexts, self._merge_statuses(cached_statuses))
+        threading.Thread(target=self._refresh_contexts_async, args=(blocking,), daemon=True).start()
+
+    def refresh_current_context(self):
+        context_name = self.current_context
+        if not context_name:
+            return
+        self.log_message(f"🔄 Re-discovering services in {context_name}...")
+        threading.Thread(target=self._refresh_context_async, args=(context_name,), daemon=True).start()
+
+    def _refresh_context_async(self, context_name):
+        try:
+            context_pods, context_status = ConfigManager.refresh_context(context_name)
+            self.root.after(0, self._apply_context_refresh, context_name, context_pods, context_status)
+        except Exception as e:
+            self.root.after(0, self.log_message, f"❌ Error at updating {context_name}: {e}")
 
+    def _apply_context_refresh(self, context_name, context_pods, context_status):
+        new_contexts = dict(self.contexts)
+        if context_pods:
+            new_contexts[context_name] = context_pods
+        else:
+            new_contexts.pop(context_name, None)
+        new_statuses = [s for s in self.context_statuses if s.name != context_name] + [context_status]
+        self._apply_discovery(new_contexts, new_statuses)
+        self.log_message(f"✅ Refreshed context: {context_name}")
+
+    def _merge_statuses(self, new_statuses):
+        names = {status.name for status in new_statuses}
+        return list(new_statuses) + [s for s in self.context_statuses if s.name not in names]
+
+    def _apply_discovery(self, new_contexts, new_statuses):
+        self.context_statuses = new_statuses
+        degraded = [status.name for status in new_statuses if status.degraded]
+        merged = ConfigManager.merge_contexts(self.contexts, new_contexts, preserve=degraded)
+        changed = ConfigManager.context_signature(merged) != ConfigManager.context_signature(self.contexts)
+        if changed:
+            ConfigManager.save_discovered_config(merged)
+            previous_context = self.current_context
+            if previous_context and previous_context in merged:
+                self.contexts = merged
+                self.update_context_combobox()
+                self._update_combobox_selection(previous_context)
+                self.update_services_list()
+            else:
+                self._update_contexts(merged, new_statuses)
+        else:
+            self.update_context_combobox()
+            if self.current_context:
+                self._update_combobox_selection(self.current_context)
+        self._sync_watchers()
+        return changed
 
-    def _refresh_contexts_async(self):
+    def _sync_watchers(self):
+        if self.service_watch is None:
+            return
+        self.service_watch.sync([status.name for status in self.context_statuses if status.accessible]
+                                or list(self.contexts.keys()))
+
+    def _on_service_event(self, context, event):
+        if self.running:
+            self.root.after(0, self._apply_service_event, context, event)
+
+    def _apply_service_event(self, context, event):
+        if not ConfigManager.apply_service_event(self.contexts, context, event):
+            return
+        self.registry.reindex()
+        ConfigManager.save_discovered_config(self.contexts)
+        self.log_message(f"🔔 Service {event.namespace}/{event.name} {event.type.lower()} in {context}")
+        if context == self.current_context:
+            self.update_services_list()
+        self.update_context_combobox()
+        if self.current_context:
+            self._update_combobox_selection(self.current_context)
+
+    def _refresh_contexts_async(self, blocking=True):
+        # Bypasses the cache: this is what reconciles the cached view
         try:
             new_contexts, new_statuses = ConfigManager.discover_config()
             if new_contexts:
-                previous_context = self.current_context
-                if self.current_context and any(pod.is_running() for pod in self.current_pods):
-                    self.stop_all_services()
-                ConfigManager.save_discovered_config(new_contexts)
-                if previous_context and previous_context in new_contexts:
-                    self.root.after(0, self._update_contexts_and_restore, new_contexts, new_statuses, previous_context)
-                else:
-                    self.root.after(0, self._update_contexts, new_contexts, new_statuses)
+                self.root.after(0, self._apply_discovery, new_contexts, new_statuses)
                 self.root.after(0, self.log_message, "✅ Updated configuration")
-                self.root.after(0, self.hide_loading_overlay)
             else:
                 self.root.after(0, self.log_message, "⚠️ No accessible contexts were found")
-                self.root.after(0, self.hide_loading_overlay)
         except Exception as e:
             self.root.after(0, self.log_message, f"❌ Error at updating: {e}")
-            self.root.after(0, self.hide_loading_overlay)
         finally:
-            self.root.after(0, self.set_ui_enabled, True)
+            if blocking:
+                self.root.after(0, self.hide_loading_overlay)
+                self.root.after(0, self.set_ui_enabled, True)
 
     def show_loading_overlay(self, text="Cargando..."):
         if hasattr(self, "_loading_overlay") and self._loading_overlay:
@@ -1253,6 +1331,8 @@ class KubeWireGUI:
             self.root.after(0, self.update_services_list)
 
     def trigger_refresh_with_failures(self, failed_pods):
+        for pod_id in failed_pods:
+            self.root.after(0, self.log_message, f"💥 Tunnel {pod_id} dropped")
         if failed_pods and self.sound_enabled:
             threading.Thread(target=self.sound_notifier.play_disconnect_sound, daemon=True).start()
             for pod_id in failed_pods:
@@ -1261,9 +1341,7 @@ class KubeWireGUI:
 
     def stop_all_services_blocking(self):
         """Detiene todos los servicios de forma síncrona y segura."""
-        if not self.current_pods:
-            return
-        for pod in self.current_pods:
+        for pod in self.registry.running():
             try:
                 if pod.is_running():
                     self.log_message(f"🛑 Stopping {pod.get_service()} (blocking)...")
@@ -1280,12 +1358,23 @@ class KubeWireGUI:
 
         if hasattr(self, 'logs_manager'):
             self.logs_manager.stop_current_streaming()
+        if self.service_watch:
+            self.service_watch.stop_all()
+        self.pod_monitor.stop_monitoring()
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+        self.tunnel_executor.shutdown()
+        KubernetesDiscovery.cancel_all()
         
         try:
             self.root.withdraw()
             self.root.update()
         except Exception:
             pass
+        # Background tunnels have no window left to be managed from, unless
+        # the daemon runs them
+        if self.daemon is None:
+            self.stop_all_services_blocking()
         try:
             self.root.destroy()
         except Exception:
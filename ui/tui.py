@@ -7,18 +7,26 @@ import time
 from datetime import datetime
 
 from config.config_manager import ConfigManager
+from k8s.discovery import KubernetesDiscovery
+from k8s.service_watcher import ServiceWatchManager
+from metrics.prometheus import PrometheusExporter
+from pods import PodUI
+from pods.batch import BatchRunner
+from pods.health import HealthProber
 from pods.pod_monitor import PodMonitor
+from pods.reconnect import ReconnectPolicy
+from pods.tunnel_registry import TunnelRegistry
 from pods.sound_notifier import SoundNotifier
 
 
 class KubeWireTUI:
-    def __init__(self, contexts, context_statuses=None):
-        self.contexts = contexts
+    def __init__(self, contexts, context_statuses=None, daemon=None):
+        self.registry = TunnelRegistry(contexts)
+        # The client of the daemon running the tunnels, when main attached one
+        self.daemon = daemon
         self.context_statuses = context_statuses or []
         self.current_context = None
-        self.current_pods = []
         self.running = True
-        self.pod_monitor = PodMonitor(self)
         self.display_update_flag = threading.Event()
         self.input_lock = threading.Lock()
         self.in_service_menu = False
@@ -31,12 +39,41 @@ class KubeWireTUI:
         self.sound_enabled = self.sound_notifier.is_sound_available()
 
         self.notified_disconnected_pods = set()
+        self.discovery_lock = threading.RLock()
+        self.service_watch = None
+        settings = ConfigManager.read_settings()
+        PodUI.ready_timeout = settings.tunnel_ready_timeout
+        PodUI.tunnel_backend = settings.tunnel_backend
+        PodUI.lazy = settings.lazy_tunnels
+        PodUI.idle_timeout = settings.lazy_idle_timeout
+        PodUI.instrumented = settings.tunnel_metrics
+        self.bulk_concurrency = settings.bulk_concurrency
+        # Attached to a daemon, probing and metrics are the daemon's job
+        attached = self.daemon is not None
+        self.pod_monitor = PodMonitor(self, ReconnectPolicy.from_settings(settings),
+                                      prober=None if attached else HealthProber.from_settings(settings))
+        self.metrics_exporter = None if attached else PrometheusExporter.from_settings(settings, self.registry,
+                                                                                       self.pod_monitor)
+        if settings.watch_services:
+            self.service_watch = ServiceWatchManager(self._on_service_event, settings.discovery_backend)
 
         for context_pods in self.contexts.values():
             for pod in context_pods:
                 pod._was_running = False
                 pod._is_starting = False
 
+    @property
+    def contexts(self):
+        return self.registry.contexts
+
+    @contexts.setter
+    def contexts(self, contexts):
+        self.registry.replace(contexts)
+
+    @property
+    def current_pods(self):
+        return self.registry.pods(self.current_context)
+
     @staticmethod
     def _log_console(message):
         timestamp = datetime.now().strftime("%H:%M:%S")
@@ -78,12 +115,17 @@ class KubeWireTUI:
         accessible_contexts = [ctx for ctx in self.contexts.keys()]
         if len(accessible_contexts) == 1:
             self.current_context = accessible_contexts[0]
-            self.current_pods = self.contexts[self.current_context]
             print(f"🎯 Auto-selected context: {self.current_context}")
         else:
             await self.select_context()
 
         self.pod_monitor.start_monitoring()
+        if self.metrics_exporter:
+            self.metrics_exporter.start()
+
+        self._sync_watchers()
+        if ConfigManager.needs_reconcile():
+            self._reconcile_in_background()
 
         try:
             while self.running:
@@ -101,7 +143,7 @@ class KubeWireTUI:
                         await self.handle_service_choice(choice)
                     except KeyboardInterrupt:
                         print("\n👋 Shutting down...")
-                        self.stop_all()
+                        self.stop_all_on_exit()
                         self.running = False
                     except Exception as e:
                         print(f"❌ Error: {e}")
@@ -110,6 +152,11 @@ class KubeWireTUI:
                     await self.select_context()
         finally:
             self.pod_monitor.stop_monitoring()
+            if self.metrics_exporter:
+                self.metrics_exporter.stop()
+            if self.service_watch:
+                self.service_watch.stop_all()
+            KubernetesDiscovery.cancel_all()
 
     def _get_user_input_with_refresh(self):
         self.refresh_requested.clear()
@@ -141,7 +188,6 @@ class KubeWireTUI:
                 return ""
 
     async def select_context(self):
-        self.pod_monitor.stop_monitoring()
         self.in_service_menu = False
         os.system('cls' if os.name == 'nt' else 'clear')
 
@@ -150,6 +196,7 @@ class KubeWireTUI:
 
         accessible_contexts = list(self.contexts.keys())
         all_contexts = []
+        running_counts = self.registry.running_counts()
 
         for ctx in accessible_contexts:
             status = next((s for s in self.context_statuses if s.name == ctx), None)
@@ -158,22 +205,27 @@ class KubeWireTUI:
                 'name': ctx,
                 'accessible': True,
                 'service_count': service_count,
-                'error': ''
+                'running_count': running_counts.get(ctx, 0),
+                'error': status.error_message if status and status.degraded else ''
             })
 
         for status in self.context_statuses:
-            if not status.accessible:
+            if not status.accessible and status.name not in self.contexts:
                 all_contexts.append({
                     'name': status.name,
                     'accessible': False,
                     'service_count': 0,
+                    'running_count': 0,
                     'error': status.error_message
                 })
 
         for i, ctx_info in enumerate(all_contexts, 1):
             current_marker = "👉 " if ctx_info['name'] == self.current_context else "   "
-            if ctx_info['accessible']:
-                print(f"{current_marker}{i}. 🟢 {ctx_info['name']} ({ctx_info['service_count']} services)")
+            running = f", {ctx_info['running_count']} running" if ctx_info['running_count'] else ""
+            if ctx_info['accessible'] and ctx_info['error']:
+                print(f"{current_marker}{i}. 🟡 {ctx_info['name']} ({ctx_info['service_count']} services{running}, ⏱️  {ctx_info['error']})")
+            elif ctx_info['accessible']:
+                print(f"{current_marker}{i}. 🟢 {ctx_info['name']} ({ctx_info['service_count']} services{running})")
             else:
                 print(f"{current_marker}{i}. 🔴 {ctx_info['name']} (⚠️  {ctx_info['error']})")
 
@@ -187,25 +239,24 @@ class KubeWireTUI:
         choice = input("\nSelect environment: ").strip().lower()
 
         if choice == 'q' or choice == 'quit':
-            print("👋 Stopping all services and exiting...\n")
-            self.stop_all_contexts()
+            self.stop_all_on_exit()
             self.running = False
         elif choice == 'r' or choice == 'refresh':
-            print("🔄 Re-discovering configuration...\n")
-            new_contexts, new_statuses = ConfigManager.discover_config()
-            self.contexts = new_contexts
-            self.context_statuses = new_statuses
-            self.current_context = None
-            self.current_pods = []
-            self.notified_disconnected_pods.clear()
-            if new_contexts:
-                ConfigManager.save_discovered_config(new_contexts)
-                print("✅ Configuration refreshed!")
+            cached_contexts, cached_statuses = ConfigManager.read_cached_config()
+            if cached_contexts:
+                print("⚡ Serving cached discovery, reconciling in background...\n")
+                self._apply_discovery(cached_contexts, self._merge_statuses(cached_statuses))
+                self._reconcile_in_background()
             else:
-                print("⚠️  No accessible contexts found")
+                print("🔄 Re-discovering configuration...\n")
+                new_contexts, new_statuses = ConfigManager.discover_config()
+                if new_contexts:
+                    self._apply_discovery(new_contexts, new_statuses)
+                    print("✅ Configuration refreshed!")
+                else:
+                    print("⚠️  No accessible contexts found")
         elif choice == 'b' or choice == 'back':
             if self.current_context:
-                self.pod_monitor.start_monitoring()
                 os.system('cls' if os.name == 'nt' else 'clear')
                 return
             else:
@@ -235,14 +286,8 @@ class KubeWireTUI:
                     return
                 new_context = selected_context['name']
                 if new_context != self.current_context:
-                    if self.current_context:
-                        self.stop_current_context()
+                    # Tunnels of the previous context keep running in the background
                     self.current_context = new_context
-                    self.current_pods = self.contexts[new_context]
-                    self.notified_disconnected_pods.clear()
-                    for pod in self.current_pods:
-                        pod._was_running = pod.is_running()
-                    self.pod_monitor.start_monitoring()
                     await asyncio.sleep(1)
                     os.system('cls' if os.name == 'nt' else 'clear')
                 else:
@@ -257,6 +302,9 @@ class KubeWireTUI:
     def show_service_menu(self):
         os.system('cls' if os.name == 'nt' else 'clear')
         print(f"\n🎯 Context: {self.current_context}")
+        background = len(self.registry.running()) - len(self.registry.running(self.current_context))
+        if background:
+            print(f"🔀 {background} tunnel(s) running in other contexts")
 
         print(f"📋 Available Services ({datetime.now().strftime('%H:%M:%S')}):")
         print("-" * 50)
@@ -271,25 +319,39 @@ class KubeWireTUI:
                 status_icon = "🟡"
                 status_text = "STARTING"
             elif is_failed:
-                status_icon = "💥"
-                status_text = "FAILED"
+                reconnect = self.pod_monitor.reconnect_state(pod_id)
+                if reconnect and reconnect.circuit_open():
+                    status_icon = "⛔"
+                    status_text = "PAUSED"
+                elif reconnect and reconnect.pending:
+                    status_icon = "🔁"
+                    status_text = "RECONNECTING"
+                else:
+                    status_icon = "💥"
+                    status_text = "FAILED"
                 if self.sound_enabled and pod_id not in self.notified_disconnected_pods:
                     self.notified_disconnected_pods.add(pod_id)
                     threading.Thread(target=self.sound_notifier.play_disconnect_sound, daemon=True).start()
+            elif is_running and self.pod_monitor.is_degraded(pod_id):
+                status_icon = "🟠"
+                status_text = "DEGRADED"
             elif is_running:
-                status_icon = "🟢"
-                status_text = "RUNNING"
+                status_icon = "💤" if pod.is_idle() else "🟢"
+                status_text = "IDLE" if pod.is_idle() else "RUNNING"
                 self.notified_disconnected_pods.discard(pod_id)
             else:
                 status_icon = "🔴"
                 status_text = "STOPPED"
                 self.notified_disconnected_pods.discard(pod_id)
 
-            print(f"{i:2d}. {pod.get_service()}:{pod.get_port()} [{pod.get_namespace()}] - {status_icon} {status_text}")
+            print(f"{i:2d}. {pod.get_service()}:{pod.describe_ports()} [{pod.get_namespace()}] - {status_icon} {status_text}"
+                  f"{self._reconnect_info(pod, pod_id)}{self._metrics_info(pod)}")
 
         print("\n🎮 Commands:")
         print("  1-N      : Start/Stop specific service")
         print("  l1-N     : Show logs for service (new window)")
+        print("  d1-N     : Show kubectl output of a service's tunnel")
+        print("  a1-N     : Toggle auto-reconnect (♻️) for a service")
         print("  start    : Start all services")
         print("  stop     : Stop all services")
         print("  env      : Change environment")
@@ -308,37 +370,42 @@ class KubeWireTUI:
                 await self.show_pod_logs(self.current_pods[index])
                 return
 
+        if choice.startswith('a') and choice[1:].isdigit():
+            index = int(choice[1:]) - 1
+            if 0 <= index < len(self.current_pods):
+                self.toggle_auto_reconnect(self.current_pods[index])
+                await asyncio.sleep(0.8)
+                return
+
+        if choice.startswith('d') and choice[1:].isdigit():
+            index = int(choice[1:]) - 1
+            if 0 <= index < len(self.current_pods):
+                self.show_tunnel_output(self.current_pods[index])
+                return
+
         if choice == 'q' or choice == 'quit':
-            self._log_console("👋 Stopping all services and exiting...")
-            self.stop_all_contexts()
+            self.stop_all_on_exit()
             self.running = False
         elif choice == 'env' or choice == 'e':
             self._log_console("🔄 Switching to environment selection...")
             await asyncio.sleep(0.5)
             await self.select_context()
         elif choice == 'refresh' or choice == 'r':
-            self._log_console("🔄 Re-discovering services...")
-            new_contexts, new_statuses = ConfigManager.discover_config()
-            if new_contexts:
-                self.stop_current_context()
-                self.contexts = new_contexts
-                self.context_statuses = new_statuses
-                self.notified_disconnected_pods.clear()
-                if self.current_context in new_contexts:
-                    self.current_pods = new_contexts[self.current_context]
-                    for pod in self.current_pods:
-                        pod._was_running = pod.is_running()
-                    ConfigManager.save_discovered_config(new_contexts)
-                    self._log_console(f"✅ Refreshed context: {self.current_context}")
-                    self.show_service_menu()
-                else:
-                    self.current_context = None
-                    self.current_pods = []
-                    ConfigManager.save_discovered_config(new_contexts)
-                    self._log_console("⚠️ Context no longer exists, please select a new one.")
-                    await self.select_context()
+            self._log_console(f"🔄 Re-discovering services in {self.current_context}...")
+            context_pods, context_status = ConfigManager.refresh_context(self.current_context)
+            new_contexts = dict(self.contexts)
+            if context_pods:
+                new_contexts[self.current_context] = context_pods
             else:
-                self._log_console("⚠️ No contexts found!")
+                new_contexts.pop(self.current_context, None)
+            new_statuses = [s for s in self.context_statuses if s.name != self.current_context] + [context_status]
+            self._apply_discovery(new_contexts, new_statuses)
+            if self.current_context:
+                self._log_console(f"✅ Refreshed context: {self.current_context}")
+                self.show_service_menu()
+            else:
+                self._log_console("⚠️ Context no longer exists, please select a new one.")
+                await self.select_context()
             await asyncio.sleep(0.5)
         elif choice == 'start':
             stopped_pods = [pod for pod in self.current_pods if not pod.is_running()]
@@ -347,69 +414,31 @@ class KubeWireTUI:
                 await asyncio.sleep(1)
                 return
 
-            total = len(stopped_pods)
-            started_ok = 0
-            for i, pod in enumerate(stopped_pods, 1):
+            stopped_pods = [pod for pod in stopped_pods if not self._port_taken(pod)]
+            if not stopped_pods:
+                await asyncio.sleep(2)
+                return
+            for pod in stopped_pods:
                 pod._is_starting = True
-                from datetime import datetime
-                timestamp = datetime.now().strftime("%H:%M:%S")
-                msg = f"[{timestamp}] 🚀 Starting {i}/{total}: {pod.get_service()}..."
-                print(f"\r{msg}{' ' * 40}", end="", flush=True)
-                await asyncio.sleep(0.1)
-                success = await pod.start()
-                pod._is_starting = False
-                pod_id = f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
-                if success:
-                    pod._was_running = True
-                    self.pod_monitor.mark_user_started(pod_id)
-                    self.notified_disconnected_pods.discard(pod_id)
-                    started_ok += 1
-                    timestamp = datetime.now().strftime("%H:%M:%S")
-                    result_msg = f"[{timestamp}] ✅ Started {pod.get_service()} successfully!"
-                else:
-                    pod._was_running = False
-                    timestamp = datetime.now().strftime("%H:%M:%S")
-                    result_msg = f"[{timestamp}] ❌ Failed to start {pod.get_service()}!"
-                print(f"\r{result_msg}{' ' * 40}", end="", flush=True)
-                await asyncio.sleep(0.7)
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            print(f"\r[{timestamp}] 🚀 Start completed: {started_ok}/{total} services started successfully.{' ' * 40}")
-            await asyncio.sleep(1)
+            runner = BatchRunner(self.bulk_concurrency)
+            self._log_console(f"🚀 Starting {len(stopped_pods)} services ({runner.concurrency} at a time)...")
+            summary = await runner.start_all(stopped_pods, self._on_batch_result)
+            self._print_batch_summary(summary, "started")
+            await asyncio.sleep(2 if summary.failed else 1)
         elif choice == 'stop':
             running_pods = [pod for pod in self.current_pods if pod.is_running()]
-            total = len([pod for pod in self.current_pods])
             if not running_pods:
-                from datetime import datetime
-                timestamp = datetime.now().strftime("%H:%M:%S")
-                print(f"\r[{timestamp}] 🛑 Stop completed: {total}/{total} services stopped successfully.{' ' * 40}")
+                total = len(self.current_pods)
+                self._log_console(f"🛑 Stop completed: {total}/{total} services stopped successfully.")
                 await asyncio.sleep(1)
                 return
 
-            total = len(running_pods)
-            stopped_ok = 0
-            for i, pod in enumerate(running_pods, 1):
-                from datetime import datetime
-                timestamp = datetime.now().strftime("%H:%M:%S")
-                msg = f"[{timestamp}] 🛑 Stopping {i}/{total}: {pod.get_service()}..."
-                print(f"\r{msg}{' ' * 40}", end="", flush=True)
-                pod_id = f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
-                success = pod.stop()
-                if success:
-                    pod._was_running = False
-                    self.pod_monitor.mark_user_stopped(pod_id)
-                    self.notified_disconnected_pods.discard(pod_id)
-                    stopped_ok += 1
-                    timestamp = datetime.now().strftime("%H:%M:%S")
-                    result_msg = f"[{timestamp}] ✅ Stopped {pod.get_service()} successfully!"
-                else:
-                    timestamp = datetime.now().strftime("%H:%M:%S")
-                    result_msg = f"[{timestamp}] ❌ Failed to stop {pod.get_service()}!"
-                print(f"\r{result_msg}{' ' * 40}", end="", flush=True)
-                await asyncio.sleep(0.7)
+            runner = BatchRunner(self.bulk_concurrency)
+            self._log_console(f"🛑 Stopping {len(running_pods)} services ({runner.concurrency} at a time)...")
+            summary = await runner.stop_all(running_pods, self._on_batch_result)
             self.stop_current_context()
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            print(f"\r[{timestamp}] 🛑 Stop completed: {stopped_ok}/{total} services stopped successfully.{' ' * 40}")
-            await asyncio.sleep(1)
+            self._print_batch_summary(summary, "stopped")
+            await asyncio.sleep(2 if summary.failed else 1)
         elif choice.isdigit():
             index = int(choice) - 1
             if 0 <= index < len(self.current_pods):
@@ -430,6 +459,8 @@ class KubeWireTUI:
                     msg = f"[{timestamp}] ✅ Stopped {service_name} successfully!"
                     print(f"\r{msg}{' ' * 40}", end="", flush=True)
                     await asyncio.sleep(0.8)
+                elif self._port_taken(pod):
+                    await asyncio.sleep(2)
                 else:
                     pod._is_starting = True
                     from datetime import datetime
@@ -460,6 +491,141 @@ class KubeWireTUI:
             self._log_console("❌ Invalid choice")
             await asyncio.sleep(1)
 
+    def _on_batch_result(self, result, done, total):
+        pod = result.pod
+        pod_id = f"{pod.get_context()}/{pod.get_namespace()}/{pod.get_service()}"
+        self.notified_disconnected_pods.discard(pod_id)
+        if getattr(pod, '_is_starting', False):
+            pod._is_starting = False
+            pod._was_running = result.success
+            if result.success:
+                self.pod_monitor.mark_user_started(pod_id)
+                self._log_console(f"✅ ({done}/{total}) Started {pod.get_service()}:{pod.get_port()} in {result.elapsed:.1f}s")
+            else:
+                self._log_console(f"❌ ({done}/{total}) Failed to start {pod.get_service()} {result.error}".rstrip())
+        else:
+            if result.success:
+                pod._was_running = False
+                self.pod_monitor.mark_user_stopped(pod_id)
+                self._log_console(f"✅ ({done}/{total}) Stopped {pod.get_service()}")
+            else:
+                self._log_console(f"❌ ({done}/{total}) Failed to stop {pod.get_service()} {result.error}".rstrip())
+
+    def _reconnect_info(self, pod, pod_id):
+        info = " ♻️" if pod.get_auto_reconnect() else ""
+        reconnect = self.pod_monitor.reconnect_state(pod_id)
+        if reconnect and reconnect.summary():
+            info += f" {reconnect.summary()}"
+        health = self.pod_monitor.health_state(pod_id)
+        if health and health.summary() and pod.is_running():
+            info += f" 🩺 {health.summary()}"
+        return info
+
+    @staticmethod
+    def _metrics_info(pod):
+        return f"\n      📊 {pod.metrics.summary()}" if pod.metrics else ""
+
+    def toggle_auto_reconnect(self, pod):
+        pod.pod.auto_reconnect = not pod.get_auto_reconnect()
+        state = "enabled" if pod.get_auto_reconnect() else "disabled"
+        self._log_console(f"♻️  Auto-reconnect {state} for {pod.get_service()}")
+        with self.discovery_lock:
+            ConfigManager.save_discovered_config(self.contexts)
+
+    def _port_taken(self, pod):
+        owner = self.registry.port_owner(pod)
+        if owner is None:
+            return False
+        shared = sorted(set(pod.get_local_ports()) & set(owner.get_local_ports()))
+        self._log_console(f"❌ Port {shared[0]} for {pod.get_service()} is in use by "
+                          f"{owner.get_service()} in {owner.get_context()}")
+        return True
+
+    def _print_batch_summary(self, summary, verb):
+        total = len(summary.results)
+        icon = "🚀" if summary.action == "start" else "🛑"
+        self._log_console(f"{icon} {summary.action.capitalize()} completed: {len(summary.succeeded)}/{total} "
+                          f"services {verb} successfully in {summary.elapsed:.1f}s.")
+        if summary.failed:
+            failed = ", ".join(result.pod.get_service() for result in summary.failed)
+            self._log_console(f"⚠️  Failed: {failed}")
+
+    def _merge_statuses(self, new_statuses):
+        names = {status.name for status in new_statuses}
+        return list(new_statuses) + [s for s in self.context_statuses if s.name not in names]
+
+    def _apply_discovery(self, new_contexts, new_statuses):
+        with self.discovery_lock:
+            self.context_statuses = new_statuses
+            degraded = [status.name for status in new_statuses if status.degraded]
+            merged = ConfigManager.merge_contexts(self.contexts, new_contexts, preserve=degraded)
+            changed = ConfigManager.context_signature(merged) != ConfigManager.context_signature(self.contexts)
+            if changed:
+                self.contexts = merged
+                if self.current_context not in merged:
+                    self.current_context = None
+                self._init_pod_flags()
+                ConfigManager.save_discovered_config(merged)
+            self._sync_watchers()
+            return changed
+
+    def _init_pod_flags(self):
+        for context_pods in self.contexts.values():
+            for pod in context_pods:
+                if not hasattr(pod, '_was_running'):
+                    pod._was_running = False
+                    pod._is_starting = False
+
+    def _sync_watchers(self):
+        if self.service_watch is None:
+            return
+        self.service_watch.sync([status.name for status in self.context_statuses if status.accessible]
+                                or list(self.contexts.keys()))
+
+    def _on_service_event(self, context, event):
+        with self.discovery_lock:
+            if not ConfigManager.apply_service_event(self.contexts, context, event):
+                return
+            self.registry.reindex()
+            self._init_pod_flags()
+            ConfigManager.save_discovered_config(self.contexts)
+        self._log_console(f"🔔 Service {event.namespace}/{event.name} {event.type.lower()} in {context}")
+        self.request_refresh()
+
+    def _reconcile_in_background(self):
+        # Asks every cluster again: within the TTL the cache would only hand
+        # back what is already on screen
+        def reconcile():
+            try:
+                new_contexts, new_statuses = ConfigManager.discover_config()
+            except Exception as e:
+                self._log_console(f"❌ Background discovery failed: {e}")
+                return
+            if not new_contexts:
+                return
+            if self._apply_discovery(new_contexts, new_statuses):
+                self._log_console("🔄 Discovery changed, configuration updated")
+                self.request_refresh()
+
+        threading.Thread(target=reconcile, daemon=True).start()
+
+    def show_tunnel_output(self, pod):
+        self.in_service_menu = False
+        output = pod.output
+        print(f"\n🩺 kubectl output for {pod.get_service()}:{pod.get_port()}")
+        print("-" * 50)
+        if output is None:
+            print("No tunnel has been started yet")
+        else:
+            print(f"{output.line_count} lines, {output.connection_count} connections handled")
+            for line in output.tail():
+                print(line)
+        with self.input_lock:
+            try:
+                input("\nPress Enter to go back: ")
+            except EOFError:
+                pass
+
     async def show_pod_logs(self, pod):
         context = pod.get_context()
         namespace = pod.get_namespace()
@@ -585,15 +751,18 @@ class KubeWireTUI:
                 pod._was_running = False
 
     def stop_all_contexts(self):
-        for context_name, pods in self.contexts.items():
-            for pod in pods:
-                if pod.is_running():
-                    pod.stop()
-                    pod._was_running = False
+        self.registry.stop_all()
 
     def stop_all(self):
         self.stop_all_contexts()
 
+    def stop_all_on_exit(self):
+        if self.daemon is not None:
+            self._log_console("👋 Exiting, tunnels keep running in the daemon")
+            return
+        self._log_console("👋 Stopping all services and exiting...")
+        self.stop_all_contexts()
+
     def notify_failures(self, failed_pods):
         """Método llamado por el monitor cuando detecta fallos"""
         if self.sound_enabled and failed_pods:
@@ -609,6 +778,8 @@ class KubeWireTUI:
     def trigger_refresh_with_failures(self, failed_pods):
         """Método llamado por el monitor para refrescar la pantalla con fallos"""
         if failed_pods:
+            for pod_id in failed_pods:
+                self._log_console(f"💥 Tunnel {pod_id} dropped")
             self.notify_failures(failed_pods)
         self.trigger_display_update()
 